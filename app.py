@@ -1,24 +1,157 @@
-from flask import Flask, jsonify, render_template, redirect, url_for, request, session, flash
+from flask import Flask, jsonify, render_template, redirect, url_for, request, session, flash, g, has_app_context, has_request_context
+from werkzeug.exceptions import HTTPException
 import sqlite3
 import os
 import random
 import hashlib
+import hmac
+import base64
+import json
+import functools
+import threading
+import time
+import bisect
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from db import (ConnectionPool, TableVersions, QueryRecord, LEARNER_VERSIONED_TABLES,
+                get_scope_filter, build_scope_aggregate_query)
+from engagement_predictor import predictor
+from events import ingest_events, decode_ndjson, EVENTS_MAX_BATCH, EVENTS_MAX_BODY
 
 app = Flask(__name__)
 app.secret_key = 'learnengage_secret_key_2024'
+# Form posts over this size get 413; event batches are the largest bodies
+app.config['MAX_CONTENT_LENGTH'] = EVENTS_MAX_BODY
 
-def get_db_connection():
-    conn = sqlite3.connect('engagement_hackathon.db')
+# Database location and pool size can be overridden from the environment
+DB_PATH = os.environ.get('DATABASE_PATH', 'engagement_hackathon.db')
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 4))
+# Statements slower than this are logged with their EXPLAIN QUERY PLAN;
+# QUERY_STATS=0 turns the per-request SQL instrumentation off entirely
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 100))
+QUERY_STATS_ENABLED = os.environ.get('QUERY_STATS', '1') != '0'
+# Threads running a request's independent read queries concurrently; 1 runs them in turn
+PARALLEL_READ_WORKERS = int(os.environ.get('PARALLEL_READ_WORKERS', 4))
+# Bearer token a Prometheus scraper sends to read /metrics without a session
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+def record_query(sql, params, seconds):
+    """query_listener for pooled connections: log the statement on the current request"""
+    if not has_request_context():
+        return None
+    record = QueryRecord(sql, params, seconds)
+    g.setdefault('queries', []).append(record)
+    return record
+
+query_listener = record_query if QUERY_STATS_ENABLED else None
+db_pool = ConnectionPool(DB_PATH, size=DB_POOL_SIZE, query_listener=query_listener)
+db_read_pool = ConnectionPool(DB_PATH, size=DB_POOL_SIZE, read_only=True, query_listener=query_listener)
+
+class BatchConnection:
+    """The connection shared by a /api/batch request's sub-requests.
+    
+    close() is a no-op so every sub-request reads from the same connection
+    and read transaction; /api/batch releases it when the batch is done.
+    """
+    
+    def __init__(self, conn):
+        object.__setattr__(self, '_conn', conn)
+    
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+    
+    def __setattr__(self, name, value):
+        setattr(self._conn, name, value)
+    
+    def close(self):
+        pass
+
+def get_db_connection(read_only=False):
+    """Get a pooled connection; conn.close() returns it to the pool"""
+    if read_only and has_app_context() and 'batch_conn' in g:
+        return BatchConnection(g.batch_conn)
+    conn = (db_read_pool if read_only else db_pool).acquire()
     conn.row_factory = sqlite3.Row
     return conn
 
+read_executor = ThreadPoolExecutor(max_workers=PARALLEL_READ_WORKERS, thread_name_prefix='db-read') \
+    if PARALLEL_READ_WORKERS > 1 else None
+
+def _run_read(fn):
+    """Run fn(conn) on its own read-only connection (on an executor thread).
+    
+    Worker threads have no request context, so the connection's statements
+    are collected locally and handed back for the request to record.
+    Returns (result, seconds, query_records).
+    """
+    conn = db_read_pool.acquire()
+    conn.row_factory = sqlite3.Row
+    records = []
+    if conn.query_listener is not None:
+        def collect(sql, params, seconds):
+            records.append(QueryRecord(sql, params, seconds))
+            return records[-1]
+        conn.query_listener = collect
+    started = time.perf_counter()
+    try:
+        return fn(conn), time.perf_counter() - started, records
+    finally:
+        conn.query_listener = db_read_pool.query_listener
+        conn.close()
+
+def run_parallel_reads(tasks):
+    """Run independent read tasks concurrently; returns {name: result}.
+    
+    `tasks` maps a name to fn(conn) -> result. Each task gets its own
+    read-only connection (and so its own snapshot), and SQLite releases
+    the GIL while a statement runs, so the tasks overlap and the caller
+    waits for the slowest one rather than the sum. Each task's wall time
+    is reported as a read-<name> entry in the Server-Timing header.
+    
+    Tasks must not call run_parallel_reads themselves. Inside /api/batch,
+    or with PARALLEL_READ_WORKERS=1, the tasks run in turn on the
+    request's usual connection instead.
+    """
+    timings = g.setdefault('parallel_reads', []) if has_request_context() else []
+    if read_executor is None or (has_app_context() and 'batch_conn' in g):
+        results = {}
+        for name, fn in tasks.items():
+            conn = get_db_connection(read_only=True)
+            started = time.perf_counter()
+            try:
+                results[name] = fn(conn)
+            finally:
+                conn.close()
+            timings.append((name, time.perf_counter() - started))
+        return results
+    
+    futures = {name: read_executor.submit(_run_read, fn) for name, fn in tasks.items()}
+    results = {}
+    error = None
+    # Wait for every task, even after a failure, so no query outlives the request
+    for name, future in futures.items():
+        try:
+            results[name], seconds, records = future.result()
+        except Exception as e:
+            error = error or e
+            continue
+        timings.append((name, seconds))
+        if records and has_request_context():
+            g.setdefault('queries', []).extend(records)
+    if error is not None:
+        raise error
+    return results
+
 # Ensure DB exists and tables are created on startup (Render-safe)
+# and the schema is migrated to the latest version (indexes etc.)
 try:
-    from db import create_tables_if_not_exist
+    from db import create_tables_if_not_exist, apply_migrations
     _conn = get_db_connection()
     _cur = _conn.cursor()
     create_tables_if_not_exist(_cur)
     _conn.commit()
+    for _version, _name in apply_migrations(_conn):
+        print(f"Applied schema migration {_version}: {_name}")
     _conn.close()
 except Exception as e:
     print(f"Warning: DB init check failed: {e}")
@@ -28,7 +161,7 @@ def hash_password(password):
     return hashlib.sha256(password.encode()).hexdigest()
 
 def authenticate_user(username, password):
-    conn = get_db_connection()
+    conn = get_db_connection(read_only=True)
     cursor = conn.cursor()
     cursor.execute("SELECT * FROM Users WHERE username = ?", (username,))
     user = cursor.fetchone()
@@ -52,36 +185,616 @@ def login_required(f):
     return decorated_function
 
 def get_user_courses():
-    """Get courses accessible to current user"""
+    """Get courses accessible to current user (resolved once per request)"""
     if 'user' not in session:
         return []
+    if 'user_courses' in g:
+        return g.user_courses
     
     user = session['user']
     if user['role'] == 'Super Admin' or user['assigned_courses'] == 'ALL':
         # Super admin can see all courses
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT course_id FROM Courses")
-        courses = [row['course_id'] for row in cursor.fetchall()]
-        conn.close()
-        return courses
+        courses = course_catalog.course_ids()
     else:
         # Program coordinator can only see assigned courses
-        return user['assigned_courses'].split(',')
+        courses = user['assigned_courses'].split(',')
+    g.user_courses = courses
+    return courses
 
 def get_course_names(course_ids):
     """Get course names for given course IDs"""
     if not course_ids:
         return []
+    return course_catalog.course_names(course_ids)
+
+def get_rollup_scope(user, user_courses):
+    """Get (where_clauses, params) restricting a login rollup table
+    (db.LOGIN_ROLLUPS) to the user's courses"""
+    if user['role'] == 'Super Admin':
+        return [], []
+    placeholders = ','.join('?' * len(user_courses))
+    return [f"course_id IN ({placeholders})"], list(user_courses)
+
+class ResponseCache:
+    """In-process LRU + TTL cache of serialized API responses.
     
-    conn = get_db_connection()
+    Each entry remembers the Table_Versions counters it was computed from
+    and is dropped as soon as any of them moves. Size is bounded by entry
+    count and total body bytes.
+    """
+    
+    def __init__(self, max_entries=512, max_bytes=64 * 1024 * 1024, ttl=60):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0}
+    
+    def _drop(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= len(entry[2])
+    
+    def get(self, key, versions):
+        """Return (body, mimetype) if a current entry exists, else None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, entry_versions, body, mimetype = entry
+                if expires_at < time.monotonic():
+                    self._drop(key)
+                    self._stats['expirations'] += 1
+                elif entry_versions != versions:
+                    self._drop(key)
+                    self._stats['invalidations'] += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self._stats['hits'] += 1
+                    return body, mimetype
+            self._stats['misses'] += 1
+            return None
+    
+    def put(self, key, versions, body, mimetype):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, versions, body, mimetype)
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self._stats['evictions'] += 1
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+    
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries), bytes=self._bytes)
+
+response_cache = ResponseCache(
+    max_entries=int(os.environ.get('CACHE_MAX_ENTRIES', 512)),
+    max_bytes=int(os.environ.get('CACHE_MAX_BYTES', 64 * 1024 * 1024)),
+    ttl=float(os.environ.get('CACHE_TTL', 60))
+)
+table_versions = TableVersions(DB_PATH)
+
+class CourseCatalog:
+    """Courses with their cohorts and per-cohort learner counts.
+    
+    Loaded lazily on first use and reloaded only when the Table_Versions
+    counters of Courses, Cohorts or Learners move. Each load builds a new
+    snapshot that replaces the old one, so readers never see it half built.
+    """
+    
+    TABLES = ('Courses', 'Cohorts', 'Learners')
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versions = None
+        self._courses = {}
+    
+    def _snapshot(self):
+        versions = table_versions.snapshot(self.TABLES)
+        if versions != self._versions:
+            with self._lock:
+                if versions != self._versions:
+                    self._courses = self._load()
+                    self._versions = versions
+        return self._courses
+    
+    def _load(self):
+        conn = get_db_connection(read_only=True)
+        cursor = conn.cursor()
+        cursor.execute("SELECT course_id, course_name FROM Courses")
+        courses = {row['course_id']: {'name': row['course_name'], 'cohorts': {}} for row in cursor.fetchall()}
+        cursor.execute("""
+            SELECT co.cohort_id, co.course_id, co.start_date, COUNT(l.learner_id) as learners
+            FROM Cohorts co
+            LEFT JOIN Learners l ON l.cohort_id = co.cohort_id
+            GROUP BY co.cohort_id
+        """)
+        for row in cursor.fetchall():
+            if row['course_id'] in courses:
+                courses[row['course_id']]['cohorts'][row['cohort_id']] = {
+                    'start_date': row['start_date'],
+                    'learners': row['learners']
+                }
+        conn.close()
+        return courses
+    
+    def clear(self):
+        """Drop the snapshot; the next read reloads it"""
+        with self._lock:
+            self._versions = None
+            self._courses = {}
+    
+    def course_ids(self):
+        return list(self._snapshot())
+    
+    def course_names(self, course_ids):
+        """[{'id', 'name'}] for the known courses among course_ids, in catalog order"""
+        wanted = set(course_ids)
+        return [{'id': course_id, 'name': course['name']}
+                for course_id, course in self._snapshot().items() if course_id in wanted]
+    
+    def cohorts(self, course_ids):
+        """{cohort_id: {'course_id', 'start_date', 'learners'}} for the given courses"""
+        courses = self._snapshot()
+        return {cohort_id: dict(cohort, course_id=course_id)
+                for course_id in course_ids if course_id in courses
+                for cohort_id, cohort in courses[course_id]['cohorts'].items()}
+
+course_catalog = CourseCatalog()
+
+def get_scope_key(user, user_courses):
+    """Cache key part for the data a user can see: coordinators with the
+    same courses share it, Super Admin scope is distinct"""
+    return (user['role'] == 'Super Admin', tuple(sorted(set(user_courses))))
+
+class QueryStats:
+    """Aggregated SQL timings behind /debug/queries.
+    
+    Keeps per-statement totals (whitespace-normalized SQL), the most recent
+    slow statements with their query plans and the most recent request
+    summaries. All bounded, so it can stay on in production.
+    """
+    
+    MAX_STATEMENTS = 1000
+    
+    def __init__(self, slow_ms, history=200):
+        self.slow_ms = slow_ms
+        self._lock = threading.Lock()
+        self._statements = {}
+        self._slow = deque(maxlen=history)
+        self._requests = deque(maxlen=history)
+    
+    def record_request(self, endpoint, queries):
+        """Fold one request's QueryRecords into the totals; returns its summary"""
+        slowest = max(queries, key=lambda q: q.seconds, default=None)
+        summary = {
+            'endpoint': endpoint,
+            'queries': len(queries),
+            'db_ms': round(sum(q.seconds for q in queries) * 1000, 3),
+            'slowest_ms': round(slowest.seconds * 1000, 3) if slowest else 0,
+            'slowest_sql': normalize_sql(slowest.sql) if slowest else None,
+        }
+        slow = [q for q in queries if q.seconds * 1000 >= self.slow_ms]
+        with self._lock:
+            self._requests.append(summary)
+            for q in queries:
+                sql = normalize_sql(q.sql)
+                entry = self._statements.get(sql)
+                if entry is None:
+                    if len(self._statements) >= self.MAX_STATEMENTS:
+                        continue
+                    entry = self._statements[sql] = {'sql': sql, 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'rows': 0}
+                ms = q.seconds * 1000
+                entry['count'] += 1
+                entry['total_ms'] += ms
+                entry['max_ms'] = max(entry['max_ms'], ms)
+                entry['rows'] += q.rows
+        for q in slow:
+            self.record_slow(endpoint, q)
+        return summary
+    
+    def record_slow(self, endpoint, query):
+        plan = explain_query(query.sql, query.params)
+        print(f"Slow query ({query.seconds * 1000:.1f} ms, {query.rows} rows) in {endpoint}: {normalize_sql(query.sql)}")
+        for line in plan:
+            print(f"    {line}")
+        with self._lock:
+            self._slow.append({
+                'endpoint': endpoint,
+                'sql': normalize_sql(query.sql),
+                'params': [str(p) for p in (query.params or [])][:20],
+                'ms': round(query.seconds * 1000, 3),
+                'rows': query.rows,
+                'plan': plan,
+                'at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            })
+    
+    def report(self, sort='total_ms', limit=20):
+        with self._lock:
+            statements = sorted(self._statements.values(), key=lambda e: e[sort], reverse=True)[:limit]
+            requests = sorted(self._requests, key=lambda r: r['db_ms'], reverse=True)[:limit]
+            slow = list(self._slow)[-limit:][::-1]
+        return {
+            'slow_query_ms': self.slow_ms,
+            'statements': [dict(e, total_ms=round(e['total_ms'], 3), max_ms=round(e['max_ms'], 3),
+                                mean_ms=round(e['total_ms'] / e['count'], 3)) for e in statements],
+            'slowest_requests': requests,
+            'slow_queries': slow,
+        }
+    
+    def clear(self):
+        with self._lock:
+            self._statements.clear()
+            self._slow.clear()
+            self._requests.clear()
+
+def normalize_sql(sql):
+    return ' '.join(sql.split())
+
+def explain_query(sql, params):
+    """EXPLAIN QUERY PLAN lines for a statement, on a separate uninstrumented connection"""
+    try:
+        conn = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True)
+        if params is None:
+            # executemany records carry no parameters; the plan does not depend on them
+            params = (None,) * sql.count('?')
+        try:
+            rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+        finally:
+            conn.close()
+        return [detail for _, _, _, detail in rows]
+    except sqlite3.Error as e:
+        return [f"(no plan: {e})"]
+
+query_stats = QueryStats(SLOW_QUERY_MS)
+
+@app.after_request
+def summarize_request_queries(response):
+    """Attach the request's SQL summary as a Server-Timing header and feed /debug/queries"""
+    reads = [f'read-{name};dur={round(seconds * 1000, 3)}' for name, seconds in g.pop('parallel_reads', ())]
+    queries = g.pop('queries', None)
+    if not queries:
+        if reads:
+            response.headers['Server-Timing'] = ', '.join(reads)
+        return response
+    request.environ['metrics.db_seconds'] = sum(q.seconds for q in queries)
+    endpoint = request.endpoint or request.path
+    if response.is_streamed:
+        # Rows are still to be fetched; account for them once the stream is done
+        response.call_on_close(lambda: query_stats.record_request(endpoint, queries))
+        return response
+    summary = query_stats.record_request(endpoint, queries)
+    response.headers['Server-Timing'] = ', '.join(
+        [f'db;dur={summary["db_ms"]};desc="{summary["queries"]} queries"'] + reads)
+    return response
+
+class RequestMetrics:
+    """Prometheus metrics for HTTP requests, rendered by /metrics.
+    
+    Every thread records into its own shard under the shard's own lock, so
+    requests never wait on each other, only briefly on /metrics copying
+    their shard. /metrics sums the copies and folds the shards of finished
+    threads into a retired total (the dev server runs each request on a
+    new thread).
+    """
+    
+    BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+    
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards = []
+        self._retired = self._new_shard(None)
+    
+    def _new_shard(self, thread):
+        return {'thread': thread, 'lock': threading.Lock(), 'latency': {}, 'db': {}, 'in_flight': {}}
+    
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = self._new_shard(threading.current_thread())
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+    
+    def _observe(self, histograms, key, seconds):
+        histogram = histograms.get(key)
+        if histogram is None:
+            # One slot per bucket plus +Inf, then sum and count
+            histogram = histograms[key] = [0] * (len(self.BUCKETS) + 3)
+        histogram[bisect.bisect_left(self.BUCKETS, seconds)] += 1
+        histogram[-2] += seconds
+        histogram[-1] += 1
+    
+    def started(self, route):
+        shard = self._shard()
+        with shard['lock']:
+            shard['in_flight'][route] = shard['in_flight'].get(route, 0) + 1
+    
+    def finished(self, route, method, status, role, seconds, db_seconds):
+        shard = self._shard()
+        with shard['lock']:
+            shard['in_flight'][route] -= 1
+            self._observe(shard['latency'], (route, method, str(status), role), seconds)
+            if db_seconds is not None:
+                self._observe(shard['db'], (route,), db_seconds)
+    
+    def _copy(self, shard):
+        # Taken under the shard's lock: its owner may be adding keys meanwhile
+        with shard['lock']:
+            return {
+                'latency': {key: list(histogram) for key, histogram in shard['latency'].items()},
+                'db': {key: list(histogram) for key, histogram in shard['db'].items()},
+                'in_flight': dict(shard['in_flight']),
+            }
+    
+    def _merge(self, into, shard):
+        for name in ('latency', 'db'):
+            for key, histogram in shard[name].items():
+                total = into[name].setdefault(key, [0] * len(histogram))
+                for i, value in enumerate(histogram):
+                    total[i] += value
+        for route, value in shard['in_flight'].items():
+            into['in_flight'][route] = into['in_flight'].get(route, 0) + value
+    
+    def collect(self):
+        """Sum of every shard; shards of finished threads are folded into the retired total"""
+        with self._lock:
+            live = []
+            for shard in self._shards:
+                if shard['thread'].is_alive():
+                    live.append(shard)
+                else:
+                    self._merge(self._retired, self._copy(shard))
+            self._shards = live
+            total = self._new_shard(None)
+            self._merge(total, self._retired)
+        for shard in live:
+            self._merge(total, self._copy(shard))
+        return total
+
+def _metric_labels(names, values):
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for v in values)
+    return ','.join(f'{name}="{value}"' for name, value in zip(names, escaped))
+
+def render_histogram(lines, name, help_text, label_names, histograms):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for key, histogram in sorted(histograms.items()):
+        labels = _metric_labels(label_names, key)
+        cumulative = 0
+        for bound, count in zip(RequestMetrics.BUCKETS + ('+Inf',), histogram):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {histogram[-2]}")
+        lines.append(f"{name}_count{{{labels}}} {histogram[-1]}")
+
+def render_metric(lines, name, metric_type, help_text, samples):
+    """samples: [(label names, label values, value)]"""
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {metric_type}")
+    for label_names, values, value in samples:
+        labels = _metric_labels(label_names, values)
+        lines.append(f"{name}{{{labels}}} {value}" if labels else f"{name} {value}")
+
+request_metrics = RequestMetrics()
+
+@app.before_request
+def start_request_metrics():
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    # Kept in the WSGI environ, not g, so /api/batch sub-requests (which share
+    # the outer request's g) are not counted as requests of their own
+    request.environ['metrics.started'] = (route, time.perf_counter())
+    request_metrics.started(route)
+
+@app.after_request
+def record_response_status(response):
+    request.environ['metrics.status'] = response.status_code
+    return response
+
+@app.teardown_request
+def finish_request_metrics(exc):
+    started = request.environ.pop('metrics.started', None)
+    if started is None:
+        return
+    route, started_at = started
+    role = session['user']['role'] if 'user' in session else 'anonymous'
+    request_metrics.finished(route, request.method, request.environ.get('metrics.status', 500), role,
+                             time.perf_counter() - started_at, request.environ.get('metrics.db_seconds'))
+
+def make_etag(key, versions):
+    """Strong ETag for a cache key at the given table versions.
+    
+    The TTL window is mixed in so time-relative fields ("days ago", the
+    trailing twelve months) go stale no later than cached bodies do.
+    """
+    window = int(time.time() // response_cache.ttl) if response_cache.ttl > 0 else 0
+    return hashlib.sha1(repr((key, versions, window)).encode()).hexdigest()
+
+def cached_api(*tables, row_versions=None):
+    """Cache a JSON route's 200 responses per scope and query args.
+    
+    `tables` lists the tables the route reads; a write to any of them
+    invalidates the route's entries. `row_versions`, if given, is called
+    with the route's arguments and returns a tuple of finer-grained
+    counters (such as one learner's Learner_Versions row) that entries
+    also depend on. Responses carry an ETag built from the same key and
+    versions, and a matching If-None-Match is answered with 304 before the
+    route runs.
+    """
+    def decorator(f):
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            user = session['user']
+            key = (
+                f.__name__,
+                get_scope_key(user, get_user_courses()),
+                tuple(sorted(request.args.items(multi=True))),
+                tuple(sorted(kwargs.items()))
+            )
+            if 'batch_versions' in g:
+                # Validate against the batch's snapshot, not the latest commit
+                versions = tuple(g.batch_versions.get(table, 0) for table in tables)
+            else:
+                versions = table_versions.snapshot(tables)
+            if row_versions is not None:
+                versions += row_versions(**kwargs)
+            etag = make_etag(key, versions)
+            
+            if request.if_none_match.contains(etag):
+                response = app.response_class(status=304)
+            else:
+                cached = response_cache.get(key, versions)
+                if cached is not None:
+                    body, mimetype = cached
+                    response = app.response_class(body, mimetype=mimetype)
+                else:
+                    response = app.make_response(f(*args, **kwargs))
+                    if response.status_code == 200 and not response.is_streamed:
+                        response_cache.put(key, versions, response.get_data(), response.mimetype)
+                if response.status_code != 200:
+                    return response
+            
+            # Responses are per user scope; browsers must revalidate before reuse
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
+
+# Rows pulled from the cursor per fetchmany() while streaming a response
+STREAM_BATCH_SIZE = 500
+STREAM_FORMATS = {'json': 'application/json', 'ndjson': 'application/x-ndjson'}
+# Same output as jsonify's compact mode, without its per-call setup
+stream_encoder = json.JSONEncoder(sort_keys=True, separators=(',', ':'), default=app.json.default)
+
+def get_stream_format():
+    """The ?format= of a streamed list response; raises ValueError if unknown"""
+    fmt = request.args.get('format', 'json')
+    if fmt not in STREAM_FORMATS:
+        raise ValueError(f"Unknown format: {fmt}")
+    return fmt
+
+def stream_rows(query, params, format_row, fmt='json'):
+    """Stream a query's rows as a JSON array or NDJSON, one fetchmany() batch at a time.
+    
+    The query runs before the response is returned, so SQL errors still
+    reach the route's error handling; an error while rows are streamed
+    aborts the response. The connection is released when the response is
+    closed.
+    """
+    conn = get_db_connection(read_only=True)
+    try:
+        cursor = conn.execute(query, params)
+    except Exception:
+        conn.close()
+        raise
+    released = []
+    
+    def release():
+        if not released:
+            released.append(True)
+            conn.close()
+    
+    def generate():
+        try:
+            separator = '\n' if fmt == 'ndjson' else ','
+            first = True
+            if fmt == 'json':
+                yield '['
+            while True:
+                rows = cursor.fetchmany(STREAM_BATCH_SIZE)
+                if not rows:
+                    break
+                chunk = separator.join(stream_encoder.encode(format_row(row)) for row in rows)
+                if fmt == 'ndjson':
+                    yield chunk + '\n'
+                else:
+                    yield chunk if first else ',' + chunk
+                first = False
+            if fmt == 'json':
+                yield ']'
+        except Exception:
+            # The status line is already sent: re-raise so the server aborts
+            # the connection instead of ending a truncated body cleanly
+            app.logger.exception("Streaming error; aborting the response")
+            raise
+        finally:
+            release()
+    
+    response = app.response_class(generate(), mimetype=STREAM_FORMATS[fmt])
+    response.call_on_close(release)
+    return response
+
+# Newest-first feeds: route -> (items key, sort key, id column). Each is
+# streamed whole, or with limit/cursor served one keyset page at a time;
+# the keys match the indexes created by migration 16.
+FEEDS = {
+    'tickets': ('tickets', "COALESCE(t.created_at_epoch, 0)", "t.ticket_id"),
+    'interventions': ('interventions', "COALESCE(n.timestamp_epoch, 0)", "n.nudge_id"),
+}
+FEED_PAGE_ARGS = ('limit', 'cursor')
+FEED_PAGE_DEFAULT = 100
+FEED_PAGE_MAX = 500
+
+def feed_response(feed, columns, from_sql, where_sql, params, format_row):
+    """Rows of a FEEDS feed matched by from_sql/where_sql, newest first.
+    
+    Without limit/cursor the whole feed is streamed (JSON array or NDJSON).
+    Otherwise one page is returned: {<items key>: [...], 'next_cursor':
+    str|None, 'total': int}; pass next_cursor as ?cursor= to continue.
+    """
+    items_key, sort_expr, id_column = FEEDS[feed]
+    order_sql = f"ORDER BY {sort_expr} DESC, {id_column} DESC"
+    try:
+        fmt = get_stream_format()
+        if not any(arg in request.args for arg in FEED_PAGE_ARGS):
+            return stream_rows(f"SELECT {columns} {from_sql} {where_sql} {order_sql}", params, format_row, fmt)
+        if fmt != 'json':
+            raise ValueError("format=ndjson is only available for the full list")
+        limit = min(max(int(request.args.get('limit', FEED_PAGE_DEFAULT)), 1), FEED_PAGE_MAX)
+        page_where, page_params = where_sql, list(params)
+        if request.args.get('cursor'):
+            last_sort, last_id = decode_cursor(request.args['cursor'])
+            # The leading bound lets SQLite seek the expression index; the
+            # row value alone is only applied as a filter during the scan
+            page_where += f" {'AND' if where_sql else 'WHERE'} {sort_expr} <= ? AND ({sort_expr}, {id_column}) < (?, ?)"
+            page_params.extend([last_sort, last_sort, last_id])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    conn = get_db_connection(read_only=True)
     cursor = conn.cursor()
-    placeholders = ','.join('?' * len(course_ids))
-    cursor.execute(f"SELECT course_id, course_name FROM Courses WHERE course_id IN ({placeholders})", course_ids)
-    courses = cursor.fetchall()
+    # Fetch one extra row to know whether another page exists
+    cursor.execute(f"SELECT {columns}, {sort_expr} as sort_key, {id_column} as row_id "
+                   f"{from_sql} {page_where} {order_sql} LIMIT ?", page_params + [limit + 1])
+    rows = cursor.fetchall()
+    cursor.execute(f"SELECT COUNT(*) {from_sql} {where_sql}", params)
+    total = cursor.fetchone()[0]
     conn.close()
     
-    return [{'id': course['course_id'], 'name': course['course_name']} for course in courses]
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1]['sort_key'], rows[-1]['row_id']])
+    return jsonify({
+        items_key: [format_row(row) for row in rows],
+        'next_cursor': next_cursor,
+        'total': total
+    })
+
+# Tables read by the scope joins every API route uses
+SCOPE_TABLES = ('Learners', 'Cohorts', 'Courses')
+ACTIVITY_TABLES = ('Login_Activity', 'Assignment_Details', 'Quiz_Details', 'Live_Session', 'Ticket_Details')
 
 @app.route('/')
 def index():
@@ -120,136 +833,49 @@ def dashboard():
     
     # Get REAL stats for dashboard based on user role and actual data
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        if user['role'] == 'Super Admin':
-            # Super admin sees all learners with comprehensive stats
-            dashboard_query = """
-                SELECT 
-                    COUNT(DISTINCT l.learner_id) as total_learners,
-                    COUNT(DISTINCT c.course_id) as total_courses,
-                    COUNT(DISTINCT co.cohort_id) as total_cohorts,
-                    SUM(la.total_duration) as total_login_time,
-                    COUNT(DISTINCT ad.assignment_id) as total_assignments,
-                    COUNT(DISTINCT CASE WHEN ad.assignment_status = 'Submitted' THEN ad.assignment_id END) as completed_assignments,
-                    COUNT(DISTINCT qd.quiz_id) as total_quizzes,
-                    COUNT(DISTINCT CASE WHEN qd.quiz_status = 'Attempted' THEN qd.quiz_id END) as attempted_quizzes,
-                    COUNT(DISTINCT ls.session_id) as total_sessions,
-                    COUNT(DISTINCT CASE WHEN ls.attendance_status = 'Present' THEN ls.session_id END) as attended_sessions,
-                    COUNT(DISTINCT td.ticket_id) as total_tickets,
-                    COUNT(DISTINCT CASE WHEN td.status = 'Resolved' THEN td.ticket_id END) as resolved_tickets
-                FROM Learners l
-                LEFT JOIN Cohorts co ON l.cohort_id = co.cohort_id
-                LEFT JOIN Courses c ON co.course_id = c.course_id
-                LEFT JOIN Login_Activity la ON l.learner_id = la.learner_id
-                LEFT JOIN Assignment_Details ad ON l.learner_id = ad.learner_id
-                LEFT JOIN Quiz_Details qd ON l.learner_id = qd.learner_id
-                LEFT JOIN Live_Session ls ON l.learner_id = ls.learner_id
-                LEFT JOIN Ticket_Details td ON l.learner_id = td.learner_id
-            """
-            cursor.execute(dashboard_query)
-        else:
-            # Program coordinator sees only their assigned courses data
-            placeholders = ','.join('?' * len(user_courses))
-            dashboard_query = f"""
-                SELECT 
-                    COUNT(DISTINCT l.learner_id) as total_learners,
-                    COUNT(DISTINCT c.course_id) as total_courses,
-                    COUNT(DISTINCT co.cohort_id) as total_cohorts,
-                    SUM(la.total_duration) as total_login_time,
-                    COUNT(DISTINCT ad.assignment_id) as total_assignments,
-                    COUNT(DISTINCT CASE WHEN ad.assignment_status = 'Submitted' THEN ad.assignment_id END) as completed_assignments,
-                    COUNT(DISTINCT qd.quiz_id) as total_quizzes,
-                    COUNT(DISTINCT CASE WHEN qd.quiz_status = 'Attempted' THEN qd.quiz_id END) as attempted_quizzes,
-                    COUNT(DISTINCT ls.session_id) as total_sessions,
-                    COUNT(DISTINCT CASE WHEN ls.attendance_status = 'Present' THEN ls.session_id END) as attended_sessions,
-                    COUNT(DISTINCT td.ticket_id) as total_tickets,
-                    COUNT(DISTINCT CASE WHEN td.status = 'Resolved' THEN td.ticket_id END) as resolved_tickets
-                FROM Learners l
-                JOIN Cohorts co ON l.cohort_id = co.cohort_id
-                JOIN Courses c ON co.course_id = c.course_id
-                LEFT JOIN Login_Activity la ON l.learner_id = la.learner_id
-                LEFT JOIN Assignment_Details ad ON l.learner_id = ad.learner_id
-                LEFT JOIN Quiz_Details qd ON l.learner_id = qd.learner_id
-                LEFT JOIN Live_Session ls ON l.learner_id = ls.learner_id
-                LEFT JOIN Ticket_Details td ON l.learner_id = td.learner_id
-                WHERE c.course_id IN ({placeholders})
-            """
-            cursor.execute(dashboard_query, user_courses)
-            
-        dashboard_data = cursor.fetchone()
-        
-        # Get engagement distribution for the coordinator's learners
-        if user['role'] == 'Super Admin':
-            engagement_query = """
-                SELECT l.learner_id,
-                       COALESCE(SUM(la.total_duration)/3600.0, 0) as login_hours,
-                       COALESCE(COUNT(CASE WHEN ad.assignment_status = 'Submitted' THEN 1 END), 0) as completed_assignments,
-                       COALESCE(COUNT(CASE WHEN qd.quiz_status = 'Attempted' THEN 1 END), 0) as attempted_quizzes,
-                       COALESCE(COUNT(CASE WHEN ls.attendance_status = 'Present' THEN 1 END), 0) as attended_sessions
-                FROM Learners l
-                LEFT JOIN Login_Activity la ON l.learner_id = la.learner_id
-                LEFT JOIN Assignment_Details ad ON l.learner_id = ad.learner_id
-                LEFT JOIN Quiz_Details qd ON l.learner_id = qd.learner_id
-                LEFT JOIN Live_Session ls ON l.learner_id = ls.learner_id
-                GROUP BY l.learner_id
-            """
-            cursor.execute(engagement_query)
-        else:
-            engagement_query = f"""
-                SELECT l.learner_id,
-                       COALESCE(SUM(la.total_duration)/3600.0, 0) as login_hours,
-                       COALESCE(COUNT(CASE WHEN ad.assignment_status = 'Submitted' THEN 1 END), 0) as completed_assignments,
-                       COALESCE(COUNT(CASE WHEN qd.quiz_status = 'Attempted' THEN 1 END), 0) as attempted_quizzes,
-                       COALESCE(COUNT(CASE WHEN ls.attendance_status = 'Present' THEN 1 END), 0) as attended_sessions
-                FROM Learners l
-                JOIN Cohorts co ON l.cohort_id = co.cohort_id
-                JOIN Courses c ON co.course_id = c.course_id
-                LEFT JOIN Login_Activity la ON l.learner_id = la.learner_id
-                LEFT JOIN Assignment_Details ad ON l.learner_id = ad.learner_id
-                LEFT JOIN Quiz_Details qd ON l.learner_id = qd.learner_id
-                LEFT JOIN Live_Session ls ON l.learner_id = ls.learner_id
-                WHERE c.course_id IN ({placeholders})
-                GROUP BY l.learner_id
-            """
-            cursor.execute(engagement_query, user_courses)
-        
-        learner_engagement = cursor.fetchall()
-        
-        # Calculate real engagement distribution
-        on_track = at_risk = drop_off = 0
-        engagement_scores = []
-        
-        for learner in learner_engagement:
-            # Real engagement calculation
-            login_score = min(learner['login_hours'], 10)
-            assignment_score = learner['completed_assignments'] * 5
-            quiz_score = learner['attempted_quizzes'] * 3
-            attendance_score = learner['attended_sessions'] * 7
-            
-            total_engagement = login_score + assignment_score + quiz_score + attendance_score
-            engagement_percentage = min(total_engagement, 100)
-            engagement_scores.append(engagement_percentage)
-            
-            if engagement_percentage >= 70:
-                on_track += 1
-            elif engagement_percentage >= 40:
-                at_risk += 1
-            else:
-                drop_off += 1
+        # Super admin sees all learners, coordinators only their assigned courses
+        dashboard_query, dashboard_params = build_scope_aggregate_query(user, user_courses, [
+            'total_learners', 'total_courses', 'total_cohorts', 'total_login_time',
+            'total_assignments', 'completed_assignments', 'total_quizzes', 'attempted_quizzes',
+            'total_sessions', 'attended_sessions', 'total_tickets', 'resolved_tickets'
+        ])
+        
+        # Band every learner in scope by their stored score in one batched pass
+        scope_join, scope_where, params = get_scope_filter(user, user_courses)
+        
+        # Real trend data based on daily login activity in the user's courses
+        trend_clauses, trend_params = get_rollup_scope(user, user_courses)
+        trend_query = f"""
+            SELECT 
+                weekday as day_of_week,
+                SUM(hours) / SUM(logins) as avg_daily_hours,
+                SUM(active_learners) as daily_active_users
+            FROM Login_Rollup_Weekday
+            {'WHERE ' + ' AND '.join(trend_clauses) if trend_clauses else ''}
+            GROUP BY weekday
+            ORDER BY weekday
+        """
         
-        conn.close()
+        # The three reads are independent, so they run side by side
+        reads = run_parallel_reads({
+            'summary': lambda conn: conn.execute(dashboard_query, dashboard_params).fetchone(),
+            'engagement': lambda conn: predictor.load_scores(conn.cursor(), f"FROM Learners l {scope_join}", scope_where, params),
+            'trend': lambda conn: conn.execute(trend_query, trend_params).fetchall(),
+        })
+        dashboard_data = reads['summary']
+        trend_raw = reads['trend']
+        engagement = predictor.summarize(reads['engagement'])
+        drop_off, at_risk, on_track, completed = engagement['bands']
         
         # Real statistics
         stats = {
             'total_learners': dashboard_data['total_learners'] or 0,
             'total_courses': dashboard_data['total_courses'] or 0,
             'total_cohorts': dashboard_data['total_cohorts'] or 0,
-            'on_track': on_track,
+            'on_track': on_track + completed,
             'at_risk': at_risk,
             'drop_off': drop_off,
-            'avg_engagement': round(sum(engagement_scores) / len(engagement_scores), 1) if engagement_scores else 0,
+            'avg_engagement': round(engagement['avg'], 1),
             'total_login_hours': round((dashboard_data['total_login_time'] or 0) / 3600, 1),
             'assignment_completion_rate': round(
                 (dashboard_data['completed_assignments'] / dashboard_data['total_assignments'] * 100) 
@@ -269,24 +895,6 @@ def dashboard():
             )
         }
         
-        # Real trend data based on daily login activity
-        trend_query = """
-            SELECT 
-                strftime('%w', login_time) as day_of_week,
-                AVG(total_duration/3600.0) as avg_daily_hours,
-                COUNT(DISTINCT learner_id) as daily_active_users
-            FROM Login_Activity 
-            WHERE login_time IS NOT NULL
-            GROUP BY strftime('%w', login_time)
-            ORDER BY day_of_week
-        """
-        
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(trend_query)
-        trend_raw = cursor.fetchall()
-        conn.close()
-        
         # Format trend data
         days = ['Sun', 'Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat']
         daily_engagement = [0] * 7
@@ -344,29 +952,11 @@ def learners():
     user = session['user']
     
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Get courses accessible to user for filtering
-        if user['role'] == 'Super Admin':
-            cursor.execute("SELECT course_id, course_name FROM Courses")
-            user_courses = []
-        else:
-            user_courses = get_user_courses()
-            placeholders = ','.join('?' * len(user_courses))
-            cursor.execute(f"SELECT course_id, course_name FROM Courses WHERE course_id IN ({placeholders})", user_courses)
-        
-        courses = cursor.fetchall()
-        
-        # Get cohorts for filtering
-        if user['role'] == 'Super Admin':
-            cursor.execute("SELECT DISTINCT c.cohort_id FROM Cohorts c")
-        else:
-            placeholders = ','.join('?' * len(user_courses))
-            cursor.execute(f"SELECT DISTINCT c.cohort_id FROM Cohorts c WHERE c.course_id IN ({placeholders})", user_courses)
-        
-        cohorts = cursor.fetchall()
-        conn.close()
+        # Courses and cohorts accessible to user for filtering, from the catalog
+        user_courses = get_user_courses()
+        courses = [{'course_id': course['id'], 'course_name': course['name']}
+                   for course in get_course_names(user_courses)]
+        cohorts = [{'cohort_id': cohort_id} for cohort_id in sorted(course_catalog.cohorts(user_courses))]
         
     except Exception as e:
         print(f"Error loading courses/cohorts: {e}")
@@ -375,100 +965,202 @@ def learners():
         
     return render_template('learners.html', user=user, courses=courses, cohorts=cohorts)
 
+# Learner history streams, served newest first with keyset pagination on
+# (sort key, id): route -> (detail key, table, id column, sort expression,
+# columns). The sort expressions match the indexes created by migration 11.
+LEARNER_HISTORY = {
+    'logins': ('login_activity', 'Login_Activity', 'login_id', "COALESCE(login_time_epoch, 0)",
+               ['login_time', 'logout_time', 'total_duration']),
+    'assignments': ('assignments', 'Assignment_Details', 'assignment_id', "COALESCE(submitted_at_epoch, 0)",
+                    ['assignment_id', 'assignment_status', 'assignment_score', 'submitted_at']),
+    'quizzes': ('quizzes', 'Quiz_Details', 'quiz_id', "COALESCE(attempted_at_epoch, 0)",
+                ['quiz_id', 'quiz_status', 'quiz_score', 'attempted_at']),
+    'sessions': ('live_sessions', 'Live_Session', 'session_id', "session_id",
+                 ['session_id', 'attendance_status']),
+    'nudges': ('nudge_history', 'Nudge_Logs', 'nudge_id', "COALESCE(timestamp_epoch, 0)",
+               ['timestamp', 'nudge_type', 'message', 'status']),
+    'tickets': ('tickets', 'Ticket_Details', 'ticket_id', "COALESCE(created_at_epoch, 0)",
+                ['ticket_id', 'subject', 'priority', 'status', 'created_at']),
+}
+# Rows per stream rendered with the page; the rest are fetched on demand
+LEARNER_HISTORY_FIRST_PAGE = 20
+LEARNER_HISTORY_PAGE_DEFAULT = 50
+LEARNER_HISTORY_PAGE_MAX = 200
+
+def learner_history_select(stream):
+    """SELECT sort_key, row_id and the stream's columns for :learner_id,
+    without ORDER BY/LIMIT"""
+    _, table, id_column, sort_expr, columns = LEARNER_HISTORY[stream]
+    return (f"SELECT {sort_expr} as sort_key, {id_column} as row_id, {', '.join(columns)} "
+            f"FROM {table} WHERE learner_id = :learner_id")
+
+def format_history_row(stream, row):
+    """Shape one learner_history_select row (sort_key, row_id, columns...)"""
+    item = dict(zip(LEARNER_HISTORY[stream][4], row[2:]))
+    if stream == 'logins':
+        # Minutes to seconds for the template's h/m formatting
+        item['total_duration'] = (item['total_duration'] or 0) * 60
+    return item
+
+def build_learner_first_pages_query():
+    # One statement for the first page of every stream: each branch is a
+    # bounded index range scan of the learner's slice
+    width = max(len(spec[4]) for spec in LEARNER_HISTORY.values())
+    branches = []
+    for position, (stream, spec) in enumerate(LEARNER_HISTORY.items()):
+        padding = ', NULL' * (width - len(spec[4]))
+        branches.append(f"SELECT {position} as stream, * {padding} FROM ("
+                        f"{learner_history_select(stream)} ORDER BY sort_key DESC, row_id DESC LIMIT :limit)")
+    return '\nUNION ALL\n'.join(branches) + '\nORDER BY stream, sort_key DESC, row_id DESC'
+
+LEARNER_FIRST_PAGES_QUERY = build_learner_first_pages_query()
+
+def load_learner_detail(learner_id):
+    """Profile, activity totals and the first page of every history stream
+    for one learner, in two statements on one connection.
+    
+    Returns (learner_version, detail) with detail None if the learner is
+    unknown. detail['next_cursors'] holds each stream's cursor for
+    /api/learner/<id>/<stream>, or None when it fits on the first page.
+    """
+    conn = get_db_connection(read_only=True)
+    cursor = conn.cursor()
+    # The version is read before the data, so a concurrent write can only
+    # make the cached copy look older than it is, never newer
+    cursor.execute("""
+        SELECT l.learner_id, l.name, l.email, l.contact, l.country_region, l.work_ex,
+               l.cohort_id, co.course_id, l.total_engagement_score, COALESCE(v.version, 0) as version,
+               s.total_logins, s.total_assignments, s.total_quizzes, s.total_sessions
+        FROM Learners l
+        LEFT JOIN Cohorts co ON co.cohort_id = l.cohort_id
+        LEFT JOIN Learner_Versions v ON v.learner_id = l.learner_id
+        LEFT JOIN Learner_Activity_Summary s ON s.learner_id = l.learner_id
+        WHERE l.learner_id = ?
+    """, (learner_id,))
+    learner = cursor.fetchone()
+    if not learner:
+        version = cursor.execute("SELECT version FROM Learner_Versions WHERE learner_id = ?", (learner_id,)).fetchone()
+        conn.close()
+        return (version[0] if version else 0), None
+    
+    pages = {stream: [] for stream in LEARNER_HISTORY}
+    streams = list(LEARNER_HISTORY)
+    cursor.row_factory = None
+    # One extra row per stream tells whether it continues past the first page
+    cursor.execute(LEARNER_FIRST_PAGES_QUERY, {'learner_id': learner_id, 'limit': LEARNER_HISTORY_FIRST_PAGE + 1})
+    for row in cursor:
+        pages[streams[row[0]]].append(row[1:])
+    conn.close()
+    
+    detail = {
+        'learner': {
+            'learner_id': learner['learner_id'],
+            'name': learner['name'],
+            'email': learner['email'],
+            'contact': learner['contact'],
+            'country_region': learner['country_region'],
+            'cohort_id': learner['cohort_id'],
+            'course_id': learner['course_id'],
+        },
+        'engagement_score': round(learner['total_engagement_score'] or 0, 1),
+        'totals': {
+            'logins': learner['total_logins'] or 0,
+            'assignments': learner['total_assignments'] or 0,
+            'quizzes': learner['total_quizzes'] or 0,
+            'sessions': learner['total_sessions'] or 0,
+        },
+        'next_cursors': {},
+    }
+    for stream, rows in pages.items():
+        next_cursor = None
+        if len(rows) > LEARNER_HISTORY_FIRST_PAGE:
+            rows = rows[:LEARNER_HISTORY_FIRST_PAGE]
+            next_cursor = encode_cursor([rows[-1][0], rows[-1][1]])
+        detail[LEARNER_HISTORY[stream][0]] = [format_history_row(stream, row) for row in rows]
+        detail['next_cursors'][stream] = next_cursor
+    return learner['version'], detail
+
+def learner_version(learner_id):
+    """The learner's Learner_Versions counter (0 before any of their rows is written)"""
+    conn = get_db_connection(read_only=True)
+    row = conn.execute("SELECT version FROM Learner_Versions WHERE learner_id = ?", (learner_id,)).fetchone()
+    conn.close()
+    return row[0] if row else 0
+
+class LearnerDetailCache:
+    """LRU cache of load_learner_detail() results, one entry per learner.
+    
+    An entry is served as is while none of the learner tables have been
+    written; otherwise it is revalidated against that learner's
+    Learner_Versions counter, so other learners' activity costs one
+    primary-key lookup instead of a reload.
+    """
+    
+    TABLES = tuple(LEARNER_VERSIONED_TABLES)
+    
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._stats = {'hits': 0, 'revalidations': 0, 'misses': 0, 'evictions': 0}
+    
+    def get(self, learner_id):
+        """Current detail for learner_id (None if the learner doesn't exist)"""
+        tables = table_versions.snapshot(self.TABLES)
+        with self._lock:
+            entry = self._entries.get(learner_id)
+        if entry is not None:
+            entry_tables, entry_version, detail = entry
+            if entry_tables == tables:
+                return self._hit(learner_id, entry, 'hits')
+            if learner_version(learner_id) == entry_version:
+                return self._hit(learner_id, (tables, entry_version, detail), 'revalidations')
+        
+        version, detail = load_learner_detail(learner_id)
+        with self._lock:
+            self._stats['misses'] += 1
+            self._entries[learner_id] = (tables, version, detail)
+            self._entries.move_to_end(learner_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+        return detail
+    
+    def _hit(self, learner_id, entry, outcome):
+        with self._lock:
+            self._entries[learner_id] = entry
+            self._entries.move_to_end(learner_id)
+            self._stats[outcome] += 1
+        return entry[2]
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries))
+
+learner_detail_cache = LearnerDetailCache(max_entries=int(os.environ.get('LEARNER_CACHE_MAX_ENTRIES', 1024)))
+
+def get_learner_in_scope(learner_id):
+    """Cached detail for learner_id, or None if the learner doesn't exist or
+    belongs to a course the current user can't see"""
+    data = learner_detail_cache.get(learner_id)
+    if data is None or data['learner']['course_id'] not in get_user_courses():
+        return None
+    return data
+
 # Learner details page with full history
 @app.route('/learner/<learner_id>')
 @login_required
 def learner_details(learner_id):
     user = session['user']
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Fetch learner profile
-        cursor.execute("""
-            SELECT l.learner_id, l.name, l.email, l.contact, l.country_region, l.work_ex,
-                   l.cohort_id, l.total_engagement_score
-            FROM Learners l
-            WHERE l.learner_id = ?
-        """, (learner_id,))
-        learner = cursor.fetchone()
-        if not learner:
-            conn.close()
+        data = get_learner_in_scope(learner_id)
+        if data is None:
             return render_template('learner_details.html', user=user, data=None)
-        
-        engagement_score = round(learner['total_engagement_score'] or 0, 1)
-        # Status thresholds consistent with dashboard
-        if engagement_score >= 85:
-            status = 'Completed'
-        elif engagement_score >= 70:
-            status = 'On Track'
-        elif engagement_score >= 40:
-            status = 'At Risk'
-        else:
-            status = 'Will Drop Off'
-        
-        # Login activity (convert minutes to seconds for template formatting)
-        cursor.execute("""
-            SELECT login_time, logout_time, total_duration
-            FROM Login_Activity
-            WHERE learner_id = ?
-            ORDER BY datetime(login_time) DESC
-        """, (learner_id,))
-        logins_raw = cursor.fetchall()
-        login_activity = []
-        for r in logins_raw:
-            mins = r['total_duration'] or 0
-            login_activity.append({
-                'login_time': r['login_time'],
-                'logout_time': r['logout_time'],
-                'total_duration': (mins or 0) * 60  # seconds for template's h/m calc
-            })
-        
-        # Assignments
-        cursor.execute("""
-            SELECT assignment_id, assignment_status, assignment_score, submitted_at
-            FROM Assignment_Details
-            WHERE learner_id = ?
-            ORDER BY datetime(submitted_at) DESC NULLS LAST
-        """, (learner_id,))
-        assignments = cursor.fetchall()
-        
-        # Quizzes
-        cursor.execute("""
-            SELECT quiz_id, quiz_status, quiz_score, attempted_at
-            FROM Quiz_Details
-            WHERE learner_id = ?
-            ORDER BY datetime(attempted_at) DESC NULLS LAST
-        """, (learner_id,))
-        quizzes = cursor.fetchall()
-        
-        # Live Sessions
-        cursor.execute("""
-            SELECT session_id, attendance_status
-            FROM Live_Session
-            WHERE learner_id = ?
-            ORDER BY session_id DESC
-        """, (learner_id,))
-        live_sessions = cursor.fetchall()
-        
-        # Nudge history
-        cursor.execute("""
-            SELECT timestamp, nudge_type, message, status
-            FROM Nudge_Logs
-            WHERE learner_id = ?
-            ORDER BY datetime(timestamp) DESC
-        """, (learner_id,))
-        nudge_history = cursor.fetchall()
-        
-        # Tickets (all, template filters by learner_id)
-        cursor.execute("""
-            SELECT ticket_id, learner_id, subject, priority, status, created_at
-            FROM Ticket_Details
-            ORDER BY datetime(created_at) DESC
-            LIMIT 500
-        """)
-        tickets = cursor.fetchall()
-        conn.close()
+        status = predictor.status(data['engagement_score'])
         
         # Simple recommendations
         recommendations = []
@@ -493,29 +1185,56 @@ def learner_details(learner_id):
                 'Share alumni resources'
             ]
         
-        data = {
-            'learner': {
-                'learner_id': learner['learner_id'],
-                'name': learner['name'],
-                'email': learner['email'],
-                'contact': learner['contact'],
-                'country_region': learner['country_region'],
-                'cohort_id': learner['cohort_id'],
-            },
-            'engagement_score': engagement_score,
-            'status': status,
-            'login_activity': login_activity,
-            'assignments': assignments,
-            'quizzes': quizzes,
-            'live_sessions': live_sessions,
-            'nudge_history': nudge_history
-        }
-        
-        return render_template('learner_details.html', user=user, data=data, recommendations=recommendations, tickets=tickets)
+        return render_template('learner_details.html', user=user, data=dict(data, status=status),
+                               recommendations=recommendations, tickets=data['tickets'],
+                               history_page_size=LEARNER_HISTORY_PAGE_DEFAULT)
     except Exception as e:
         print(f"Learner details error: {e}")
         return render_template('learner_details.html', user=user, data=None)
 
+@app.route('/api/learner/<learner_id>/<stream>')
+@login_required
+@cached_api(row_versions=lambda learner_id, stream: (learner_version(learner_id),))
+def api_learner_history(learner_id, stream):
+    """One page of a learner's logins, assignments, quizzes, sessions, nudges
+    or tickets, newest first: {'items': [...], 'next_cursor': str|None}.
+    
+    Pass the previous page's next_cursor as ?cursor= to continue. Learners
+    outside the user's courses are answered with 404 like unknown ones.
+    """
+    if stream not in LEARNER_HISTORY:
+        return jsonify({'error': f"Unknown history stream: {stream}"}), 404
+    if get_learner_in_scope(learner_id) is None:
+        return jsonify({'error': 'Learner not found'}), 404
+    params = {'learner_id': learner_id}
+    keyset = ""
+    try:
+        params['limit'] = min(max(int(request.args.get('limit', LEARNER_HISTORY_PAGE_DEFAULT)), 1),
+                              LEARNER_HISTORY_PAGE_MAX) + 1
+        if request.args.get('cursor'):
+            params['last_sort'], params['last_id'] = decode_cursor(request.args['cursor'])
+            _, _, id_column, sort_expr, _ = LEARNER_HISTORY[stream]
+            keyset = f" AND ({sort_expr}, {id_column}) < (:last_sort, :last_id)"
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    conn = get_db_connection(read_only=True)
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    # Fetch one extra row to know whether another page exists
+    cursor.execute(f"{learner_history_select(stream)}{keyset} ORDER BY sort_key DESC, row_id DESC LIMIT :limit", params)
+    rows = cursor.fetchall()
+    conn.close()
+    
+    next_cursor = None
+    if len(rows) == params['limit']:
+        rows = rows[:-1]
+        next_cursor = encode_cursor([rows[-1][0], rows[-1][1]])
+    return jsonify({
+        'items': [format_history_row(stream, row) for row in rows],
+        'next_cursor': next_cursor
+    })
+
 @app.route('/analytics')
 @login_required
 def analytics():
@@ -536,54 +1255,29 @@ def tickets():
 
 @app.route('/api/dashboard-stats')
 @login_required
+@cached_api(*SCOPE_TABLES, *ACTIVITY_TABLES)
 def api_dashboard_stats():
     user = session['user']
     user_courses = get_user_courses()
     
     try:
-        conn = get_db_connection()
+        conn = get_db_connection(read_only=True)
         cursor = conn.cursor()
         
-        # Deterministic counts by engagement thresholds for all roles
-        if user['role'] == 'Super Admin':
-            query = """
-                SELECT 
-                    COUNT(*) as total_learners,
-                    SUM(CASE WHEN l.total_engagement_score >= 85 THEN 1 ELSE 0 END) as completed,
-                    SUM(CASE WHEN l.total_engagement_score >= 70 AND l.total_engagement_score < 85 THEN 1 ELSE 0 END) as on_track,
-                    SUM(CASE WHEN l.total_engagement_score >= 40 AND l.total_engagement_score < 70 THEN 1 ELSE 0 END) as at_risk,
-                    SUM(CASE WHEN l.total_engagement_score < 40 OR l.total_engagement_score IS NULL THEN 1 ELSE 0 END) as will_drop,
-                    ROUND(AVG(l.total_engagement_score), 1) as avg_engagement
-                FROM Learners l
-            """
-            cursor.execute(query)
-        else:
-            placeholders = ','.join('?' * len(user_courses))
-            query = f"""
-                SELECT 
-                    COUNT(*) as total_learners,
-                    SUM(CASE WHEN l.total_engagement_score >= 85 THEN 1 ELSE 0 END) as completed,
-                    SUM(CASE WHEN l.total_engagement_score >= 70 AND l.total_engagement_score < 85 THEN 1 ELSE 0 END) as on_track,
-                    SUM(CASE WHEN l.total_engagement_score >= 40 AND l.total_engagement_score < 70 THEN 1 ELSE 0 END) as at_risk,
-                    SUM(CASE WHEN l.total_engagement_score < 40 OR l.total_engagement_score IS NULL THEN 1 ELSE 0 END) as will_drop,
-                    ROUND(AVG(l.total_engagement_score), 1) as avg_engagement
-                FROM Learners l
-                JOIN Cohorts co ON l.cohort_id = co.cohort_id
-                JOIN Courses c ON co.course_id = c.course_id
-                WHERE c.course_id IN ({placeholders})
-            """
-            cursor.execute(query, user_courses)
-            
-        result = cursor.fetchone()
+        # Stored scores from the shared engine, banded by its thresholds
+        scope_join, scope_where, params = get_scope_filter(user, user_courses)
+        scores = predictor.load_scores(cursor, f"FROM Learners l {scope_join}", scope_where, params)
         conn.close()
+        engagement = predictor.summarize(scores)
+        will_drop, at_risk, on_track, completed = engagement['bands']
         
         stats = {
-            'total_learners': result['total_learners'] or 0,
-            'avg_engagement': result['avg_engagement'] or 0,
-            'on_track': result['on_track'] or 0,
-            'at_risk': result['at_risk'] or 0,
-            'will_drop': result['will_drop'] or 0,
-            'completed': result['completed'] or 0,
+            'total_learners': engagement['count'],
+            'avg_engagement': round(engagement['avg'], 1),
+            'on_track': on_track,
+            'at_risk': at_risk,
+            'will_drop': will_drop,
+            'completed': completed,
             'user_info': {
                 'role': user['role'],
                 'courses': user_courses
@@ -606,339 +1300,273 @@ def api_dashboard_stats():
             }
         })
 
+# Columns selected for every /api/learners row. Per-learner aggregates come
+# precomputed from Learner_Activity_Summary, which triggers keep current as
+# activity rows change.
+LEARNER_COLUMNS = """
+    l.learner_id, l.name, l.email, l.contact, l.country_region, l.work_ex,
+    l.total_engagement_score,
+    co.cohort_id, co.course_id, c.course_name,
+    s.total_logins,
+    s.total_login_time,
+    s.total_assignments,
+    s.completed_assignments,
+    s.assignment_score_sum / NULLIF(s.assignment_score_count, 0) as avg_assignment_score,
+    s.total_quizzes,
+    s.attempted_quizzes,
+    s.quiz_score_sum / NULLIF(s.quiz_score_count, 0) as avg_quiz_score,
+    s.total_sessions,
+    s.attended_sessions,
+    s.total_tickets,
+    s.last_login_epoch
+"""
+
+# Sort keys accepted by /api/learners?sort=<key> (prefix with '-' for
+# descending). Each is paired with learner_id to form the keyset, and the
+# expressions match the indexes created by migrations 4 and 9.
+LEARNER_SORTS = {
+    'name': "l.name",
+    'engagement': "COALESCE(l.total_engagement_score, 0)",
+    'last_active': "COALESCE(s.last_login_epoch, 0)",
+}
+
+# Risk levels as SQL predicates, banded on the rounded score exactly like
+# format_learner() does
+_ROUNDED_SCORE = predictor.STORED_SCORE
+_AT_RISK, _ON_TRACK, _COMPLETED = predictor.THRESHOLDS
+RISK_FILTERS = {
+    'low': f"{_ROUNDED_SCORE} >= {_ON_TRACK}",
+    'medium': f"{_ROUNDED_SCORE} >= {_AT_RISK} AND {_ROUNDED_SCORE} < {_ON_TRACK}",
+    'high': f"{_ROUNDED_SCORE} < {_AT_RISK}",
+}
+
+LEARNER_PAGE_ARGS = ('limit', 'cursor', 'sort', 'course', 'cohort', 'risk', 'q')
+LEARNER_PAGE_DEFAULT = 50
+LEARNER_PAGE_MAX = 500
+
+def encode_cursor(values):
+    """Encode keyset values as an opaque URL-safe cursor"""
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+def decode_cursor(cursor_value):
+    """Decode a cursor produced by encode_cursor; raises ValueError if malformed"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor_value.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    if not isinstance(values, list) or len(values) != 2:
+        raise ValueError("Invalid cursor")
+    return values
+
+def build_learner_filters(user, user_courses, args):
+    """Get (from_sql, where_clauses, params) for the learners visible to the user
+    after applying the course, cohort, risk and q filters from args."""
+    scope_join, scope_where, params = get_scope_filter(user, user_courses)
+    from_sql = f"""
+        FROM Learners l
+        {scope_join}
+        LEFT JOIN Courses c ON co.course_id = c.course_id
+        LEFT JOIN Learner_Activity_Summary s ON l.learner_id = s.learner_id
+    """
+    clauses = [scope_where[len('WHERE '):]] if scope_where else []
+    
+    if args.get('course'):
+        clauses.append("co.course_id = ?")
+        params.append(args['course'])
+    if args.get('cohort'):
+        clauses.append("l.cohort_id = ?")
+        params.append(args['cohort'])
+    if args.get('risk'):
+        levels = [level.strip() for level in args['risk'].split(',') if level.strip()]
+        unknown = [level for level in levels if level not in RISK_FILTERS]
+        if unknown:
+            raise ValueError(f"Unknown risk level: {', '.join(unknown)}")
+        clauses.append('(' + ' OR '.join(f"({RISK_FILTERS[level]})" for level in levels) + ')')
+    if args.get('q'):
+        pattern = '%' + args['q'].replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        clauses.append("(l.name LIKE ? ESCAPE '\\' OR l.email LIKE ? ESCAPE '\\')")
+        params.extend([pattern, pattern])
+    return from_sql, clauses, params
+
+def format_learner(learner):
+    """Shape one LEARNER_COLUMNS row for the /api/learners JSON response"""
+    # Use the stored engagement score consistently
+    engagement_percentage = round(learner['total_engagement_score'] or 0, 1)
+    
+    # Deterministic status banding so Admin/Coordinators see consistent counts
+    status = predictor.status(engagement_percentage)
+    
+    # Format last login
+    last_active = "Never"
+    if learner['last_login_epoch'] is not None:
+        days_ago = int((time.time() - learner['last_login_epoch']) // 86400)
+        if days_ago == 0:
+            last_active = "Today"
+        elif days_ago == 1:
+            last_active = "Yesterday"
+        else:
+            last_active = f"{days_ago} days ago"
+    
+    # Progress scaled from engagement
+    progress_percentage = min(engagement_percentage * 0.8 + 20, 100)
+    
+    # Map status to risk level
+    if status == 'On Track' or status == 'Completed':
+        risk_level = 'low'
+    elif status == 'At Risk':
+        risk_level = 'medium'
+    else:
+        risk_level = 'high'
+    
+    return {
+        'id': learner['learner_id'],
+        'name': learner['name'],
+        'email': learner['email'],
+        'contact': learner['contact'],
+        'country': learner['country_region'],
+        'work_experience': learner['work_ex'],
+        'cohort': learner['cohort_id'] or 'N/A',
+        'course': learner['course_name'] or 'N/A',
+        'course_name': learner['course_name'] or 'N/A',
+        'course_id': learner['course_id'] or 'N/A',
+        'engagement': engagement_percentage,
+        'progress': round(progress_percentage, 1),
+        'status': status,
+        'risk_level': risk_level,
+        'last_active': last_active,
+        'stats': {
+            'total_logins': learner['total_logins'] or 0,
+            'total_login_hours': round((learner['total_login_time'] or 0) / 3600, 1),
+            'assignments_completed': f"{learner['completed_assignments'] or 0}/{learner['total_assignments'] or 0}",
+            'avg_assignment_score': round(learner['avg_assignment_score'] or 0, 1),
+            'quizzes_attempted': f"{learner['attempted_quizzes'] or 0}/{learner['total_quizzes'] or 0}",
+            'avg_quiz_score': round(learner['avg_quiz_score'] or 0, 1),
+            'sessions_attended': f"{learner['attended_sessions'] or 0}/{learner['total_sessions'] or 0}",
+            'total_tickets': learner['total_tickets'] or 0
+        }
+    }
+
 @app.route('/api/learners')
 @login_required
+@cached_api(*SCOPE_TABLES, *ACTIVITY_TABLES)
 def api_learners():
+    """List learners in the user's scope.
+    
+    Without paging arguments the full list is streamed, as a JSON array or
+    with ?format=ndjson one learner per line. With any of
+    limit/cursor/sort/course/cohort/risk/q the response is one keyset page:
+    {'learners': [...], 'next_cursor': str|None, 'total': int}.
+    """
     try:
         user = session['user']
         user_courses = get_user_courses()
+        args = request.args
+        paginate = any(arg in args for arg in LEARNER_PAGE_ARGS)
+        
+        sort = args.get('sort', 'name')
+        descending = sort.startswith('-')
+        sort_key = LEARNER_SORTS.get(sort.lstrip('-'))
+        if sort_key is None:
+            return jsonify({'error': f"Unknown sort key: {sort}"}), 400
+        try:
+            fmt = get_stream_format()
+            if paginate and fmt != 'json':
+                raise ValueError("format=ndjson is only available for the full list")
+            limit = min(max(int(args.get('limit', LEARNER_PAGE_DEFAULT)), 1), LEARNER_PAGE_MAX)
+            from_sql, clauses, params = build_learner_filters(user, user_courses, args)
+            page_clauses, page_params = list(clauses), list(params)
+            if args.get('cursor'):
+                last_value, last_id = decode_cursor(args['cursor'])
+                page_clauses.append(f"({sort_key}, l.learner_id) {'<' if descending else '>'} (?, ?)")
+                page_params.extend([last_value, last_id])
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        direction = 'DESC' if descending else 'ASC'
+        where_sql = f"WHERE {' AND '.join(page_clauses)}" if page_clauses else ""
+        query = f"""
+            SELECT {LEARNER_COLUMNS}, {sort_key} as sort_value
+            {from_sql}
+            {where_sql}
+            ORDER BY {sort_key} {direction}, l.learner_id {direction}
+        """
         
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        if not paginate:
+            return stream_rows(query, page_params, format_learner, fmt)
         
-        if user['role'] == 'Super Admin':
-            # Super admin sees all learners with accurate aggregated data
-            query = """
-                SELECT 
-                    l.learner_id, l.name, l.email, l.contact, l.country_region, l.work_ex,
-                    l.total_engagement_score,
-                    c.cohort_id, co.course_id, co.course_name,
-                    la.total_logins,
-                    la.total_login_time,
-                    ad.total_assignments,
-                    ad.completed_assignments,
-                    ad.avg_assignment_score,
-                    qd.total_quizzes,
-                    qd.attempted_quizzes,
-                    qd.avg_quiz_score,
-                    ls.total_sessions,
-                    ls.attended_sessions,
-                    td.total_tickets,
-                    la.last_login
-                FROM Learners l 
-                LEFT JOIN Cohorts c ON l.cohort_id = c.cohort_id
-                LEFT JOIN Courses co ON c.course_id = co.course_id
-                LEFT JOIN (
-                    SELECT learner_id,
-                           COUNT(DISTINCT login_id) as total_logins,
-                           SUM(total_duration) as total_login_time,
-                           MAX(login_time) as last_login
-                    FROM Login_Activity
-                    GROUP BY learner_id
-                ) la ON l.learner_id = la.learner_id
-                LEFT JOIN (
-                    SELECT learner_id,
-                           COUNT(DISTINCT assignment_id) as total_assignments,
-                           COUNT(DISTINCT CASE WHEN assignment_status = 'Submitted' THEN assignment_id END) as completed_assignments,
-                           AVG(assignment_score) as avg_assignment_score
-                    FROM Assignment_Details
-                    GROUP BY learner_id
-                ) ad ON l.learner_id = ad.learner_id
-                LEFT JOIN (
-                    SELECT learner_id,
-                           COUNT(DISTINCT quiz_id) as total_quizzes,
-                           COUNT(DISTINCT CASE WHEN quiz_status = 'Attempted' THEN quiz_id END) as attempted_quizzes,
-                           AVG(quiz_score) as avg_quiz_score
-                    FROM Quiz_Details
-                    GROUP BY learner_id
-                ) qd ON l.learner_id = qd.learner_id
-                LEFT JOIN (
-                    SELECT learner_id,
-                           COUNT(DISTINCT session_id) as total_sessions,
-                           COUNT(DISTINCT CASE WHEN attendance_status = 'Present' THEN session_id END) as attended_sessions
-                    FROM Live_Session
-                    GROUP BY learner_id
-                ) ls ON l.learner_id = ls.learner_id
-                LEFT JOIN (
-                    SELECT learner_id,
-                           COUNT(DISTINCT ticket_id) as total_tickets
-                    FROM Ticket_Details
-                    GROUP BY learner_id
-                ) td ON l.learner_id = td.learner_id
-                ORDER BY l.name
-            """
-            cursor.execute(query)
-        else:
-            # Program coordinator sees only learners from their assigned courses (accurate aggregates)
-            placeholders = ','.join('?' * len(user_courses))
-            query = f"""
-                SELECT 
-                    l.learner_id, l.name, l.email, l.contact, l.country_region, l.work_ex,
-                    l.total_engagement_score,
-                    c.cohort_id, co.course_id, co.course_name,
-                    la.total_logins,
-                    la.total_login_time,
-                    ad.total_assignments,
-                    ad.completed_assignments,
-                    ad.avg_assignment_score,
-                    qd.total_quizzes,
-                    qd.attempted_quizzes,
-                    qd.avg_quiz_score,
-                    ls.total_sessions,
-                    ls.attended_sessions,
-                    td.total_tickets,
-                    la.last_login
-                FROM Learners l 
-                JOIN Cohorts c ON l.cohort_id = c.cohort_id
-                JOIN Courses co ON c.course_id = co.course_id
-                LEFT JOIN (
-                    SELECT learner_id,
-                           COUNT(DISTINCT login_id) as total_logins,
-                           SUM(total_duration) as total_login_time,
-                           MAX(login_time) as last_login
-                    FROM Login_Activity
-                    GROUP BY learner_id
-                ) la ON l.learner_id = la.learner_id
-                LEFT JOIN (
-                    SELECT learner_id,
-                           COUNT(DISTINCT assignment_id) as total_assignments,
-                           COUNT(DISTINCT CASE WHEN assignment_status = 'Submitted' THEN assignment_id END) as completed_assignments,
-                           AVG(assignment_score) as avg_assignment_score
-                    FROM Assignment_Details
-                    GROUP BY learner_id
-                ) ad ON l.learner_id = ad.learner_id
-                LEFT JOIN (
-                    SELECT learner_id,
-                           COUNT(DISTINCT quiz_id) as total_quizzes,
-                           COUNT(DISTINCT CASE WHEN quiz_status = 'Attempted' THEN quiz_id END) as attempted_quizzes,
-                           AVG(quiz_score) as avg_quiz_score
-                    FROM Quiz_Details
-                    GROUP BY learner_id
-                ) qd ON l.learner_id = qd.learner_id
-                LEFT JOIN (
-                    SELECT learner_id,
-                           COUNT(DISTINCT session_id) as total_sessions,
-                           COUNT(DISTINCT CASE WHEN attendance_status = 'Present' THEN session_id END) as attended_sessions
-                    FROM Live_Session
-                    GROUP BY learner_id
-                ) ls ON l.learner_id = ls.learner_id
-                LEFT JOIN (
-                    SELECT learner_id,
-                           COUNT(DISTINCT ticket_id) as total_tickets
-                    FROM Ticket_Details
-                    GROUP BY learner_id
-                ) td ON l.learner_id = td.learner_id
-                WHERE co.course_id IN ({placeholders})
-                ORDER BY l.name
-            """
-            cursor.execute(query, user_courses)
-            
+        conn = get_db_connection(read_only=True)
+        cursor = conn.cursor()
+        # Fetch one extra row to know whether another page exists
+        cursor.execute(query + " LIMIT ?", page_params + [limit + 1])
         learners = cursor.fetchall()
-        conn.close()
         
-        result = []
-        for learner in learners:
-            # Use the stored engagement score consistently
-            engagement_percentage = round(learner['total_engagement_score'] or 0, 1)
-            
-            # Deterministic status banding so Admin/Coordinators see consistent counts
-            if engagement_percentage >= 85:
-                status = "Completed"
-            elif engagement_percentage >= 70:
-                status = "On Track"
-            elif engagement_percentage >= 40:
-                status = "At Risk"
-            else:
-                status = "Will Drop Off"
-            
-            # Format last login
-            last_active = "Never"
-            if learner['last_login']:
-                try:
-                    from datetime import datetime
-                    last_login = datetime.fromisoformat(learner['last_login'])
-                    days_ago = (datetime.now() - last_login).days
-                    if days_ago == 0:
-                        last_active = "Today"
-                    elif days_ago == 1:
-                        last_active = "Yesterday"
-                    else:
-                        last_active = f"{days_ago} days ago"
-                except:
-                    last_active = "Recently"
-            
-            # Progress scaled from engagement
-            progress_percentage = min(engagement_percentage * 0.8 + 20, 100)
-            
-            # Map status to risk level
-            if status == 'On Track' or status == 'Completed':
-                risk_level = 'low'
-            elif status == 'At Risk':
-                risk_level = 'medium'
-            else:
-                risk_level = 'high'
-            
-            result.append({
-                'id': learner['learner_id'],
-                'name': learner['name'],
-                'email': learner['email'],
-                'contact': learner['contact'],
-                'country': learner['country_region'],
-                'work_experience': learner['work_ex'],
-                'cohort': learner['cohort_id'] or 'N/A',
-                'course': learner['course_name'] or 'N/A',
-                'course_name': learner['course_name'] or 'N/A',
-                'course_id': learner['course_id'] or 'N/A',
-                'engagement': engagement_percentage,
-                'progress': round(progress_percentage, 1),
-                'status': status,
-                'risk_level': risk_level,
-                'last_active': last_active,
-                'stats': {
-                    'total_logins': learner['total_logins'] or 0,
-                    'total_login_hours': round((learner['total_login_time'] or 0) / 3600, 1),
-                    'assignments_completed': f"{learner['completed_assignments'] or 0}/{learner['total_assignments'] or 0}",
-                    'avg_assignment_score': round(learner['avg_assignment_score'] or 0, 1),
-                    'quizzes_attempted': f"{learner['attempted_quizzes'] or 0}/{learner['total_quizzes'] or 0}",
-                    'avg_quiz_score': round(learner['avg_quiz_score'] or 0, 1),
-                    'sessions_attended': f"{learner['attended_sessions'] or 0}/{learner['total_sessions'] or 0}",
-                    'total_tickets': learner['total_tickets'] or 0
-                }
-            })
+        where_sql = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        cursor.execute(f"SELECT COUNT(*) {from_sql} {where_sql}", params)
+        total = cursor.fetchone()[0]
+        conn.close()
         
-        return jsonify(result)
+        next_cursor = None
+        if len(learners) > limit:
+            learners = learners[:limit]
+            next_cursor = encode_cursor([learners[-1]['sort_value'], learners[-1]['learner_id']])
+        return jsonify({
+            'learners': [format_learner(learner) for learner in learners],
+            'next_cursor': next_cursor,
+            'total': total
+        })
     except Exception as e:
         print(f"API learners error: {e}")
         return jsonify([])
 
 @app.route('/api/analytics')
 @login_required
+@cached_api(*SCOPE_TABLES, *ACTIVITY_TABLES)
 def api_analytics():
     user = session['user']
     user_courses = get_user_courses()
     
     try:
-        conn = get_db_connection()
+        conn = get_db_connection(read_only=True)
         cursor = conn.cursor()
         
-        # Build query based on user role
-        if user['role'] == 'Super Admin':
-            base_filter = ""
-            params = []
-        else:
-            placeholders = ','.join('?' * len(user_courses))
-            base_filter = f"""
-                JOIN Cohorts co ON l.cohort_id = co.cohort_id
-                JOIN Courses c ON co.course_id = c.course_id
-                WHERE c.course_id IN ({placeholders})
-            """
-            params = user_courses
-        
         # Get comprehensive analytics
-        analytics_query = f"""
-            SELECT 
-                COUNT(DISTINCT l.learner_id) as total_learners,
-                COUNT(DISTINCT ad.assignment_id) as total_assignments,
-                COUNT(DISTINCT CASE WHEN ad.assignment_status = 'Submitted' THEN ad.assignment_id END) as completed_assignments,
-                AVG(ad.assignment_score) as avg_assignment_score,
-                COUNT(DISTINCT qd.quiz_id) as total_quizzes,
-                COUNT(DISTINCT CASE WHEN qd.quiz_status = 'Attempted' THEN qd.quiz_id END) as attempted_quizzes,
-                AVG(qd.quiz_score) as avg_quiz_score,
-                COUNT(DISTINCT ls.session_id) as total_sessions,
-                COUNT(DISTINCT CASE WHEN ls.attendance_status = 'Present' THEN ls.session_id END) as attended_sessions,
-                SUM(la.total_duration) as total_login_time,
-                COUNT(DISTINCT la.login_id) as total_logins
-            FROM Learners l
-            {base_filter}
-            LEFT JOIN Login_Activity la ON l.learner_id = la.learner_id
-            LEFT JOIN Assignment_Details ad ON l.learner_id = ad.learner_id
-            LEFT JOIN Quiz_Details qd ON l.learner_id = qd.learner_id
-            LEFT JOIN Live_Session ls ON l.learner_id = ls.learner_id
-        """
-        
+        analytics_query, params = build_scope_aggregate_query(user, user_courses, [
+            'total_learners', 'total_assignments', 'completed_assignments', 'avg_assignment_score',
+            'total_quizzes', 'attempted_quizzes', 'avg_quiz_score', 'total_sessions',
+            'attended_sessions', 'total_login_time', 'total_logins'
+        ])
         cursor.execute(analytics_query, params)
         analytics = cursor.fetchone()
         
-        # Get simplified engagement distribution
-        engagement_query = f"""
-            SELECT 
-                'On Track' as status,
-                COUNT(*) as count
-            FROM Learners l
-            {base_filter}
-            WHERE l.total_engagement_score >= 70
-            UNION ALL
-            SELECT 
-                'At Risk' as status,
-                COUNT(*) as count
-            FROM Learners l
-            {base_filter}
-            WHERE l.total_engagement_score >= 40 AND l.total_engagement_score < 70
-            UNION ALL
-            SELECT 
-                'Will Drop Off' as status,
-                COUNT(*) as count
-            FROM Learners l
-            {base_filter}
-            WHERE l.total_engagement_score < 40 OR l.total_engagement_score IS NULL
-        """
-        
-        # Execute queries with correct parameters for each UNION
-        if user['role'] == 'Super Admin':
-            cursor.execute(engagement_query.replace(base_filter, ''))
-        else:
-            # For coordinators, need to execute the full query with proper JOIN conditions
-            full_engagement_query = f"""
-                SELECT 
-                    'On Track' as status,
-                    COUNT(*) as count
-                FROM Learners l
-                JOIN Cohorts co ON l.cohort_id = co.cohort_id
-                JOIN Courses c ON co.course_id = c.course_id
-                WHERE c.course_id IN ({','.join('?' * len(user_courses))}) AND l.total_engagement_score >= 70
-                UNION ALL
+        # Engagement distribution of the stored scores, banded by the shared engine
+        scope_join, scope_where, params = get_scope_filter(user, user_courses)
+        scores = predictor.load_scores(conn.cursor(), f"FROM Learners l {scope_join}", scope_where, params)
+        will_drop, at_risk, on_track, completed = predictor.summarize(scores)['bands']
+        
+        # Average login hours by day of week, optionally for a start/end
+        # (YYYY-MM-DD) range of the daily rollup
+        clauses, params = get_rollup_scope(user, user_courses)
+        start_day, end_day = request.args.get('start'), request.args.get('end')
+        if start_day and end_day:
+            clauses.append("day BETWEEN ? AND ?")
+            params.extend([start_day, end_day])
+            trend_query = f"""
                 SELECT 
-                    'At Risk' as status,
-                    COUNT(*) as count
-                FROM Learners l
-                JOIN Cohorts co ON l.cohort_id = co.cohort_id
-                JOIN Courses c ON co.course_id = c.course_id
-                WHERE c.course_id IN ({','.join('?' * len(user_courses))}) AND l.total_engagement_score >= 40 AND l.total_engagement_score < 70
-                UNION ALL
+                    CAST(strftime('%w', day) AS INTEGER) as day_of_week,
+                    SUM(hours) / SUM(logins) as avg_hours
+                FROM Login_Rollup_Daily
+                WHERE {' AND '.join(clauses)}
+                GROUP BY day_of_week
+            """
+        else:
+            trend_query = f"""
                 SELECT 
-                    'Will Drop Off' as status,
-                    COUNT(*) as count
-                FROM Learners l
-                JOIN Cohorts co ON l.cohort_id = co.cohort_id
-                JOIN Courses c ON co.course_id = c.course_id
-                WHERE c.course_id IN ({','.join('?' * len(user_courses))}) AND (l.total_engagement_score < 40 OR l.total_engagement_score IS NULL)
+                    weekday as day_of_week,
+                    SUM(hours) / SUM(logins) as avg_hours
+                FROM Login_Rollup_Weekday
+                {'WHERE ' + ' AND '.join(clauses) if clauses else ''}
+                GROUP BY weekday
             """
-            cursor.execute(full_engagement_query, user_courses + user_courses + user_courses)
-            
-        engagement_data = cursor.fetchall()
-        
-        # Get daily activity trends
-        trend_query = f"""
-            SELECT 
-                strftime('%w', la.login_time) as day_of_week,
-                AVG(la.total_duration/3600.0) as avg_hours
-            FROM Learners l
-            {base_filter}
-            LEFT JOIN Login_Activity la ON l.learner_id = la.learner_id
-            WHERE la.login_time IS NOT NULL
-            GROUP BY strftime('%w', la.login_time)
-            ORDER BY day_of_week
-        """
         
         cursor.execute(trend_query, params)
         trend_data = cursor.fetchall()
@@ -949,12 +1577,14 @@ def api_analytics():
         completion_rate = round((analytics['completed_assignments'] / analytics['total_assignments'] * 100) if analytics['total_assignments'] else 0, 1)
         quiz_attempt_rate = round((analytics['attempted_quizzes'] / analytics['total_quizzes'] * 100) if analytics['total_quizzes'] else 0, 1)
         attendance_rate = round((analytics['attended_sessions'] / analytics['total_sessions'] * 100) if analytics['total_sessions'] else 0, 1)
-        avg_engagement = round((analytics['avg_assignment_score'] or 0 + analytics['avg_quiz_score'] or 0) / 2, 1)
+        avg_engagement = round(((analytics['avg_assignment_score'] or 0) + (analytics['avg_quiz_score'] or 0)) / 2, 1)
         
         # Format engagement distribution
-        status_counts = {'On Track': 0, 'At Risk': 0, 'Will Drop Off': 0}
-        for row in engagement_data:
-            status_counts[row['status']] += row['count']
+        status_counts = {
+            'On Track': on_track + completed,
+            'At Risk': at_risk,
+            'Will Drop Off': will_drop
+        }
         
         # Format trend data
         days = ['Sun', 'Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat']
@@ -999,149 +1629,268 @@ def api_analytics():
             'attendance_rate': 0,
             'total_login_hours': 0,
             'engagement_distribution': {'labels': [], 'values': []},
-            'engagement_by_day': {'labels': days, 'values': [0] * 7},
+            'engagement_by_day': {'labels': ['Sun', 'Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat'], 'values': [0] * 7},
             'activity_distribution': {'labels': [], 'values': []}
         })
+
+def get_cohort_engagement(user, user_courses):
+    """Per-cohort learner counts, status counts and average engagement for the
+    user's scope, computed in one grouped pass over Learners."""
+    scope_join, scope_where, params = get_scope_filter(user, user_courses)
+    query = f"""
+        SELECT 
+            COALESCE(l.cohort_id, 'Unknown') as cohort_id,
+            co.course_id, c.course_name, co.start_date,
+            COUNT(*) as learners,
+            AVG({_ROUNDED_SCORE}) as avg_engagement,
+            SUM(CASE WHEN {_ROUNDED_SCORE} >= {_COMPLETED} THEN 1 ELSE 0 END) as completed,
+            SUM(CASE WHEN {_ROUNDED_SCORE} >= {_ON_TRACK} AND {_ROUNDED_SCORE} < {_COMPLETED} THEN 1 ELSE 0 END) as on_track,
+            SUM(CASE WHEN {_ROUNDED_SCORE} >= {_AT_RISK} AND {_ROUNDED_SCORE} < {_ON_TRACK} THEN 1 ELSE 0 END) as at_risk,
+            SUM(CASE WHEN {_ROUNDED_SCORE} < {_AT_RISK} THEN 1 ELSE 0 END) as will_drop
+        FROM Learners l
+        {scope_join}
+        LEFT JOIN Courses c ON co.course_id = c.course_id
+        {scope_where}
+        GROUP BY l.cohort_id
+        ORDER BY l.cohort_id
+    """
+    conn = get_db_connection(read_only=True)
+    cursor = conn.cursor()
+    cursor.execute(query, params)
+    cohorts = cursor.fetchall()
+    conn.close()
+    return cohorts
+
+def _rate(part, whole):
+    return round(part / whole * 100, 1) if whole else 0
+
+@app.route('/api/analytics/cohorts')
+@login_required
+@cached_api(*SCOPE_TABLES)
+def api_analytics_cohorts():
+    user = session['user']
+    user_courses = get_user_courses()
+    
+    try:
+        cohorts = get_cohort_engagement(user, user_courses)
+        
+        total = sum(row['learners'] for row in cohorts)
+        engagement_sum = sum((row['avg_engagement'] or 0) * row['learners'] for row in cohorts)
+        completed = sum(row['completed'] for row in cohorts)
+        on_track = sum(row['on_track'] for row in cohorts)
+        
+        return jsonify({
+            'overview': {
+                'total_learners': total,
+                'avg_engagement': round(engagement_sum / total, 1) if total else 0,
+                'completion_rate': _rate(completed, total),
+                'retention_rate': _rate(on_track, total)
+            },
+            'cohorts': [{
+                'cohort_id': row['cohort_id'],
+                'course_id': row['course_id'],
+                'course_name': row['course_name'] or 'N/A',
+                'start_date': row['start_date'],
+                'learners': row['learners'],
+                'avg_engagement': round(row['avg_engagement'] or 0, 1),
+                'completion_rate': _rate(row['completed'], row['learners']),
+                'retention_rate': _rate(row['on_track'], row['learners'])
+            } for row in cohorts]
+        })
+        
+    except Exception as e:
+        print(f"Cohort analytics API error: {e}")
+        return jsonify({
+            'overview': {'total_learners': 0, 'avg_engagement': 0, 'completion_rate': 0, 'retention_rate': 0},
+            'cohorts': []
+        })
+
+@app.route('/api/analytics/dropout')
+@login_required
+@cached_api(*SCOPE_TABLES)
+def api_analytics_dropout():
+    user = session['user']
+    user_courses = get_user_courses()
+    
+    try:
+        cohorts = get_cohort_engagement(user, user_courses)
+        
+        return jsonify({
+            'labels': [row['cohort_id'] for row in cohorts],
+            'low_risk': [row['completed'] + row['on_track'] for row in cohorts],
+            'medium_risk': [row['at_risk'] for row in cohorts],
+            'high_risk': [row['will_drop'] for row in cohorts],
+            'status_counts': {
+                'Completed': sum(row['completed'] for row in cohorts),
+                'On Track': sum(row['on_track'] for row in cohorts),
+                'At Risk': sum(row['at_risk'] for row in cohorts),
+                'Will Drop Off': sum(row['will_drop'] for row in cohorts)
+            }
+        })
+        
+    except Exception as e:
+        print(f"Dropout analytics API error: {e}")
+        return jsonify({
+            'labels': [], 'low_risk': [], 'medium_risk': [], 'high_risk': [],
+            'status_counts': {'Completed': 0, 'On Track': 0, 'At Risk': 0, 'Will Drop Off': 0}
+        })
+
 # API endpoint for tickets
+def format_ticket(ticket):
+    """Shape one ticket row for the /api/tickets JSON response"""
+    return {
+        'id': ticket['ticket_id'],
+        'subject': ticket['subject'],
+        'description': ticket['description'],
+        'priority': ticket['priority'],
+        'status': ticket['status'],
+        'created_at': ticket['created_at'],
+        'resolved_at': ticket['resolved_at'],
+        'learner_name': ticket['learner_name'],
+        'learner_email': ticket['learner_email'],
+        'course': ticket['course_name'] or 'N/A',
+        'feedback': ticket['feedback'],
+        'satisfied': ticket['satisfied']
+    }
+
+TICKET_COLUMNS = """
+    t.ticket_id, t.subject, t.description, t.priority, t.status,
+    t.created_at, t.resolved_at, t.feedback, t.satisfied,
+    l.name as learner_name, l.email as learner_email,
+    c.course_name
+"""
+
 @app.route('/api/tickets')
 @login_required
+@cached_api(*SCOPE_TABLES, 'Ticket_Details')
 def api_tickets():
+    """Tickets in the user's scope, newest first: the full list, or one
+    page with limit/cursor (see feed_response)"""
     user = session['user']
     user_courses = get_user_courses()
     
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        if user['role'] == 'Super Admin':
-            query = """
-                SELECT t.ticket_id, t.subject, t.description, t.priority, t.status, 
-                       t.created_at, t.resolved_at, t.feedback, t.satisfied,
-                       l.name as learner_name, l.email as learner_email,
-                       c.course_name
-                FROM Ticket_Details t
-                JOIN Learners l ON t.learner_id = l.learner_id
-                LEFT JOIN Cohorts co ON l.cohort_id = co.cohort_id
-                LEFT JOIN Courses c ON co.course_id = c.course_id
-                ORDER BY t.created_at DESC
-                LIMIT 100
-            """
-            cursor.execute(query)
-        else:
-            placeholders = ','.join('?' * len(user_courses))
-            query = f"""
-                SELECT t.ticket_id, t.subject, t.description, t.priority, t.status, 
-                       t.created_at, t.resolved_at, t.feedback, t.satisfied,
-                       l.name as learner_name, l.email as learner_email,
-                       c.course_name
-                FROM Ticket_Details t
-                JOIN Learners l ON t.learner_id = l.learner_id
-                JOIN Cohorts co ON l.cohort_id = co.cohort_id
-                JOIN Courses c ON co.course_id = c.course_id
-                WHERE c.course_id IN ({placeholders})
-                ORDER BY t.created_at DESC
-                LIMIT 100
-            """
-            cursor.execute(query, user_courses)
-            
-        tickets = cursor.fetchall()
-        conn.close()
-        
-        result = []
-        for ticket in tickets:
-            result.append({
-                'id': ticket['ticket_id'],
-                'subject': ticket['subject'],
-                'description': ticket['description'],
-                'priority': ticket['priority'],
-                'status': ticket['status'],
-                'created_at': ticket['created_at'],
-                'resolved_at': ticket['resolved_at'],
-                'learner_name': ticket['learner_name'],
-                'learner_email': ticket['learner_email'],
-                'course': ticket['course_name'] or 'N/A',
-                'feedback': ticket['feedback'],
-                'satisfied': ticket['satisfied']
-            })
-            
-        return jsonify(result)
+        scope_join, scope_where, params = get_scope_filter(user, user_courses)
+        return feed_response('tickets', TICKET_COLUMNS, f"""
+            FROM Ticket_Details t
+            JOIN Learners l ON t.learner_id = l.learner_id
+            {scope_join}
+            LEFT JOIN Courses c ON co.course_id = c.course_id
+        """, scope_where, params, format_ticket)
         
     except Exception as e:
         print(f"Tickets API error: {e}")
         return jsonify([])
 
-# API endpoint for interventions/nudges
-@app.route('/api/interventions')
+@app.route('/api/tickets/status-counts')
 @login_required
-def api_interventions():
+@cached_api(*SCOPE_TABLES, 'Ticket_Details')
+def api_ticket_status_counts():
+    """Ticket counts by status for the user's scope, for the tickets page stats"""
     user = session['user']
     user_courses = get_user_courses()
     
     try:
-        conn = get_db_connection()
+        scope_join, scope_where, params = get_scope_filter(user, user_courses)
+        conn = get_db_connection(read_only=True)
         cursor = conn.cursor()
-        
-        if user['role'] == 'Super Admin':
-            query = """
-                SELECT n.nudge_id, n.nudge_type, n.message, n.timestamp, n.status, n.channel,
-                       l.name as learner_name, l.email as learner_email,
-                       c.course_name
-                FROM Nudge_Logs n
-                JOIN Learners l ON n.learner_id = l.learner_id
-                LEFT JOIN Cohorts co ON l.cohort_id = co.cohort_id
-                LEFT JOIN Courses c ON co.course_id = c.course_id
-                ORDER BY n.timestamp DESC
-                LIMIT 100
-            """
-            cursor.execute(query)
-        else:
-            placeholders = ','.join('?' * len(user_courses))
-            query = f"""
-                SELECT n.nudge_id, n.nudge_type, n.message, n.timestamp, n.status, n.channel,
-                       l.name as learner_name, l.email as learner_email,
-                       c.course_name
-                FROM Nudge_Logs n
-                JOIN Learners l ON n.learner_id = l.learner_id
-                JOIN Cohorts co ON l.cohort_id = co.cohort_id
-                JOIN Courses c ON co.course_id = c.course_id
-                WHERE c.course_id IN ({placeholders})
-                ORDER BY n.timestamp DESC
-                LIMIT 100
-            """
-            cursor.execute(query, user_courses)
-            
-        interventions = cursor.fetchall()
+        cursor.execute(f"""
+            SELECT t.status, COUNT(*) as tickets
+            FROM Ticket_Details t
+            JOIN Learners l ON t.learner_id = l.learner_id
+            {scope_join}
+            {scope_where}
+            GROUP BY t.status
+        """, params)
+        counts = {row['status']: row['tickets'] for row in cursor.fetchall()}
         conn.close()
+        return jsonify(counts)
         
-        result = []
-        for intervention in interventions:
-            result.append({
-                'id': intervention['nudge_id'],
-                'type': intervention['nudge_type'],
-                'message': intervention['message'],
-                'timestamp': intervention['timestamp'],
-                'status': intervention['status'],
-                'channel': intervention['channel'],
-                'learner_name': intervention['learner_name'],
-                'learner_email': intervention['learner_email'],
-                'course': intervention['course_name'] or 'N/A'
-            })
-            
-        return jsonify(result)
+    except Exception as e:
+        print(f"Ticket status counts API error: {e}")
+        return jsonify({})
+
+def format_intervention(intervention):
+    """Shape one nudge row for the /api/interventions JSON response"""
+    return {
+        'id': intervention['nudge_id'],
+        'type': intervention['nudge_type'],
+        'message': intervention['message'],
+        'timestamp': intervention['timestamp'],
+        'status': intervention['status'],
+        'channel': intervention['channel'],
+        'learner_name': intervention['learner_name'],
+        'learner_email': intervention['learner_email'],
+        'course': intervention['course_name'] or 'N/A'
+    }
+
+INTERVENTION_COLUMNS = """
+    n.nudge_id, n.nudge_type, n.message, n.timestamp, n.status, n.channel,
+    l.name as learner_name, l.email as learner_email,
+    c.course_name
+"""
+
+# API endpoint for interventions/nudges
+@app.route('/api/interventions')
+@login_required
+@cached_api(*SCOPE_TABLES, 'Nudge_Logs')
+def api_interventions():
+    """Nudges in the user's scope, newest first: the full list, or one page
+    with limit/cursor (see feed_response)"""
+    user = session['user']
+    user_courses = get_user_courses()
+    
+    try:
+        scope_join, scope_where, params = get_scope_filter(user, user_courses)
+        return feed_response('interventions', INTERVENTION_COLUMNS, f"""
+            FROM Nudge_Logs n
+            JOIN Learners l ON n.learner_id = l.learner_id
+            {scope_join}
+            LEFT JOIN Courses c ON co.course_id = c.course_id
+        """, scope_where, params, format_intervention)
         
     except Exception as e:
         print(f"Interventions API error: {e}")
         return jsonify([])
 
+@app.route('/api/interventions/status-counts')
+@login_required
+@cached_api(*SCOPE_TABLES, 'Nudge_Logs')
+def api_intervention_status_counts():
+    """Nudge counts by status for the user's scope, for the dashboard chart"""
+    user = session['user']
+    user_courses = get_user_courses()
+    
+    try:
+        scope_join, scope_where, params = get_scope_filter(user, user_courses)
+        conn = get_db_connection(read_only=True)
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT n.status, COUNT(*) as nudges
+            FROM Nudge_Logs n
+            JOIN Learners l ON n.learner_id = l.learner_id
+            {scope_join}
+            {scope_where}
+            GROUP BY n.status
+        """, params)
+        counts = {row['status']: row['nudges'] for row in cursor.fetchall()}
+        conn.close()
+        return jsonify(counts)
+        
+    except Exception as e:
+        print(f"Intervention status counts API error: {e}")
+        return jsonify({})
+
 # API endpoint for monthly engagement trends
 @app.route('/api/monthly-engagement')
 @login_required
+@cached_api(*SCOPE_TABLES, 'Login_Activity')
 def api_monthly_engagement():
     user = session['user']
     user_courses = get_user_courses()
     
     try:
-        conn = get_db_connection()
+        conn = get_db_connection(read_only=True)
         cursor = conn.cursor()
         
         # Optional date range filters: start=YYYY-MM, end=YYYY-MM
@@ -1149,47 +1898,26 @@ def api_monthly_engagement():
         start_param = request.args.get('start')  # e.g., '2025-01'
         end_param = request.args.get('end')      # e.g., '2025-12'
         
+        clauses, params = get_rollup_scope(user, user_courses)
         if start_param and end_param:
-            start_clause = " AND strftime('%Y-%m', la.login_time) >= ? AND strftime('%Y-%m', la.login_time) <= ?"
-            range_params = [start_param, end_param]
+            clauses.append("month BETWEEN ? AND ?")
+            params.extend([start_param, end_param])
         else:
-            start_clause = " AND strftime('%Y-%m', la.login_time) >= strftime('%Y-%m', 'now', '-11 months')"
-            range_params = []
+            clauses.append("month >= strftime('%Y-%m', 'now', '-11 months')")
         
-        if user['role'] == 'Super Admin':
-            query = f"""
-                SELECT 
-                    strftime('%Y-%m', la.login_time) as month,
-                    AVG(la.total_duration/3600.0) as avg_monthly_hours,
-                    COUNT(DISTINCT l.learner_id) as monthly_active_users,
-                    AVG(l.total_engagement_score) as avg_engagement_score
-                FROM Login_Activity la
-                LEFT JOIN Learners l ON la.learner_id = l.learner_id
-                WHERE la.login_time IS NOT NULL
-                    {start_clause}
-                GROUP BY strftime('%Y-%m', la.login_time)
-                ORDER BY month
-            """
-            cursor.execute(query, range_params)
-        else:
-            placeholders = ','.join('?' * len(user_courses))
-            query = f"""
-                SELECT 
-                    strftime('%Y-%m', la.login_time) as month,
-                    AVG(la.total_duration/3600.0) as avg_monthly_hours,
-                    COUNT(DISTINCT l.learner_id) as monthly_active_users,
-                    AVG(l.total_engagement_score) as avg_engagement_score
-                FROM Login_Activity la
-                LEFT JOIN Learners l ON la.learner_id = l.learner_id
-                LEFT JOIN Cohorts co ON l.cohort_id = co.cohort_id
-                LEFT JOIN Courses c ON co.course_id = c.course_id
-                WHERE la.login_time IS NOT NULL
-                    AND c.course_id IN ({placeholders})
-                    {start_clause}
-                GROUP BY strftime('%Y-%m', la.login_time)
-                ORDER BY month
-            """
-            cursor.execute(query, user_courses + range_params)
+        # Summed from the (month, course) rollup; engagement is the average
+        # score over the month's logins, as score_sum / logins
+        query = f"""
+            SELECT 
+                month,
+                SUM(score_sum) / SUM(logins) as avg_engagement_score,
+                SUM(active_learners) as monthly_active_users
+            FROM Login_Rollup_Monthly
+            WHERE {' AND '.join(clauses)}
+            GROUP BY month
+            ORDER BY month
+        """
+        cursor.execute(query, params)
             
         monthly_data = cursor.fetchall()
         conn.close()
@@ -1268,6 +1996,186 @@ def api_monthly_engagement():
             'active_users_data': [0] * 12
         })
 
+# Sub-requests a single /api/batch call may carry
+BATCH_MAX_REQUESTS = 20
+
+def run_batch_request(route, args):
+    """Dispatch one sub-request to its /api/<route> view; returns (status, body)"""
+    path = '/api/' + route.strip('/')
+    try:
+        endpoint, view_args = app.url_map.bind('').match(path, method='GET')
+    except HTTPException as e:
+        return e.code, {'error': f'Unknown route: {route}'}
+    if endpoint == 'api_batch':
+        return 400, {'error': 'Batches cannot be nested'}
+    
+    with app.test_request_context(path, query_string=args, headers={'Cookie': request.headers.get('Cookie', '')}):
+        try:
+            response = app.make_response(app.view_functions[endpoint](**view_args))
+        except HTTPException as e:
+            return e.code, {'error': e.description}
+        if response.is_streamed:
+            # A full list would be buffered whole into the batch response
+            response.close()
+            return 400, {'error': 'Full lists cannot be batched; pass limit to get a page'}
+        body = response.get_json() if response.is_json else response.get_data(as_text=True)
+        return response.status_code, body
+
+@app.route('/api/batch', methods=['POST'])
+@login_required
+def api_batch():
+    """Run several GET /api/* reads on one connection in one read transaction.
+    
+    Body: {"requests": [{"route": "learners", "args": {"limit": 10}}, ...]}
+    Response: {"results": [{"route", "status", "body"}, ...]} in request order.
+    """
+    payload = request.get_json(silent=True) or {}
+    sub_requests = payload.get('requests')
+    if not isinstance(sub_requests, list) or not sub_requests:
+        return jsonify({'error': 'Expected a non-empty "requests" list'}), 400
+    if len(sub_requests) > BATCH_MAX_REQUESTS:
+        return jsonify({'error': f'At most {BATCH_MAX_REQUESTS} requests per batch'}), 400
+    if not all(isinstance(sub, dict) and isinstance(sub.get('route'), str) and isinstance(sub.get('args', {}), dict)
+               for sub in sub_requests):
+        return jsonify({'error': 'Each request needs a "route" string and optional "args" object'}), 400
+    
+    conn = db_read_pool.acquire()
+    conn.row_factory = sqlite3.Row
+    try:
+        # The first read pins the WAL snapshot every sub-request then sees
+        conn.execute("BEGIN")
+        g.batch_versions = dict(tuple(row) for row in conn.execute("SELECT table_name, version FROM Table_Versions"))
+        g.batch_conn = conn
+        results = []
+        for sub in sub_requests:
+            status, body = run_batch_request(sub['route'], sub.get('args', {}))
+            results.append({'route': sub['route'], 'status': status, 'body': body})
+    finally:
+        g.pop('batch_conn', None)
+        g.pop('batch_versions', None)
+        conn.close()
+    
+    return jsonify({'results': results})
+
+def metrics_authorized():
+    """A signed-in Super Admin, or a scraper sending METRICS_TOKEN as a bearer token"""
+    if 'user' in session and session['user']['role'] == 'Super Admin':
+        return True
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    return bool(METRICS_TOKEN) and scheme.lower() == 'bearer' and hmac.compare_digest(token, METRICS_TOKEN)
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus text exposition of request, cache and connection pool metrics.
+    
+    Route names, roles and pool sizes are internal, so only a Super Admin
+    or a scraper holding METRICS_TOKEN may read them.
+    """
+    if not metrics_authorized():
+        return app.response_class('Forbidden\n', status=403, mimetype='text/plain')
+    totals = request_metrics.collect()
+    lines = []
+    render_histogram(lines, 'learnengage_http_request_duration_seconds',
+                     'Request latency (to the first byte for streamed responses).',
+                     ('route', 'method', 'status', 'role'), totals['latency'])
+    render_histogram(lines, 'learnengage_http_request_db_seconds',
+                     'Time spent in SQLite per request.', ('route',), totals['db'])
+    render_metric(lines, 'learnengage_http_requests_in_flight', 'gauge', 'Requests currently being served.',
+                  [(('route',), (route,), value) for route, value in sorted(totals['in_flight'].items())])
+    
+    cache = response_cache.stats()
+    render_metric(lines, 'learnengage_response_cache_events_total', 'counter', 'API response cache lookups by outcome.',
+                  [(('event',), (event,), cache[event]) for event in ('hits', 'misses', 'evictions', 'expirations', 'invalidations')])
+    render_metric(lines, 'learnengage_response_cache_bytes', 'gauge', 'Bytes held by the API response cache.',
+                  [((), (), cache['bytes'])])
+    learner_cache = learner_detail_cache.stats()
+    render_metric(lines, 'learnengage_learner_cache_events_total', 'counter', 'Learner detail cache lookups by outcome.',
+                  [(('event',), (event,), learner_cache[event]) for event in ('hits', 'revalidations', 'misses', 'evictions')])
+    pools = [('read_write', db_pool.stats()), ('read_only', db_read_pool.stats())]
+    render_metric(lines, 'learnengage_db_pool_connections', 'gauge', 'Pooled SQLite connections by state.',
+                  [(('pool', 'state'), (name, state), stats[state]) for name, stats in pools for state in ('in_use', 'idle')])
+    render_metric(lines, 'learnengage_db_pool_acquires_total', 'counter', 'Connection acquisitions by outcome.',
+                  [(('pool', 'outcome'), (name, outcome), stats[outcome]) for name, stats in pools for outcome in ('opened', 'reused')])
+    return app.response_class('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/update-predictions', methods=['POST'])
+@login_required
+def api_update_predictions():
+    """Re-score learners with activity newer than their prediction_timestamp
+    (Super Admin only); ?full=1 re-scores every learner"""
+    if session['user']['role'] != 'Super Admin':
+        return jsonify({'error': 'Super Admin only'}), 403
+    full = request.args.get('full') == '1'
+    started = time.perf_counter()
+    conn = get_db_connection()
+    try:
+        scored = predictor.update_predictions(conn, full=full)
+    except sqlite3.Error as e:
+        print(f"Update predictions error: {e}")
+        return jsonify({'error': 'Failed to update predictions'}), 500
+    finally:
+        conn.close()
+    return jsonify({'scored': scored, 'full': full, 'seconds': round(time.perf_counter() - started, 3)})
+
+@app.route('/api/events', methods=['POST'])
+@login_required
+def api_events():
+    """Ingest a batch of login, assignment, quiz and attendance events (Super Admin only).
+    
+    Body: a JSON array of events (or {"events": [...]}), or NDJSON with one
+    event per line when sent as application/x-ndjson or with ?format=ndjson,
+    of at most EVENTS_MAX_BODY bytes and EVENTS_MAX_BATCH events (else 413).
+    Response: {'accepted', 'duplicates', 'rejected', 'errors': [...], 'seconds'}.
+    """
+    if session['user']['role'] != 'Super Admin':
+        return jsonify({'error': 'Super Admin only'}), 403
+    started = time.perf_counter()
+    # Read at most one byte past the cap, so an oversized (or chunked,
+    # length-less) body is refused without being buffered whole
+    data = b''
+    if (request.content_length or 0) <= EVENTS_MAX_BODY:
+        data = request.stream.read(EVENTS_MAX_BODY + 1)
+    if len(data) > EVENTS_MAX_BODY or (request.content_length or 0) > EVENTS_MAX_BODY:
+        return jsonify({'error': f'Request body over {EVENTS_MAX_BODY} bytes'}), 413
+    if request.mimetype == STREAM_FORMATS['ndjson'] or request.args.get('format') == 'ndjson':
+        events = decode_ndjson(data)
+    else:
+        try:
+            payload = json.loads(data) if request.is_json else None
+        except ValueError:
+            payload = None
+        events = payload.get('events') if isinstance(payload, dict) else payload
+        if not isinstance(events, list):
+            return jsonify({'error': 'Expected a JSON array of events, {"events": [...]} or NDJSON'}), 400
+    if len(events) > EVENTS_MAX_BATCH:
+        return jsonify({'error': f'At most {EVENTS_MAX_BATCH} events per batch'}), 413
+    
+    conn = get_db_connection()
+    try:
+        result = ingest_events(conn, events)
+    except sqlite3.Error as e:
+        print(f"Event ingestion error: {e}")
+        return jsonify({'error': 'Failed to store events; the batch can be retried'}), 503
+    finally:
+        conn.close()
+    result['seconds'] = round(time.perf_counter() - started, 3)
+    return jsonify(result)
+
+@app.route('/debug/queries')
+@login_required
+def debug_queries():
+    """Worst SQL statements, slowest requests and recent slow queries (Super Admin only)"""
+    if session['user']['role'] != 'Super Admin':
+        return jsonify({'error': 'Super Admin only'}), 403
+    sort = request.args.get('sort', 'total_ms')
+    if sort not in ('total_ms', 'max_ms', 'count', 'rows'):
+        return jsonify({'error': f"Unknown sort key: {sort}"}), 400
+    try:
+        limit = min(max(int(request.args.get('limit', 20)), 1), 200)
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    return jsonify(query_stats.report(sort, limit))
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     print(f"Starting LearnEngage AI on port {port}")
@@ -0,0 +1,54 @@
+"""ASGI serving mode: python asgi.py, or uvicorn asgi:application
+
+The Flask views stay synchronous and are served through a2wsgi's
+WSGIMiddleware: the event loop owns the connections, and each request runs
+on a bounded thread pool with back-pressure on its response body.
+Independent sub-queries inside a view still fan out concurrently through
+app.run_parallel_reads.
+
+Full-list exports (/api/learners, /api/tickets and /api/interventions
+without paging arguments) go to a second, smaller pool. Long exports
+therefore queue among themselves and never hold every request thread, so
+cheap endpoints like /api/dashboard-stats stay responsive while they run.
+"""
+import os
+from urllib.parse import parse_qs
+
+from a2wsgi import WSGIMiddleware
+
+from app import app, FEED_PAGE_ARGS, LEARNER_PAGE_ARGS
+
+# Threads running views, and threads running full-list exports
+ASGI_WORKERS = int(os.environ.get('ASGI_WORKERS', 8))
+ASGI_STREAM_WORKERS = int(os.environ.get('ASGI_STREAM_WORKERS', 2))
+
+# Routes streamed whole unless one of their paging arguments is given
+EXPORT_ROUTES = {
+    '/api/learners': LEARNER_PAGE_ARGS,
+    '/api/tickets': FEED_PAGE_ARGS,
+    '/api/interventions': FEED_PAGE_ARGS,
+}
+
+request_app = WSGIMiddleware(app, workers=ASGI_WORKERS)
+export_app = WSGIMiddleware(app, workers=ASGI_STREAM_WORKERS)
+
+def is_export(scope):
+    """True for a GET that streams a full list"""
+    page_args = EXPORT_ROUTES.get(scope['path'])
+    if page_args is None or scope['method'] != 'GET':
+        return False
+    args = parse_qs(scope['query_string'].decode('latin-1'), keep_blank_values=True)
+    return not any(arg in args for arg in page_args)
+
+async def application(scope, receive, send):
+    """ASGI entry point serving the Flask app"""
+    if scope['type'] == 'http' and is_export(scope):
+        await export_app(scope, receive, send)
+    else:
+        await request_app(scope, receive, send)
+
+if __name__ == '__main__':
+    import uvicorn
+    port = int(os.environ.get('PORT', 5000))
+    print(f"Starting LearnEngage AI (ASGI) on port {port}")
+    uvicorn.run(application, host='0.0.0.0', port=port, access_log=False)
@@ -0,0 +1,665 @@
+import argparse
+import contextlib
+import http.cookiejar
+import io
+import json
+import os
+import platform
+import random
+import resource
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from db import (create_tables_if_not_exist, apply_migrations, generate_random_data,
+                SCOPE_AGGREGATES, build_scope_aggregate_query)
+
+# app binds its database when imported, so it is imported inside the
+# functions that need it, after DATABASE_PATH has been set
+
+SUPER_ADMIN = {'role': 'Super Admin', 'assigned_courses': 'ALL'}
+COORDINATOR = {'role': 'Program Coordinator', 'assigned_courses': 'CR101,CS201'}
+COURSES = ['CR101', 'CS201', 'DS301', 'AI401']
+
+# The pre-builder dashboard query: every activity table LEFT JOINed onto
+# Learners in one statement, patched up with COUNT(DISTINCT ...)
+FAN_OUT_QUERY = """
+    SELECT
+        COUNT(DISTINCT l.learner_id) as total_learners,
+        SUM(la.total_duration) as total_login_time,
+        COUNT(DISTINCT ad.assignment_id) as total_assignments,
+        COUNT(DISTINCT qd.quiz_id) as total_quizzes,
+        COUNT(DISTINCT ls.session_id) as total_sessions,
+        COUNT(DISTINCT td.ticket_id) as total_tickets
+    FROM Learners l
+    LEFT JOIN Login_Activity la ON l.learner_id = la.learner_id
+    LEFT JOIN Assignment_Details ad ON l.learner_id = ad.learner_id
+    LEFT JOIN Quiz_Details qd ON l.learner_id = qd.learner_id
+    LEFT JOIN Live_Session ls ON l.learner_id = ls.learner_id
+    LEFT JOIN Ticket_Details td ON l.learner_id = td.learner_id
+"""
+
+def seed_activity_db(path, learners, rows_per_learner, seed=42):
+    """Create a database with a fixed number of activity rows per learner and table"""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    cursor = conn.cursor()
+    create_tables_if_not_exist(cursor)
+    apply_migrations(conn)
+
+    cursor.executemany("INSERT INTO Courses (course_id, course_name) VALUES (?, ?)",
+                       [(course, course) for course in COURSES])
+    cohorts = [(f"C{i}", COURSES[i % len(COURSES)]) for i in range(8)]
+    cursor.executemany("INSERT INTO Cohorts (cohort_id, course_id) VALUES (?, ?)", cohorts)
+    learner_rows = [(f"L{i}", cohorts[i % len(cohorts)][0], f"Learner {i}", rng.uniform(0, 100))
+                    for i in range(learners)]
+    cursor.executemany("INSERT INTO Learners (learner_id, cohort_id, name, total_engagement_score) VALUES (?, ?, ?, ?)",
+                       learner_rows)
+
+    def per_learner(make_row):
+        return [make_row(f"L{i}", j) for i in range(learners) for j in range(rows_per_learner)]
+
+    cursor.executemany("INSERT INTO Login_Activity (login_id, learner_id, login_time, total_duration) VALUES (?, ?, ?, ?)",
+                       per_learner(lambda lid, j: (f"{lid}-LA{j}", lid, f"2025-{rng.randint(1, 12):02d}-10 09:00:00", rng.randint(60, 480))))
+    cursor.executemany("INSERT INTO Assignment_Details (assignment_id, learner_id, assignment_status, assignment_score) VALUES (?, ?, ?, ?)",
+                       per_learner(lambda lid, j: (f"{lid}-A{j}", lid, rng.choice(['Submitted', 'Pending', 'Graded']),
+                                                   rng.choice([None, rng.uniform(0, 100)]))))
+    cursor.executemany("INSERT INTO Quiz_Details (quiz_id, learner_id, quiz_status, quiz_score) VALUES (?, ?, ?, ?)",
+                       per_learner(lambda lid, j: (f"{lid}-Q{j}", lid, rng.choice(['Attempted', 'Pending']),
+                                                   rng.choice([None, rng.uniform(0, 100)]))))
+    cursor.executemany("INSERT INTO Live_Session (session_id, learner_id, attendance_status) VALUES (?, ?, ?)",
+                       per_learner(lambda lid, j: (f"{lid}-S{j}", lid, rng.choice(['Present', 'Absent']))))
+    cursor.executemany("INSERT INTO Ticket_Details (ticket_id, learner_id, status) VALUES (?, ?, ?)",
+                       per_learner(lambda lid, j: (f"{lid}-T{j}", lid, rng.choice(['Open', 'Resolved']))))
+    conn.commit()
+    return conn
+
+def reference_aggregates(conn, course_ids=None):
+    """Brute-force SCOPE_AGGREGATES in Python straight from the raw tables"""
+    cursor = conn.cursor()
+    cohort_course = dict(cursor.execute("SELECT cohort_id, course_id FROM Cohorts").fetchall())
+    learners = {}
+    for learner_id, cohort_id in cursor.execute("SELECT learner_id, cohort_id FROM Learners"):
+        course_id = cohort_course.get(cohort_id)
+        if course_ids is None or course_id in course_ids:
+            learners[learner_id] = (cohort_id if cohort_id in cohort_course else None, course_id)
+
+    def rows(query):
+        return [row[1:] for row in cursor.execute(query).fetchall() if row[0] in learners]
+
+    def average(values):
+        values = [value for value in values if value is not None]
+        return sum(values) / len(values) if values else None
+
+    logins = rows("SELECT learner_id, total_duration FROM Login_Activity")
+    assignments = rows("SELECT learner_id, assignment_status, assignment_score FROM Assignment_Details")
+    quizzes = rows("SELECT learner_id, quiz_status, quiz_score FROM Quiz_Details")
+    sessions = rows("SELECT learner_id, attendance_status FROM Live_Session")
+    tickets = rows("SELECT learner_id, status FROM Ticket_Details")
+    return {
+        'total_learners': len(learners),
+        'total_courses': len({course for _, course in learners.values() if course is not None}),
+        'total_cohorts': len({cohort for cohort, _ in learners.values() if cohort is not None}),
+        'total_logins': len(logins),
+        'total_login_time': sum(duration or 0 for (duration,) in logins),
+        'total_assignments': len(assignments),
+        'completed_assignments': sum(1 for status, _ in assignments if status == 'Submitted'),
+        'avg_assignment_score': average(score for _, score in assignments),
+        'total_quizzes': len(quizzes),
+        'attempted_quizzes': sum(1 for status, _ in quizzes if status == 'Attempted'),
+        'avg_quiz_score': average(score for _, score in quizzes),
+        'total_sessions': len(sessions),
+        'attended_sessions': sum(1 for (status,) in sessions if status == 'Present'),
+        'total_tickets': len(tickets),
+        'resolved_tickets': sum(1 for (status,) in tickets if status == 'Resolved'),
+    }
+
+def check_aggregates(conn):
+    """Compare build_scope_aggregate_query with the brute-force reference for both roles"""
+    conn.row_factory = sqlite3.Row
+    metrics = list(SCOPE_AGGREGATES)
+    failures = []
+    for user, course_ids in [(SUPER_ADMIN, None), (COORDINATOR, COORDINATOR['assigned_courses'].split(','))]:
+        query, params = build_scope_aggregate_query(user, course_ids or [], metrics)
+        actual = dict(conn.execute(query, params).fetchone())
+        expected = reference_aggregates(conn, course_ids)
+        for metric in metrics:
+            a, e = actual[metric], expected[metric]
+            if a != e and not (isinstance(a, float) and e is not None and abs(a - e) < 1e-6):
+                failures.append(f"{user['role']} {metric}: builder={a} reference={e}")
+    conn.row_factory = None
+    return failures
+
+def check_database_aggregates(db_path):
+    """check_aggregates on an existing database, applying any pending migrations first"""
+    conn = sqlite3.connect(db_path)
+    try:
+        apply_migrations(conn)
+        failures = check_aggregates(conn)
+    finally:
+        conn.close()
+    for failure in failures:
+        print(f"MISMATCH {failure}")
+    return not failures
+
+def time_query(conn, query, params=(), repeat=3):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        conn.execute(query, params).fetchall()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def bench_aggregates(learners, scales):
+    """Time the fan-out query against the builder as activity per learner grows"""
+    failed = False
+    print(f"{'rows/learner':>12} {'activity rows':>14} {'fan-out (ms)':>13} {'builder (ms)':>13}")
+    for rows_per_learner in scales:
+        with tempfile.TemporaryDirectory() as tmp:
+            conn = seed_activity_db(os.path.join(tmp, 'bench.db'), learners, rows_per_learner)
+            failures = check_aggregates(conn)
+            for failure in failures:
+                print(f"MISMATCH {failure}")
+            failed = failed or bool(failures)
+
+            query, params = build_scope_aggregate_query(SUPER_ADMIN, [], list(SCOPE_AGGREGATES))
+            fan_out = time_query(conn, FAN_OUT_QUERY)
+            builder = time_query(conn, query, params)
+            conn.close()
+        print(f"{rows_per_learner:>12} {learners * rows_per_learner * 5:>14} {fan_out * 1000:>13.1f} {builder * 1000:>13.1f}")
+    return not failed
+
+# Logins used to drive the endpoints; generate_random_data creates both
+BENCH_USERS = [('superadmin', 'admin123'), ('coordinator1', 'coord1')]
+# The dashboard's widgets, as the page requests them through /api/batch
+DASHBOARD_BATCH = {'requests': [
+    {'route': 'dashboard-stats'},
+    {'route': 'monthly-engagement'},
+    {'route': 'interventions/status-counts'},
+    {'route': 'learners', 'args': {'limit': 10}}
+]}
+# The progress handler fires every VM_STEP_GRANULARITY SQLite VM instructions
+VM_STEP_GRANULARITY = 100
+# Latencies below this many ms are never reported as regressions (timer noise)
+REGRESSION_FLOOR_MS = 2.0
+# Serving modes compared by the mixed-load benchmark
+SERVERS = {'threaded': 'app.py', 'asgi': 'asgi.py'}
+# Mixed load: full learner exports alongside a cheap, cached endpoint
+EXPORT_PATH = '/api/learners'
+CHEAP_PATH = '/api/dashboard-stats'
+
+class SqlCounters:
+    """SQL work done by the requests one client thread makes"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.statements = 0
+        self.vm_steps = 0
+    
+    def add(self, statements=0, vm_steps=0):
+        # Parallel-read tasks of one request count from several threads at once
+        with self._lock:
+            self.statements += statements
+            self.vm_steps += vm_steps
+    
+    def read(self):
+        with self._lock:
+            return self.statements, self.vm_steps
+
+# The SqlCounters the current thread's statements are charged to
+_counting = threading.local()
+
+def current_counters():
+    counters = getattr(_counting, 'counters', None)
+    if counters is None:
+        counters = _counting.counters = SqlCounters()
+    return counters
+
+def _count_statement(statement):
+    current_counters().add(statements=1)
+
+def _count_vm_steps():
+    current_counters().add(vm_steps=VM_STEP_GRANULARITY)
+    return 0
+
+def instrument_pools(app_module):
+    """Count statements and VM steps on every connection the app's pools hand out.
+    
+    Queries that run_parallel_reads() runs on executor threads are charged
+    to the thread that submitted them, so a request's counts include its
+    parallel reads. Python's sqlite3 does not expose per-statement scan
+    counters, so VM steps from the progress handler stand in for rows scanned.
+    """
+    for pool in (app_module.db_pool, app_module.db_read_pool):
+        def acquire(acquire=pool.acquire):
+            conn = acquire()
+            conn.set_trace_callback(_count_statement)
+            conn.set_progress_handler(_count_vm_steps, VM_STEP_GRANULARITY)
+            return conn
+        pool.acquire = acquire
+    
+    executor = app_module.read_executor
+    if executor is not None:
+        def submit(fn, *args, submit=executor.submit, **kwargs):
+            counters = current_counters()
+            def charged(*args, **kwargs):
+                _counting.counters = counters
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    _counting.counters = None
+            return submit(charged, *args, **kwargs)
+        executor.submit = submit
+
+def clear_caches(app_module):
+    """Empty every in-process cache so a request does all of its work"""
+    app_module.response_cache.clear()
+    app_module.learner_detail_cache.clear()
+    app_module.course_catalog.clear()
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))]
+
+def peak_rss_kb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def sample_learner(db_path, course_ids=None):
+    """A learner ID inside the given courses (any learner when None)"""
+    conn = sqlite3.connect(db_path)
+    if course_ids:
+        placeholders = ','.join('?' * len(course_ids))
+        row = conn.execute(f"""
+            SELECT l.learner_id FROM Learners l JOIN Cohorts co ON l.cohort_id = co.cohort_id
+            WHERE co.course_id IN ({placeholders}) ORDER BY l.learner_id LIMIT 1
+        """, course_ids).fetchone()
+    else:
+        row = conn.execute("SELECT learner_id FROM Learners ORDER BY learner_id LIMIT 1").fetchone()
+    conn.close()
+    return row[0] if row else 'L0'
+
+def endpoint_requests(app_module, learner_id):
+    """(label, method, path, json) for the dashboard, learner details and every GET /api/* route"""
+    requests = [
+        ('GET /dashboard', 'GET', '/dashboard', None),
+        ('GET /learner/<learner_id>', 'GET', f'/learner/{learner_id}', None),
+    ]
+    for rule in sorted(app_module.app.url_map.iter_rules(), key=lambda rule: rule.rule):
+        if not rule.rule.startswith('/api/') or 'GET' not in rule.methods:
+            continue
+        if set(rule.arguments) - {'learner_id', 'stream'}:
+            continue
+        path = rule.rule.replace('<learner_id>', learner_id)
+        if 'stream' not in rule.arguments:
+            requests.append((f'GET {rule.rule}', 'GET', path, None))
+            continue
+        # History pages: one request per stream
+        for stream in app_module.LEARNER_HISTORY:
+            requests.append((f"GET {rule.rule.replace('<stream>', stream)}", 'GET',
+                             path.replace('<stream>', stream), None))
+    requests.append(('POST /api/batch (dashboard)', 'POST', '/api/batch', DASHBOARD_BATCH))
+    return requests
+
+def login_client(app_module, username, password):
+    client = app_module.app.test_client()
+    response = client.post('/login', data={'username': username, 'password': password})
+    if response.status_code != 302:
+        raise RuntimeError(f"Login failed for {username}")
+    return client
+
+def timed_request(app_module, client, method, path, body, warm_cache):
+    """One request; returns (status, ms, statements, vm_steps)"""
+    if not warm_cache:
+        clear_caches(app_module)
+    counters = current_counters()
+    statements, vm_steps = counters.read()
+    started = time.perf_counter()
+    response = client.open(path, method=method, json=body)
+    response.get_data()
+    elapsed = (time.perf_counter() - started) * 1000
+    response.close()
+    statements_after, vm_steps_after = counters.read()
+    return (response.status_code, elapsed, statements_after - statements, vm_steps_after - vm_steps)
+
+def summarize(samples):
+    """Latency percentiles and mean SQL work for a list of timed_request results"""
+    latencies = [ms for _, ms, _, _ in samples]
+    return {
+        'requests': len(samples),
+        'errors': sum(1 for status, _, _, _ in samples if status >= 400),
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'mean_ms': round(sum(latencies) / len(latencies), 3),
+        'statements': round(sum(s for _, _, s, _ in samples) / len(samples), 1),
+        'vm_steps': round(sum(v for _, _, _, v in samples) / len(samples)),
+    }
+
+def write_load(db_path, stop, results):
+    """Insert Login_Activity rows until `stop` is set, recording commit latency and lock errors"""
+    conn = sqlite3.connect(db_path, timeout=5)
+    learner_id = conn.execute("SELECT learner_id FROM Learners LIMIT 1").fetchone()[0]
+    n = 0
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            conn.execute("INSERT INTO Login_Activity (login_id, learner_id, login_time, total_duration) VALUES (?, ?, datetime('now'), 30)",
+                         (f"BENCH-{threading.get_ident()}-{n}", learner_id))
+            conn.commit()
+            results.append((200, (time.perf_counter() - started) * 1000, 0, 0))
+        except sqlite3.OperationalError:
+            conn.rollback()
+            results.append((503, (time.perf_counter() - started) * 1000, 0, 0))
+        n += 1
+        time.sleep(0.005)
+    conn.close()
+
+def run_endpoints(db_path, repeat, threads, writers, warm_cache):
+    """Benchmark every endpoint against db_path; DATABASE_PATH must already point at it"""
+    import app as app_module
+    instrument_pools(app_module)
+    results = {}
+    
+    for username, password in BENCH_USERS:
+        role_courses = None if username == 'superadmin' else ['CR101', 'CS201']
+        requests = endpoint_requests(app_module, sample_learner(db_path, role_courses))
+        
+        if threads <= 1:
+            client = login_client(app_module, username, password)
+            for label, method, path, body in requests:
+                rss_before = peak_rss_kb()
+                timed_request(app_module, client, method, path, body, warm_cache)  # warm-up
+                samples = [timed_request(app_module, client, method, path, body, warm_cache) for _ in range(repeat)]
+                results[f"{username} {label}"] = dict(summarize(samples), peak_rss_kb=peak_rss_kb(),
+                                                      rss_growth_kb=peak_rss_kb() - rss_before)
+            continue
+        
+        # Concurrent mode: every thread cycles through all endpoints with its own session
+        samples = {label: [] for label, _, _, _ in requests}
+        write_samples = []
+        stop = threading.Event()
+        
+        def client_thread():
+            client = login_client(app_module, username, password)
+            for _ in range(repeat):
+                for label, method, path, body in requests:
+                    samples[label].append(timed_request(app_module, client, method, path, body, warm_cache))
+        
+        workers = [threading.Thread(target=client_thread) for _ in range(threads)]
+        writer_threads = [threading.Thread(target=write_load, args=(db_path, stop, write_samples)) for _ in range(writers)]
+        started = time.perf_counter()
+        for thread in writer_threads + workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        stop.set()
+        for thread in writer_threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        
+        for label, label_samples in samples.items():
+            results[f"{username} {label}"] = dict(summarize(label_samples), peak_rss_kb=peak_rss_kb())
+        total = sum(len(label_samples) for label_samples in samples.values())
+        results[f"{username} throughput"] = {'threads': threads, 'requests': total,
+                                             'requests_per_s': round(total / elapsed, 1)}
+        if write_samples:
+            results[f"{username} writer commits"] = summarize(write_samples)
+    return results
+
+def table_counts(db_path):
+    conn = sqlite3.connect(db_path)
+    tables = ['Learners', 'Login_Activity', 'Assignment_Details', 'Quiz_Details',
+              'Live_Session', 'Ticket_Details', 'Nudge_Logs']
+    counts = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in tables}
+    conn.close()
+    return counts
+
+def bench_database(db_path, args):
+    """Run the endpoint suite in a fresh interpreter so app binds db_path and RSS is per database"""
+    with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as output:
+        output_path = output.name
+    try:
+        command = [sys.executable, os.path.abspath(__file__), 'run-endpoints', db_path, output_path,
+                   '--repeat', str(args.repeat), '--threads', str(args.threads), '--writers', str(args.writers)]
+        if args.warm_cache:
+            command.append('--warm-cache')
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL,
+                       env=dict(os.environ, DATABASE_PATH=db_path))
+        with open(output_path) as f:
+            return json.load(f)
+    finally:
+        os.remove(output_path)
+
+def print_results(label, endpoints):
+    print(f"\n== {label} ==")
+    print(f"{'endpoint':<58} {'p50':>8} {'p95':>8} {'p99':>8} {'stmts':>6} {'vm steps':>10} {'err':>4}")
+    for name, result in endpoints.items():
+        if 'p50_ms' not in result:
+            print(f"{name:<58} {result}")
+            continue
+        print(f"{name:<58} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} "
+              f"{result['statements']:>6} {result['vm_steps']:>10} {result['errors']:>4}")
+
+def find_regressions(results, baseline, tolerance):
+    """Endpoints whose p95 grew by more than `tolerance` or that now run more statements"""
+    regressions = []
+    for scale, run in results['runs'].items():
+        base_run = baseline.get('runs', {}).get(scale)
+        if not base_run:
+            continue
+        for name, result in run['endpoints'].items():
+            base = base_run['endpoints'].get(name)
+            if not base or 'p95_ms' not in result or 'p95_ms' not in base:
+                continue
+            if result['p95_ms'] > max(base['p95_ms'] * (1 + tolerance), base['p95_ms'] + REGRESSION_FLOOR_MS):
+                regressions.append(f"{scale} {name}: p95 {base['p95_ms']}ms -> {result['p95_ms']}ms")
+            if result['statements'] > base['statements']:
+                regressions.append(f"{scale} {name}: statements {base['statements']} -> {result['statements']}")
+    return regressions
+
+def bench_endpoints(args):
+    """Seed a database per scale (or use --db) and benchmark every endpoint against it"""
+    results = {
+        'meta': {
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'threads': args.threads,
+            'writers': args.writers,
+            'warm_cache': args.warm_cache,
+            'started_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'runs': {}
+    }
+    if args.db:
+        targets = [('db', args.db)]
+    else:
+        targets = [(f"scale-{scale}", scale) for scale in args.scales]
+    
+    for label, target in targets:
+        with tempfile.TemporaryDirectory() as tmp:
+            if isinstance(target, int):
+                db_path = os.path.join(tmp, 'bench.db')
+                started = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    generate_random_data(db_path, scale=target, seed=args.seed)
+                print(f"Seeded {label} in {time.perf_counter() - started:.1f}s")
+            else:
+                db_path = target
+            run = {'rows': table_counts(db_path), 'endpoints': bench_database(db_path, args)}
+        results['runs'][label] = run
+        print_results(f"{label} {run['rows']['Learners']:,} learners", run['endpoints'])
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = find_regressions(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return not regressions
+    return True
+
+def start_server(mode, db_path, port):
+    """Start app.py (threaded dev server) or asgi.py on port; returns the process once it answers"""
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), SERVERS[mode])
+    process = subprocess.Popen([sys.executable, script], cwd=os.path.dirname(script),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                               env=dict(os.environ, DATABASE_PATH=db_path, PORT=str(port)))
+    deadline = time.perf_counter() + 60
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{SERVERS[mode]} exited with status {process.returncode}")
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/login", timeout=1).close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"{SERVERS[mode]} did not start on port {port}")
+
+def http_client(port, username, password):
+    """urllib opener with a logged-in session cookie"""
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+    opener.open(f"http://127.0.0.1:{port}/login",
+                urllib.parse.urlencode({'username': username, 'password': password}).encode()).close()
+    return opener
+
+def mixed_load(port, seconds, exporters, clients):
+    """Run `exporters` threads streaming EXPORT_PATH and `clients` threads
+    polling CHEAP_PATH for `seconds`; returns results per request kind"""
+    samples = {'export': [], 'cheap': []}
+    deadline = time.perf_counter() + seconds
+    
+    def client_thread(kind, path):
+        opener = http_client(port, *BENCH_USERS[0])
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                with opener.open(f"http://127.0.0.1:{port}{path}", timeout=120) as response:
+                    response.read()
+                    status = response.status
+            except urllib.error.HTTPError as e:
+                status = e.code
+            except OSError:
+                status = 599
+            samples[kind].append((status, (time.perf_counter() - started) * 1000, 0, 0))
+    
+    threads = [threading.Thread(target=client_thread, args=('export', EXPORT_PATH)) for _ in range(exporters)]
+    threads += [threading.Thread(target=client_thread, args=('cheap', CHEAP_PATH)) for _ in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    results = {}
+    for kind, kind_samples in samples.items():
+        if kind_samples:
+            summary = summarize(kind_samples)
+            del summary['statements'], summary['vm_steps']
+            results[kind] = dict(summary, requests_per_s=round(len(kind_samples) / elapsed, 1))
+    return results
+
+def bench_mixed(args):
+    """Compare the threaded dev server with the ASGI mode under exports plus cheap requests"""
+    results = {
+        'meta': {
+            'python': platform.python_version(),
+            'cpus': os.cpu_count(),
+            'seconds': args.seconds,
+            'exporters': args.exporters,
+            'clients': args.clients,
+            'started_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'servers': {}
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = args.db
+        if not db_path:
+            db_path = os.path.join(tmp, 'bench.db')
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_random_data(db_path, scale=args.scale, seed=args.seed)
+        results['meta']['learners'] = table_counts(db_path)['Learners']
+        
+        print(f"{'server':<10} {'kind':<7} {'req/s':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'err':>4}")
+        for mode in args.servers:
+            process = start_server(mode, db_path, args.port)
+            try:
+                run = results['servers'][mode] = mixed_load(args.port, args.seconds, args.exporters, args.clients)
+            finally:
+                process.terminate()
+                process.wait()
+            for kind, result in run.items():
+                print(f"{mode:<10} {kind:<7} {result['requests_per_s']:>8} {result['p50_ms']:>9.1f} "
+                      f"{result['p95_ms']:>9.1f} {result['p99_ms']:>9.1f} {result['errors']:>4}")
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    return True
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="LearnEngage AI benchmarks")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    aggregates = subparsers.add_parser('aggregates', help="verify and time the scope aggregate builder")
+    aggregates.add_argument('--learners', type=int, default=200)
+    aggregates.add_argument('--scales', type=int, nargs='+', default=[1, 2, 4, 6])
+    aggregates.add_argument('--db', help="only verify the builder against this existing database")
+    
+    endpoints = subparsers.add_parser('endpoints', help="latency, SQL work and RSS for every route at several data scales")
+    endpoints.add_argument('--scales', type=int, nargs='+', default=[1, 10], help="db.py --scale factors to seed")
+    endpoints.add_argument('--db', help="benchmark this existing database instead of seeding")
+    endpoints.add_argument('--seed', type=int, default=42)
+    endpoints.add_argument('--output', help="write results as JSON to this file")
+    endpoints.add_argument('--baseline', help="earlier --output file; exit 1 on regressions against it")
+    endpoints.add_argument('--tolerance', type=float, default=0.25, help="allowed p95 growth over the baseline")
+    
+    run_endpoints_parser = subparsers.add_parser('run-endpoints', help="(internal) benchmark one database, writing JSON")
+    run_endpoints_parser.add_argument('db_path')
+    run_endpoints_parser.add_argument('output')
+    for subparser in (endpoints, run_endpoints_parser):
+        subparser.add_argument('--repeat', type=int, default=20, help="timed requests per endpoint (per thread)")
+        subparser.add_argument('--threads', type=int, default=1, help="concurrent client threads")
+        subparser.add_argument('--writers', type=int, default=0, help="threads writing Login_Activity during concurrent runs")
+        subparser.add_argument('--warm-cache', action='store_true', help="keep the in-process caches between requests")
+    mixed = subparsers.add_parser('mixed', help="threaded server vs ASGI mode: cheap requests during full exports")
+    mixed.add_argument('--db', help="benchmark this existing database instead of seeding")
+    mixed.add_argument('--scale', type=int, default=10, help="db.py --scale factor to seed")
+    mixed.add_argument('--seed', type=int, default=42)
+    mixed.add_argument('--servers', nargs='+', choices=sorted(SERVERS), default=['threaded', 'asgi'])
+    mixed.add_argument('--seconds', type=float, default=10, help="duration of each server's run")
+    mixed.add_argument('--exporters', type=int, default=4, help=f"threads streaming {EXPORT_PATH}")
+    mixed.add_argument('--clients', type=int, default=4, help=f"threads polling {CHEAP_PATH}")
+    mixed.add_argument('--port', type=int, default=5099)
+    mixed.add_argument('--output', help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    if args.command == 'aggregates':
+        if args.db:
+            ok = check_database_aggregates(args.db)
+        else:
+            ok = bench_aggregates(args.learners, args.scales)
+        print("Aggregates match the brute-force reference" if ok else "Aggregate mismatch!")
+        sys.exit(0 if ok else 1)
+    elif args.command == 'endpoints':
+        sys.exit(0 if bench_endpoints(args) else 1)
+    elif args.command == 'mixed':
+        sys.exit(0 if bench_mixed(args) else 1)
+    elif args.command == 'run-endpoints':
+        results = run_endpoints(args.db_path, args.repeat, args.threads, args.writers, args.warm_cache)
+        with open(args.output, 'w') as f:
+            json.dump(results, f)
@@ -4,6 +4,8 @@ import string
 from datetime import datetime, timedelta
 import uuid
 import hashlib
+import threading
+import time
 
 def create_tables_if_not_exist(cursor):
     """Create tables if they don't exist"""
@@ -152,13 +154,408 @@ def hash_password(password):
     """Hash a password for storing."""
     return hashlib.sha256(password.encode()).hexdigest()
 
-def generate_random_data(db_path):
-    # Connect to the database
-    conn = sqlite3.connect(db_path)
+# Pragmas applied to every pooled connection. journal_mode is persistent and
+# can only be switched from a read-write connection.
+CONNECTION_PRAGMAS = [
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -65536",        # 64 MB page cache
+    "PRAGMA mmap_size = 268435456",      # 256 MB memory-mapped I/O
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA busy_timeout = 5000",
+]
+
+class QueryRecord:
+    """One statement run on an instrumented connection; fetches add to seconds and rows"""
+    __slots__ = ('sql', 'params', 'seconds', 'rows')
+    
+    def __init__(self, sql, params, seconds):
+        self.sql = sql
+        self.params = params
+        self.seconds = seconds
+        self.rows = 0
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that reports every statement to its connection's query_listener.
+    
+    The listener is called as listener(sql, params, seconds) after each
+    execute and may return a QueryRecord; time spent in later fetches and
+    the rows they return are added to that record.
+    """
+    record = None
+    
+    def execute(self, sql, parameters=()):
+        listener = self.connection.query_listener
+        if listener is None:
+            self.record = None
+            return super().execute(sql, parameters)
+        started = time.perf_counter()
+        try:
+            super().execute(sql, parameters)
+        finally:
+            self.record = listener(sql, parameters, time.perf_counter() - started)
+        if self.record is not None and self.description is None:
+            self.record.rows = max(self.rowcount, 0)
+        return self
+    
+    def executemany(self, sql, seq_of_parameters):
+        listener = self.connection.query_listener
+        if listener is None:
+            self.record = None
+            return super().executemany(sql, seq_of_parameters)
+        started = time.perf_counter()
+        try:
+            super().executemany(sql, seq_of_parameters)
+        finally:
+            self.record = listener(sql, None, time.perf_counter() - started)
+        if self.record is not None:
+            self.record.rows = max(self.rowcount, 0)
+        return self
+    
+    def _fetched(self, started, rows):
+        if self.record is not None:
+            self.record.seconds += time.perf_counter() - started
+            self.record.rows += rows
+    
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(started, row is not None)
+        return row
+    
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(started, len(rows))
+        return rows
+    
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(started, len(rows))
+        return rows
+    
+    def __next__(self):
+        started = time.perf_counter()
+        row = super().__next__()
+        self._fetched(started, 1)
+        return row
+
+class PooledConnection(sqlite3.Connection):
+    """sqlite3 connection whose close() hands it back to its pool"""
+    pool = None
+    query_listener = None
+    
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+    
+    # sqlite3.Connection's shortcuts create plain cursors, so route them through cursor()
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+    
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+    
+    def close(self):
+        if self.pool is None:
+            super().close()
+        else:
+            self.pool.release(self)
+    
+    def discard(self):
+        """Really close the underlying SQLite connection"""
+        super().close()
+
+class ConnectionPool:
+    """Pool of tuned SQLite connections for one database file.
+    
+    Connections are handed to one thread at a time, so they are opened with
+    check_same_thread=False and any thread can reuse an idle one. Up to
+    `size` idle connections are kept; extra connections opened under load
+    are closed when released. `query_listener` is installed on every
+    connection (see InstrumentedCursor).
+    """
+    
+    def __init__(self, db_path, size=4, read_only=False, query_listener=None):
+        self.db_path = db_path
+        self.size = size
+        self.read_only = read_only
+        self.query_listener = query_listener
+        self._idle = []
+        self._lock = threading.Lock()
+        self._stats = {'opened': 0, 'reused': 0, 'released': 0, 'discarded': 0, 'in_use': 0}
+    
+    def _connect(self):
+        if self.read_only:
+            conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True,
+                                   check_same_thread=False, factory=PooledConnection)
+        else:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, factory=PooledConnection)
+            conn.execute("PRAGMA journal_mode = WAL")
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        conn.pool = self
+        conn.query_listener = self.query_listener
+        return conn
+    
+    def acquire(self):
+        """Get an idle connection, opening a new one if none is available"""
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+            self._stats['in_use'] += 1
+            self._stats['reused' if conn else 'opened'] += 1
+        if conn is None:
+            try:
+                conn = self._connect()
+            except sqlite3.Error:
+                with self._lock:
+                    self._stats['in_use'] -= 1
+                    self._stats['opened'] -= 1
+                raise
+        return conn
+    
+    def release(self, conn):
+        """Return a connection to the pool, discarding it if the pool is full"""
+        if conn.in_transaction:
+            conn.rollback()
+        conn.row_factory = None
+        with self._lock:
+            self._stats['in_use'] -= 1
+            if len(self._idle) < self.size:
+                self._idle.append(conn)
+                self._stats['released'] += 1
+                return
+            self._stats['discarded'] += 1
+        conn.discard()
+    
+    def close_all(self):
+        """Close every idle connection (connections in use are closed on release)"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self.size = 0
+        for conn in idle:
+            conn.discard()
+    
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, idle=len(self._idle), size=self.size, read_only=self.read_only)
+
+# Synthetic data generation. Row counts are BASE_ROWS * scale per table
+# (cohorts COHORTS_PER_SCALE * scale). IDs are sequences, so any scale is
+# collision-free, and every chunk of rows draws from its own RNG seeded by
+# (seed, table, first row), so output depends only on --scale and --seed,
+# never on how many worker processes produced it.
+BASE_ROWS = 500
+COHORTS_PER_SCALE = 20
+GENERATOR_CHUNK = 20000
+
+# Pragmas for the bulk load only; the app's pools set their own on connect
+BULK_LOAD_PRAGMAS = [
+    "PRAGMA journal_mode = MEMORY",
+    "PRAGMA synchronous = OFF",
+    "PRAGMA cache_size = -262144",       # 256 MB page cache
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA locking_mode = EXCLUSIVE",
+]
+
+COURSES = [
+    ("CR101", "Introduction to Python Programming"),
+    ("CS201", "Advanced Java Development"),
+    ("DS301", "Data Science Fundamentals"),
+    ("AI401", "Artificial Intelligence Essentials"),
+    ("ML501", "Machine Learning Mastery"),
+    ("WEB601", "Web Development Bootcamp"),
+    ("NET701", "Network Security Fundamentals")
+]
+FIRST_NAMES = ["Akshit", "Omkar", "Mohammed", "Janhvi", "Rohit", "Sneha", "Karan", "Ananya", "Vikas", "Pooja",
+               "Rahul", "Priya", "Amit", "Neha", "Sanjay", "Divya", "Vishal", "Meera", "Raj", "Sunita"]
+LAST_NAMES = ["Sharma", "Patil", "Khan", "Mehta", "Verma", "Gupta", "Joshi", "Roy", "Nair", "Iyer",
+              "Singh", "Kumar", "Patel", "Shah", "Reddy", "Malhotra", "Chopra", "Agarwal", "Bose", "Rao"]
+EMAIL_DOMAINS = ["gmail.com", "yahoo.com", "hotmail.com", "example.com", "outlook.com"]
+COUNTRIES = ["India", "USA", "UK", "Canada", "Australia", "Germany", "France", "Japan", "Singapore", "Brazil"]
+TIMEZONES = ["IST (+5:30)", "PST (-8:00)", "EST (-5:00)", "GMT (+0:00)", "CET (+1:00)", "AEST (+10:00)"]
+TICKET_SUBJECTS = ["Technical Issue", "Content Clarification", "Assignment Help", "Payment Issue", "Platform Bug"]
+TICKET_DESCRIPTIONS = [
+    "Having trouble accessing the learning materials",
+    "Need clarification on module 3 content",
+    "Assignment submission not working",
+    "Payment gateway issue",
+    "Video lectures not loading properly"
+]
+TICKET_FEEDBACK = ["Excellent support", "Good response", "Average", "Could be better", "Not helpful"]
+NUDGE_TYPES = ["Reminder", "Peer Challenge", "Mentor Connect", "Progress Check", "Resource Share"]
+NUDGE_CHANNELS = ["Email", "WhatsApp", "Slack", "SMS", "In-app"]
+# Status values of the activity tables, shared with events.py's validation
+ASSIGNMENT_STATUSES = ("Submitted", "Pending", "Graded", "Late")
+QUIZ_STATUSES = ("Attempted", "Pending", "Completed", "Not Started")
+ATTENDANCE_STATUSES = ("Present", "Absent", "Late", "Left Early")
+
+# Timestamps are generated as seconds since CALENDAR_START and formatted from
+# a precomputed day table, which is several times faster than datetime.strftime
+CALENDAR_START = datetime(2024, 1, 1)
+CALENDAR_DAYS = [(CALENDAR_START + timedelta(days=day)).strftime("%Y-%m-%d") for day in range(800)]
+COHORT_START_DAYS = (datetime(2025, 12, 31) - CALENDAR_START).days
+ACTIVITY_START_DAY = (datetime(2025, 1, 1) - CALENDAR_START).days
+ACTIVITY_DAYS = (datetime(2025, 12, 31) - datetime(2025, 1, 1)).days
+
+def _format_timestamp(seconds):
+    """'YYYY-MM-DD HH:MM:SS' for a number of seconds since CALENDAR_START"""
+    day, rest = divmod(seconds, 86400)
+    return f"{CALENDAR_DAYS[day]} {rest // 3600:02d}:{rest // 60 % 60:02d}:{rest % 60:02d}"
+
+def _random_activity_time(rng):
+    """Seconds since CALENDAR_START of a random moment from 2025-01-01 to 2025-12-31 00:00"""
+    return ACTIVITY_START_DAY * 86400 + rng.randint(0, ACTIVITY_DAYS * 86400)
+
+def _learner_hash(seed, index):
+    """Deterministic 64-bit mix of (seed, learner index).
+    
+    Activity rows reference learners by index, so the attributes they copy
+    (cohort, name, email) are derived from this hash instead of a lookup
+    table that every worker process would need.
+    """
+    h = (seed * 0x9E3779B97F4A7C15 + (index + 1) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+    h ^= h >> 31
+    h = (h * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF
+    return h ^ (h >> 29)
+
+def _learner(ctx, index):
+    """(learner_id, cohort_id, name, email) for learner number `index`"""
+    h = _learner_hash(ctx['seed'], index)
+    name = f"{FIRST_NAMES[h % len(FIRST_NAMES)]} {LAST_NAMES[(h >> 8) % len(LAST_NAMES)]}"
+    email = f"{name.lower().replace(' ', '.')}@{EMAIL_DOMAINS[(h >> 16) % len(EMAIL_DOMAINS)]}"
+    cohort_id = f"C{100 + (h >> 24) % ctx['cohorts']}"
+    return f"L{1000 + index}", cohort_id, name, email
+
+def _random_learner(rng, ctx):
+    return _learner(ctx, rng.randrange(ctx['learners']))
+
+def _cohort_rows(rng, start, stop, ctx):
+    return [(f"C{100 + i}", rng.choice(COURSES)[0], CALENDAR_DAYS[rng.randint(0, COHORT_START_DAYS)])
+            for i in range(start, stop)]
+
+def _learner_rows(rng, start, stop, ctx):
+    rows = []
+    for i in range(start, stop):
+        learner_id, cohort_id, name, email = _learner(ctx, i)
+        rows.append((learner_id, cohort_id, name, email,
+                     f"+91-{rng.randint(9000000000, 9999999999)}",
+                     rng.choice(COUNTRIES), rng.choice(TIMEZONES), rng.randint(0, 20),
+                     rng.choice(["On track", "At Risk", "Will Drop off"]),
+                     round(rng.uniform(0, 100), 2)))
+    return rows
+
+def _login_rows(rng, start, stop, ctx):
+    rows = []
+    for i in range(start, stop):
+        learner_id, _, name, email = _random_learner(rng, ctx)
+        # Logins start between 06:00 and 12:00 and last 1-8 hours
+        login_day = ACTIVITY_START_DAY + rng.randint(0, ACTIVITY_DAYS)
+        login_time = login_day * 86400 + 6 * 3600 + rng.randint(0, 6 * 3600)
+        hours = rng.randint(1, 8)
+        rows.append((f"LA{1000 + i}", learner_id, name, email, "hashedpwd",
+                     _format_timestamp(login_time), _format_timestamp(login_time + hours * 3600), hours * 60))
+    return rows
+
+def _assignment_rows(rng, start, stop, ctx):
+    rows = []
+    for i in range(start, stop):
+        learner_id, cohort_id, _, _ = _random_learner(rng, ctx)
+        status = rng.choice(ASSIGNMENT_STATUSES)
+        score = round(rng.uniform(0, 100), 2) if status in ["Submitted", "Graded"] else None
+        submitted_at = _format_timestamp(_random_activity_time(rng)) if status != "Pending" else None
+        rows.append((f"A{1000 + i}", learner_id, rng.choice(COURSES)[0], cohort_id, status, score, submitted_at,
+                     round(score / 100, 2) if score is not None else None))
+    return rows
+
+def _quiz_rows(rng, start, stop, ctx):
+    rows = []
+    for i in range(start, stop):
+        learner_id, cohort_id, _, _ = _random_learner(rng, ctx)
+        status = rng.choice(QUIZ_STATUSES)
+        score = round(rng.uniform(0, 100), 2) if status == "Attempted" else None
+        attempted_at = _format_timestamp(_random_activity_time(rng)) if status == "Attempted" else None
+        rows.append((f"Q{1000 + i}", learner_id, rng.choice(COURSES)[0], cohort_id, status, score, attempted_at,
+                     round(score / 100, 2) if score is not None else None))
+    return rows
+
+def _session_rows(rng, start, stop, ctx):
+    return [(f"S{1000 + i}", rng.choice(COURSES)[0], f"C{100 + rng.randrange(ctx['cohorts'])}",
+             _random_learner(rng, ctx)[0], rng.choice(ATTENDANCE_STATUSES))
+            for i in range(start, stop)]
+
+def _ticket_rows(rng, start, stop, ctx):
+    rows = []
+    for i in range(start, stop):
+        learner_id = _random_learner(rng, ctx)[0]
+        subject = rng.choice(TICKET_SUBJECTS)
+        description = rng.choice(TICKET_DESCRIPTIONS)
+        priority = rng.choice(["Low", "Medium", "High", "Urgent"])
+        status = rng.choice(["Open", "In Progress", "Resolved", "Closed"])
+        closed = status in ["Resolved", "Closed"]
+        created_at = _random_activity_time(rng)
+        resolved_at = _format_timestamp(created_at + rng.randint(1, 72) * 3600) if closed else None
+        rows.append((f"T{1000 + i}", learner_id, subject, description, priority, status,
+                     _format_timestamp(created_at), resolved_at,
+                     rng.choice(TICKET_FEEDBACK) if closed else None,
+                     rng.randint(0, 1) if closed else None))
+    return rows
+
+def _nudge_rows(rng, start, stop, ctx):
+    rows = []
+    for i in range(start, stop):
+        learner_id, _, name, _ = _random_learner(rng, ctx)
+        nudge_type = rng.choice(NUDGE_TYPES)
+        message = f"Hi {name}, this is your {nudge_type.lower()} reminder. Please check your upcoming tasks and deadlines."
+        timestamp = _format_timestamp(_random_activity_time(rng))
+        rows.append((f"N{1000 + i}", learner_id, nudge_type, message, timestamp,
+                     rng.choice(["Sent", "Delivered", "Opened", "Failed", "Read"]), rng.choice(NUDGE_CHANNELS)))
+    return rows
+
+# table -> (row count per unit of scale, INSERT statement, row generator)
+SYNTHETIC_TABLES = {
+    'Cohorts': (COHORTS_PER_SCALE, "INSERT INTO Cohorts (cohort_id, course_id, start_date) VALUES (?, ?, ?)", _cohort_rows),
+    'Learners': (BASE_ROWS, "INSERT INTO Learners (learner_id, cohort_id, name, email, contact, country_region, timezone, work_ex, status, total_engagement_score) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", _learner_rows),
+    'Login_Activity': (BASE_ROWS, "INSERT INTO Login_Activity (login_id, learner_id, name, email, password, login_time, logout_time, total_duration) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", _login_rows),
+    'Assignment_Details': (BASE_ROWS, "INSERT INTO Assignment_Details (assignment_id, learner_id, course_id, cohort_id, assignment_status, assignment_score, submitted_at, normalized_score) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", _assignment_rows),
+    'Quiz_Details': (BASE_ROWS, "INSERT INTO Quiz_Details (quiz_id, learner_id, course_id, cohort_id, quiz_status, quiz_score, attempted_at, normalized_score) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", _quiz_rows),
+    'Live_Session': (BASE_ROWS, "INSERT INTO Live_Session (session_id, course_id, cohort_id, learner_id, attendance_status) VALUES (?, ?, ?, ?, ?)", _session_rows),
+    'Ticket_Details': (BASE_ROWS, "INSERT INTO Ticket_Details (ticket_id, learner_id, subject, description, priority, status, created_at, resolved_at, feedback, satisfied) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", _ticket_rows),
+    'Nudge_Logs': (BASE_ROWS, "INSERT INTO Nudge_Logs (nudge_id, learner_id, nudge_type, message, timestamp, status, channel) VALUES (?, ?, ?, ?, ?, ?, ?)", _nudge_rows),
+}
+
+def _generate_chunk(task):
+    """Rows [start, stop) of one table; module-level so worker processes can run it"""
+    table, start, stop, ctx = task
+    rng = random.Random(f"{ctx['seed']}:{table}:{start}")
+    return SYNTHETIC_TABLES[table][2](rng, start, stop, ctx)
+
+def _chunk_tasks(table, count, ctx):
+    return [(table, start, min(start + GENERATOR_CHUNK, count), ctx) for start in range(0, count, GENERATOR_CHUNK)]
+
+def generate_random_data(db_path, scale=1, seed=None, workers=1):
+    """Rebuild db_path with synthetic data: BASE_ROWS * scale rows per table.
+    
+    All rows are loaded in one transaction with bulk-load pragmas; indexes,
+    the activity summary and triggers are built afterwards by the
+    migrations. With workers > 1 rows are generated in worker processes
+    while the main process inserts them.
+    """
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    started = time.perf_counter()
+    print(f"Generating data at scale {scale} with seed {seed}...")
+    
+    # Connect to the database; transactions are managed explicitly below
+    conn = sqlite3.connect(db_path, isolation_level=None)
     cursor = conn.cursor()
+    for pragma in BULK_LOAD_PRAGMAS:
+        cursor.execute(pragma)
     
     # First, drop existing tables to avoid schema conflicts
-    tables = ['Users', 'Nudge_Logs', 'Ticket_Details', 'Live_Session', 'Quiz_Details', 
+    tables = ['Schema_Migrations', 'Table_Versions', 'Learner_Activity_Summary',
+              'Login_Rollup_Daily', 'Login_Rollup_Monthly', 'Login_Rollup_Weekday',
+              'Learner_Features', 'Feature_Store_Versions', 'Learner_Versions',
+              'Ingested_Events', 'Users', 'Nudge_Logs', 'Ticket_Details', 'Live_Session', 'Quiz_Details', 
               'Assignment_Details', 'Login_Activity', 'Learners', 'Cohorts', 'Courses']
     
     for table in tables:
@@ -167,9 +564,8 @@ def generate_random_data(db_path):
         except sqlite3.Error as e:
             print(f"Error dropping table {table}: {e}")
     
-    # Create tables if they don't exist
+    cursor.execute("BEGIN")
     create_tables_if_not_exist(cursor)
-    conn.commit()
     
     # Create users with different roles
     print("Creating users...")
@@ -181,320 +577,869 @@ def generate_random_data(db_path):
         ("U003", "coordinator2", hash_password("coord2"), "Program Coordinator", "DS301,AI401"),
         ("U004", "coordinator3", hash_password("coord3"), "Program Coordinator", "ML501,WEB601")
     ]
-    
     cursor.executemany("INSERT INTO Users (user_id, username, password_hash, role, assigned_courses) VALUES (?, ?, ?, ?, ?)", users)
-    conn.commit()
-    
-    # Helper functions
-    def random_id(prefix, length=3):
-        return f"{prefix}{random.randint(10**(length-1), 10**length - 1)}"
     
-    def random_email(name):
-        domains = ["gmail.com", "yahoo.com", "hotmail.com", "example.com", "outlook.com"]
-        return f"{name.lower().replace(' ', '.')}@{random.choice(domains)}"
+    # The same 7 courses at every scale
+    print("Generating Courses data...")
+    cursor.executemany("INSERT INTO Courses (course_id, course_name) VALUES (?, ?)", COURSES)
     
-    def random_phone():
-        return f"+91-{random.randint(9000000000, 9999999999)}"
+    ctx = {'seed': seed, 'learners': BASE_ROWS * scale, 'cohorts': COHORTS_PER_SCALE * scale}
+    pool = None
+    if workers > 1:
+        import multiprocessing
+        pool = multiprocessing.Pool(workers)
+    try:
+        for table, (per_scale, insert_sql, _) in SYNTHETIC_TABLES.items():
+            count = per_scale * scale
+            print(f"Generating {table} data ({count:,} rows)...")
+            tasks = _chunk_tasks(table, count, ctx)
+            chunks = pool.imap(_generate_chunk, tasks) if pool else map(_generate_chunk, tasks)
+            for rows in chunks:
+                cursor.executemany(insert_sql, rows)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    conn.commit()
     
-    def random_date(start_date, end_date):
-        delta = end_date - start_date
-        random_days = random.randint(0, delta.days)
-        return start_date + timedelta(days=random_days)
+    # Indexes are built after the bulk load, which is cheaper than maintaining them per insert
+    print("Applying schema migrations...")
+    apply_migrations(conn)
+    conn.close()
     
-    def random_datetime(start_date, end_date):
-        delta = end_date - start_date
-        random_seconds = random.randint(0, int(delta.total_seconds()))  # Convert to int
-        return start_date + timedelta(seconds=random_seconds)
+    print(f"Data generation completed successfully in {time.perf_counter() - started:.1f}s!")
+    print("\nUser accounts created:")
+    print("Super Admin: username='superadmin', password='admin123' (can view all courses)")
+    print("Program Coordinator 1: username='coordinator1', password='coord1' (can view CR101, CS201)")
+    print("Program Coordinator 2: username='coordinator2', password='coord2' (can view DS301, AI401)")
+    print("Program Coordinator 3: username='coordinator3', password='coord3' (can view ML501, WEB601)")
+
+# Versioned schema migrations. Each entry is (version, name, function); the
+# function receives a cursor and runs inside the migration's transaction.
+# Append new migrations to the end of MIGRATIONS and never renumber old ones.
+def _migration_prediction_timestamp(cursor):
+    # Add prediction timestamp column if it doesn't exist (databases created
+    # before migrations were tracked may already have it)
+    cursor.execute("PRAGMA table_info(Learners)")
+    columns = [col[1] for col in cursor.fetchall()]
     
-    # Generate only 7 specific courses
-    print("Generating Courses data...")
-    courses = [
-        ("CR101", "Introduction to Python Programming"),
-        ("CS201", "Advanced Java Development"),
-        ("DS301", "Data Science Fundamentals"),
-        ("AI401", "Artificial Intelligence Essentials"),
-        ("ML501", "Machine Learning Mastery"),
-        ("WEB601", "Web Development Bootcamp"),
-        ("NET701", "Network Security Fundamentals")
+    if 'prediction_timestamp' not in columns:
+        cursor.execute("ALTER TABLE Learners ADD COLUMN prediction_timestamp TEXT")
+
+def _migration_access_path_indexes(cursor):
+    # Indexes for the access paths used by app.py. The per-learner indexes
+    # carry the aggregated columns so GROUP BY learner_id and the learner
+    # detail page are answered from the index alone.
+    indexes = [
+        "CREATE INDEX IF NOT EXISTS idx_learners_cohort ON Learners(cohort_id)",
+        "CREATE INDEX IF NOT EXISTS idx_learners_name ON Learners(name)",
+        "CREATE INDEX IF NOT EXISTS idx_cohorts_course ON Cohorts(course_id)",
+        "CREATE INDEX IF NOT EXISTS idx_login_learner_time ON Login_Activity(learner_id, login_time, total_duration)",
+        "CREATE INDEX IF NOT EXISTS idx_login_time ON Login_Activity(login_time)",
+        "CREATE INDEX IF NOT EXISTS idx_assignment_learner_status ON Assignment_Details(learner_id, assignment_status, assignment_score)",
+        "CREATE INDEX IF NOT EXISTS idx_assignment_cohort ON Assignment_Details(cohort_id)",
+        "CREATE INDEX IF NOT EXISTS idx_quiz_learner_status ON Quiz_Details(learner_id, quiz_status, quiz_score)",
+        "CREATE INDEX IF NOT EXISTS idx_quiz_cohort ON Quiz_Details(cohort_id)",
+        "CREATE INDEX IF NOT EXISTS idx_session_learner_status ON Live_Session(learner_id, attendance_status)",
+        "CREATE INDEX IF NOT EXISTS idx_session_cohort ON Live_Session(cohort_id)",
+        "CREATE INDEX IF NOT EXISTS idx_ticket_learner_status ON Ticket_Details(learner_id, status)",
+        "CREATE INDEX IF NOT EXISTS idx_ticket_created ON Ticket_Details(created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_nudge_learner_time ON Nudge_Logs(learner_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_nudge_timestamp ON Nudge_Logs(timestamp)",
+    ]
+    for statement in indexes:
+        cursor.execute(statement)
+    # Refresh planner statistics so the new indexes are actually chosen
+    cursor.execute("ANALYZE")
+
+# Per-learner counters kept in Learner_Activity_Summary, by source table.
+# Each entry maps a summary column to the amount one source row contributes
+# ({row} is replaced by NEW or OLD inside the triggers).
+SUMMARY_COUNTERS = {
+    'Login_Activity': {
+        'total_logins': "1",
+        'total_login_time': "COALESCE({row}.total_duration, 0)",
+    },
+    'Assignment_Details': {
+        'total_assignments': "1",
+        'completed_assignments': "CASE WHEN {row}.assignment_status = 'Submitted' THEN 1 ELSE 0 END",
+        'assignment_score_sum': "COALESCE({row}.assignment_score, 0)",
+        'assignment_score_count': "CASE WHEN {row}.assignment_score IS NOT NULL THEN 1 ELSE 0 END",
+    },
+    'Quiz_Details': {
+        'total_quizzes': "1",
+        'attempted_quizzes': "CASE WHEN {row}.quiz_status = 'Attempted' THEN 1 ELSE 0 END",
+        'quiz_score_sum': "COALESCE({row}.quiz_score, 0)",
+        'quiz_score_count': "CASE WHEN {row}.quiz_score IS NOT NULL THEN 1 ELSE 0 END",
+    },
+    'Live_Session': {
+        'total_sessions': "1",
+        'attended_sessions': "CASE WHEN {row}.attendance_status = 'Present' THEN 1 ELSE 0 END",
+    },
+    'Ticket_Details': {
+        'total_tickets': "1",
+        'resolved_tickets': "CASE WHEN {row}.status = 'Resolved' THEN 1 ELSE 0 END",
+    },
+}
+
+# Millisecond timestamp stamped on summary rows and predictions; the same
+# format on both sides so they compare as text
+SUMMARY_NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+# Source columns whose changes affect the summary (drives AFTER UPDATE OF ...)
+SUMMARY_UPDATE_COLUMNS = {
+    'Login_Activity': ['learner_id', 'total_duration', 'login_time'],
+    'Assignment_Details': ['learner_id', 'assignment_status', 'assignment_score'],
+    'Quiz_Details': ['learner_id', 'quiz_status', 'quiz_score'],
+    'Live_Session': ['learner_id', 'attendance_status'],
+    'Ticket_Details': ['learner_id', 'status'],
+}
+
+def _summary_trigger_body(table, row, sign, touch=False):
+    """SQL statements applying one source row (NEW or OLD) to the summary;
+    with touch, the row's updated_at is stamped as well"""
+    assignments = [
+        f"{column} = {column} {sign} {expr.format(row=row)}"
+        for column, expr in SUMMARY_COUNTERS[table].items()
     ]
+    if touch:
+        assignments.append(f"updated_at = {SUMMARY_NOW}")
+    if table == 'Login_Activity':
+        if sign == '+':
+            assignments.append(
+                f"last_login = CASE WHEN last_login IS NULL OR {row}.login_time > last_login "
+                f"THEN {row}.login_time ELSE last_login END"
+            )
+        else:
+            # MAX can't be decremented; re-read it through idx_login_learner_time
+            assignments.append(
+                f"last_login = (SELECT MAX(login_time) FROM Login_Activity WHERE learner_id = {row}.learner_id)"
+            )
+    statements = []
+    if sign == '+':
+        statements.append(f"INSERT OR IGNORE INTO Learner_Activity_Summary (learner_id) VALUES ({row}.learner_id);")
+    statements.append(
+        f"UPDATE Learner_Activity_Summary SET {', '.join(assignments)} WHERE learner_id = {row}.learner_id;"
+    )
+    return "\n        ".join(statements)
+
+def _migration_learner_activity_summary(cursor):
+    # One row per learner with the aggregates /api/learners needs, kept
+    # current by triggers so reads never re-aggregate the activity tables
+    counter_columns = [column for counters in SUMMARY_COUNTERS.values() for column in counters]
+    column_defs = ",\n        ".join(
+        f"{column} {'REAL' if column.endswith('_sum') else 'INTEGER'} NOT NULL DEFAULT 0"
+        for column in counter_columns
+    )
+    cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS Learner_Activity_Summary (
+        learner_id TEXT PRIMARY KEY,
+        {column_defs},
+        last_login DATETIME
+    )
+    """)
     
-    cursor.executemany("INSERT INTO Courses (course_id, course_name) VALUES (?, ?)", courses)
-    conn.commit()
+    # Backfill from the existing activity history
+    subqueries = []
+    select_columns = []
+    for alias, (table, counters) in zip('abcde', SUMMARY_COUNTERS.items()):
+        aggregates = ", ".join(
+            f"SUM({expr.format(row=table)}) AS {column}" for column, expr in counters.items()
+        )
+        if table == 'Login_Activity':
+            aggregates += ", MAX(login_time) AS last_login"
+        subqueries.append(
+            f"LEFT JOIN (SELECT learner_id, {aggregates} FROM {table} GROUP BY learner_id) {alias} "
+            f"ON l.learner_id = {alias}.learner_id"
+        )
+        select_columns.extend(f"COALESCE({alias}.{column}, 0)" for column in counters)
+    cursor.execute(f"""
+    INSERT OR REPLACE INTO Learner_Activity_Summary (learner_id, {', '.join(counter_columns)}, last_login)
+    SELECT l.learner_id, {', '.join(select_columns)}, a.last_login
+    FROM Learners l
+    {' '.join(subqueries)}
+    """)
     
-    # 2. Cohorts
-    print("Generating Cohorts data...")
-    cohorts = []
-    cohort_ids = set()  # To track unique cohort IDs
-    
-    for i in range(20):  # Reduced number of cohorts
-        while True:
-            cohort_id = f"C{random.randint(100, 999)}"
-            if cohort_id not in cohort_ids:
-                cohort_ids.add(cohort_id)
-                break
-                
-        course_id = random.choice(courses)[0]
-        start_date = random_date(datetime(2024, 1, 1), datetime(2025, 12, 31))
-        cohorts.append((cohort_id, course_id, start_date.strftime("%Y-%m-%d")))
-    
-    cursor.executemany("INSERT INTO Cohorts (cohort_id, course_id, start_date) VALUES (?, ?, ?)", cohorts)
-    conn.commit()
+    # Learners get a zeroed row on creation and lose it on deletion
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_learners_summary_ins AFTER INSERT ON Learners
+    BEGIN
+        INSERT OR IGNORE INTO Learner_Activity_Summary (learner_id) VALUES (NEW.learner_id);
+    END
+    """)
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_learners_summary_del AFTER DELETE ON Learners
+    BEGIN
+        DELETE FROM Learner_Activity_Summary WHERE learner_id = OLD.learner_id;
+    END
+    """)
     
-    # 3. Learners
-    print("Generating Learners data...")
-    learners = []
-    learner_ids = set()  # To track unique learner IDs
-
-    first_names = ["Akshit", "Omkar", "Mohammed", "Janhvi", "Rohit", "Sneha", "Karan", "Ananya", "Vikas", "Pooja",
-                  "Rahul", "Priya", "Amit", "Neha", "Sanjay", "Divya", "Vishal", "Meera", "Raj", "Sunita"]
-    last_names = ["Sharma", "Patil", "Khan", "Mehta", "Verma", "Gupta", "Joshi", "Roy", "Nair", "Iyer",
-                 "Singh", "Kumar", "Patel", "Shah", "Reddy", "Malhotra", "Chopra", "Agarwal", "Bose", "Rao"]
-    countries = ["India", "USA", "UK", "Canada", "Australia", "Germany", "France", "Japan", "Singapore", "Brazil"]
-    timezones = ["IST (+5:30)", "PST (-8:00)", "EST (-5:00)", "GMT (+0:00)", "CET (+1:00)", "AEST (+10:00)"]
-    statuses = ["On track", "At Risk", "Will Drop off"]
-
-    # Generate unique learner IDs first
-    for i in range(500):
-        while True:
-            learner_id = f"L{random.randint(1000, 9999)}"
-            if learner_id not in learner_ids:
-                learner_ids.add(learner_id)
-                break
-
-    # Now create learners with the pre-generated unique IDs
-    for learner_id in learner_ids:
-        cohort_id = random.choice(cohorts)[0] if cohorts else "C001"
-        first_name = random.choice(first_names)
-        last_name = random.choice(last_names)
-        name = f"{first_name} {last_name}"
-        email = random_email(name)
-        contact = random_phone()
-        country_region = random.choice(countries)
-        timezone = random.choice(timezones)
-        work_ex = random.randint(0, 20)
-        status = random.choice(statuses)
-        total_engagement_score = round(random.uniform(0, 100), 2)
-        
-        learners.append((learner_id, cohort_id, name, email, contact, country_region, timezone, work_ex, status, total_engagement_score))
+    # Activity rows add, remove or move their contribution incrementally
+    _create_summary_triggers(cursor)
 
-    # Moved executemany OUTSIDE the loop
-    cursor.executemany("INSERT INTO Learners (learner_id, cohort_id, name, email, contact, country_region, timezone, work_ex, status, total_engagement_score) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", learners)
-    conn.commit()
+def _create_summary_triggers(cursor, touch=False):
+    for table in SUMMARY_COUNTERS:
+        prefix = f"trg_{table.lower()}_summary"
+        cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS {prefix}_ins AFTER INSERT ON {table}
+    BEGIN
+        {_summary_trigger_body(table, 'NEW', '+', touch)}
+    END
+    """)
+        cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS {prefix}_del AFTER DELETE ON {table}
+    BEGIN
+        {_summary_trigger_body(table, 'OLD', '-', touch)}
+    END
+    """)
+        cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS {prefix}_upd AFTER UPDATE OF {', '.join(SUMMARY_UPDATE_COLUMNS[table])} ON {table}
+    BEGIN
+        {_summary_trigger_body(table, 'OLD', '-', touch)}
+        {_summary_trigger_body(table, 'NEW', '+', touch)}
+    END
+    """)
+
+def _migration_learner_keyset_indexes(cursor):
+    # /api/learners pages with (sort key, learner_id) keysets; these indexes
+    # match the LEARNER_SORTS expressions in app.py so each page is a range scan
+    cursor.execute("DROP INDEX IF EXISTS idx_learners_name")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_learners_name_id ON Learners(name, learner_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_learners_score_id ON Learners(COALESCE(total_engagement_score, 0), learner_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_summary_last_login ON Learner_Activity_Summary(COALESCE(last_login, ''), learner_id)")
+
+# Tables whose writes bump their counter in Table_Versions. Caches compare
+# these counters to decide whether a stored result is still current.
+VERSIONED_TABLES = ['Users', 'Courses', 'Cohorts', 'Learners', 'Login_Activity', 'Assignment_Details',
+                    'Quiz_Details', 'Live_Session', 'Ticket_Details', 'Nudge_Logs']
+
+def _migration_table_versions(cursor):
+    # One change counter per table, bumped by row triggers on every write
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS Table_Versions (
+        table_name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0
+    )
+    """)
+    cursor.executemany("INSERT OR IGNORE INTO Table_Versions (table_name) VALUES (?)",
+                       [(table,) for table in VERSIONED_TABLES])
+    for table in VERSIONED_TABLES:
+        for event, suffix in [('INSERT', 'ins'), ('UPDATE', 'upd'), ('DELETE', 'del')]:
+            cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS trg_{table.lower()}_version_{suffix} AFTER {event} ON {table}
+    BEGIN
+        UPDATE Table_Versions SET version = version + 1 WHERE table_name = '{table}';
+    END
+    """)
+
+def _migration_summary_updated_at(cursor):
+    # Stamp summary rows when their activity changes so re-scoring only
+    # visits learners whose activity is newer than their prediction_timestamp
+    cursor.execute("PRAGMA table_info(Learner_Activity_Summary)")
+    if 'updated_at' not in [col[1] for col in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE Learner_Activity_Summary ADD COLUMN updated_at TEXT")
+    for table in SUMMARY_COUNTERS:
+        for suffix in ('ins', 'del', 'upd'):
+            cursor.execute(f"DROP TRIGGER IF EXISTS trg_{table.lower()}_summary_{suffix}")
+    _create_summary_triggers(cursor, touch=True)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_summary_updated_at ON Learner_Activity_Summary(updated_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_learners_prediction_ts ON Learners(prediction_timestamp)")
+
+def _migration_feature_store(cursor):
+    # Versioned per-learner feature arrays written by engagement_predictor.FeatureStore.
+    # Each build is a new version; features is the row's little-endian float64
+    # values in the order of that version's feature_names (a JSON list)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS Feature_Store_Versions (
+        version INTEGER PRIMARY KEY,
+        feature_names TEXT NOT NULL,
+        as_of TEXT NOT NULL,
+        built_at TEXT NOT NULL,
+        learners INTEGER NOT NULL
+    )
+    """)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS Learner_Features (
+        version INTEGER NOT NULL,
+        learner_id TEXT NOT NULL,
+        features BLOB NOT NULL,
+        PRIMARY KEY (version, learner_id)
+    ) WITHOUT ROWID
+    """)
+
+# Login rollups by time bucket. Each maps a rollup table to its bucket column
+# and expression over a Login_Activity row ({row}), the predicate matching
+# the learner's other logins in the same bucket (for active_learners), and
+# whether it is also kept per cohort and carries score_sum (the sum over
+# logins of the learner's total_engagement_score). Logins are attributed
+# to the learner's current course and cohort; moving a learner to another
+# cohort moves their logins' contributions with them.
+LOGIN_ROLLUPS = {
+    'Login_Rollup_Daily': {
+        'bucket': ('day', "date({row}.login_time)"),
+        'same_bucket': "login_time >= date({row}.login_time) AND login_time < date({row}.login_time, '+1 day')",
+        'cohort': True,
+        'score': False,
+    },
+    'Login_Rollup_Monthly': {
+        'bucket': ('month', "strftime('%Y-%m', {row}.login_time)"),
+        'same_bucket': ("login_time >= date({row}.login_time, 'start of month') "
+                        "AND login_time < date({row}.login_time, 'start of month', '+1 month')"),
+        'cohort': False,
+        'score': True,
+    },
+    'Login_Rollup_Weekday': {
+        'bucket': ('weekday', "CAST(strftime('%w', {row}.login_time) AS INTEGER)"),
+        'same_bucket': "strftime('%w', login_time) = strftime('%w', {row}.login_time)",
+        'cohort': False,
+        'score': False,
+    },
+}
+
+_ROLLUP_COURSE = ("COALESCE((SELECT co.course_id FROM Learners l JOIN Cohorts co ON l.cohort_id = co.cohort_id "
+                  "WHERE l.learner_id = {row}.learner_id), '')")
+_ROLLUP_COHORT = "COALESCE((SELECT cohort_id FROM Learners WHERE learner_id = {row}.learner_id), '')"
+_ROLLUP_SCORE = "COALESCE((SELECT total_engagement_score FROM Learners WHERE learner_id = {row}.learner_id), 0)"
+# Course of a Learners row ({row}) by its own cohort_id, for OLD and NEW in Learners triggers
+_ROLLUP_LEARNER_COURSE = "COALESCE((SELECT course_id FROM Cohorts WHERE cohort_id = {row}.cohort_id), '')"
+
+def _rollup_keys(spec, row):
+    """[(column, expression)] identifying the rollup row for a login row"""
+    bucket_column, bucket_expr = spec['bucket']
+    keys = [(bucket_column, bucket_expr.format(row=row)), ('course_id', _ROLLUP_COURSE.format(row=row))]
+    if spec['cohort']:
+        keys.append(('cohort_id', _ROLLUP_COHORT.format(row=row)))
+    return keys
+
+def _rollup_trigger_body(table, spec, row, sign, upsert=False):
+    """SQL statements applying one login row (NEW or OLD) to a rollup.
     
-    # 4. Login_Activity
-    print("Generating Login_Activity data...")
-    login_activities = []
-    login_ids = set()  # To track unique login IDs
-    
-    for i in range(500):
-        while True:
-            login_id = f"LA{random.randint(1000, 9999)}"  # Increased range to avoid duplicates
-            if login_id not in login_ids:
-                login_ids.add(login_id)
-                break
-                
-        learner = random.choice(learners)
-        learner_id = learner[0]
-        name = learner[2]
-        email = learner[3]
-        password = "hashedpwd"  # Placeholder for hashed password
+    With upsert, a login is added by one INSERT ... ON CONFLICT DO UPDATE,
+    so the key subqueries are evaluated once instead of again in the
+    UPDATE's WHERE.
+    """
+    keys = _rollup_keys(spec, row)
+    match = ' AND '.join(f"{column} = {expr}" for column, expr in keys)
+    # The learner enters or leaves the bucket only if no other login of theirs is in it
+    first_in_bucket = (f"NOT EXISTS (SELECT 1 FROM Login_Activity WHERE learner_id = {row}.learner_id "
+                       f"AND rowid != {row}.rowid AND {spec['same_bucket'].format(row=row)})")
+    assignments = [
+        f"logins = logins {sign} 1",
+        f"hours = hours {sign} COALESCE({row}.total_duration, 0) / 3600.0",
+        f"active_learners = active_learners {sign} {first_in_bucket}",
+    ]
+    if spec['score']:
+        assignments.append(f"score_sum = score_sum {sign} {_ROLLUP_SCORE.format(row=row)}")
+    if sign == '+' and upsert:
+        columns = [column for column, _ in keys] + ['logins', 'hours', 'active_learners']
+        values = [expr for _, expr in keys] + ['1', f"COALESCE({row}.total_duration, 0) / 3600.0", '1']
+        updates = ["logins = logins + 1", "hours = hours + excluded.hours",
+                   f"active_learners = active_learners + {first_in_bucket}"]
+        if spec['score']:
+            columns.append('score_sum')
+            values.append(_ROLLUP_SCORE.format(row=row))
+            updates.append("score_sum = score_sum + excluded.score_sum")
+        return (f"INSERT INTO {table} ({', '.join(columns)}) "
+                f"SELECT {', '.join(values)} WHERE {row}.login_time IS NOT NULL "
+                f"ON CONFLICT ({', '.join(column for column, _ in keys)}) DO UPDATE SET {', '.join(updates)};")
+    statements = []
+    if sign == '+':
+        statements.append(
+            f"INSERT OR IGNORE INTO {table} ({', '.join(column for column, _ in keys)}) "
+            f"SELECT {', '.join(expr for _, expr in keys)} WHERE {row}.login_time IS NOT NULL;"
+        )
+    statements.append(f"UPDATE {table} SET {', '.join(assignments)} WHERE {match};")
+    if sign == '-':
+        statements.append(f"DELETE FROM {table} WHERE {match} AND logins = 0;")
+    return "\n        ".join(statements)
+
+def _backfill_login_rollup(cursor, table, spec):
+    """Rebuild a rollup table from the existing login history"""
+    bucket_column, bucket_expr = spec['bucket']
+    key_columns = [bucket_column, 'course_id'] + (['cohort_id'] if spec['cohort'] else [])
+    key_exprs = [bucket_expr.format(row='la'), "COALESCE(co.course_id, '')"]
+    if spec['cohort']:
+        key_exprs.append("COALESCE(l.cohort_id, '')")
+    score_column = ", score_sum" if spec['score'] else ""
+    score_expr = ", SUM(COALESCE(l.total_engagement_score, 0))" if spec['score'] else ""
+    cursor.execute(f"DELETE FROM {table}")
+    cursor.execute(f"""
+    INSERT INTO {table} ({', '.join(key_columns)}, logins, hours, active_learners{score_column})
+    SELECT {', '.join(key_exprs)}, COUNT(*), SUM(COALESCE(la.total_duration, 0)) / 3600.0,
+           COUNT(DISTINCT la.learner_id){score_expr}
+    FROM Login_Activity la
+    LEFT JOIN Learners l ON la.learner_id = l.learner_id
+    LEFT JOIN Cohorts co ON l.cohort_id = co.cohort_id
+    WHERE la.login_time IS NOT NULL
+    GROUP BY {', '.join(str(i + 1) for i in range(len(key_columns)))}
+    """)
+
+def _create_rollup_score_trigger(cursor, table, spec):
+    # Re-scoring a learner moves their score in every bucket they logged in.
+    # A re-score that also changes the learner's course is applied by the
+    # cohort move trigger instead.
+    bucket_column, bucket_expr = spec['bucket']
+    cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS trg_learners_{table.lower()}_score
+    AFTER UPDATE OF total_engagement_score ON Learners
+    WHEN COALESCE(NEW.total_engagement_score, 0) != COALESCE(OLD.total_engagement_score, 0)
+     AND {_ROLLUP_LEARNER_COURSE.format(row='NEW')} = {_ROLLUP_LEARNER_COURSE.format(row='OLD')}
+    BEGIN
+        UPDATE {table}
+        SET score_sum = score_sum + (COALESCE(NEW.total_engagement_score, 0) - COALESCE(OLD.total_engagement_score, 0)) *
+            (SELECT COUNT(*) FROM Login_Activity la
+             WHERE la.learner_id = NEW.learner_id AND {bucket_expr.format(row='la')} = {table}.{bucket_column})
+        WHERE course_id = {_ROLLUP_COURSE.format(row='NEW')}
+          AND {bucket_column} IN (SELECT {bucket_expr.format(row='la')} FROM Login_Activity la
+                                  WHERE la.learner_id = NEW.learner_id AND la.login_time IS NOT NULL);
+    END
+    """)
+
+def _rollup_move_statements(table, spec, row, sign):
+    """SQL statements adding (+) or removing (-) all of a learner's logins at the
+    rollup key given by a Learners row (NEW or OLD)"""
+    bucket_column, bucket_expr = spec['bucket']
+    keys = [('course_id', _ROLLUP_LEARNER_COURSE.format(row=row))]
+    if spec['cohort']:
+        keys.append(('cohort_id', f"COALESCE({row}.cohort_id, '')"))
+    match = ' AND '.join(f"{column} = {expr}" for column, expr in keys)
+    logins = f"FROM Login_Activity la WHERE la.learner_id = {row}.learner_id AND la.login_time IS NOT NULL"
+    in_bucket = f"{logins} AND {bucket_expr.format(row='la')} = {table}.{bucket_column}"
+    # Every login of the learner is at this key, so they are active in each of its buckets
+    assignments = [
+        f"logins = logins {sign} (SELECT COUNT(*) {in_bucket})",
+        f"hours = hours {sign} (SELECT SUM(COALESCE(la.total_duration, 0)) {in_bucket}) / 3600.0",
+        f"active_learners = active_learners {sign} 1",
+    ]
+    if spec['score']:
+        assignments.append(f"score_sum = score_sum {sign} COALESCE({row}.total_engagement_score, 0) * "
+                           f"(SELECT COUNT(*) {in_bucket})")
+    statements = []
+    if sign == '+':
+        statements.append(
+            f"INSERT OR IGNORE INTO {table} ({bucket_column}, {', '.join(column for column, _ in keys)}) "
+            f"SELECT DISTINCT {bucket_expr.format(row='la')}, {', '.join(expr for _, expr in keys)} {logins};"
+        )
+    statements.append(f"UPDATE {table} SET {', '.join(assignments)} "
+                      f"WHERE {match} AND {bucket_column} IN (SELECT {bucket_expr.format(row='la')} {logins});")
+    if sign == '-':
+        statements.append(f"DELETE FROM {table} WHERE {match} AND logins = 0;")
+    return "\n        ".join(statements)
+
+def _create_rollup_triggers(cursor, table, spec, upsert=False):
+    """Triggers applying Login_Activity writes to a rollup (see _rollup_trigger_body)"""
+    prefix = f"trg_login_activity_{table.lower()}"
+    cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS {prefix}_ins AFTER INSERT ON Login_Activity
+    BEGIN
+        {_rollup_trigger_body(table, spec, 'NEW', '+', upsert)}
+    END
+    """)
+    cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS {prefix}_del AFTER DELETE ON Login_Activity
+    BEGIN
+        {_rollup_trigger_body(table, spec, 'OLD', '-')}
+    END
+    """)
+    cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS {prefix}_upd AFTER UPDATE OF learner_id, login_time, total_duration ON Login_Activity
+    BEGIN
+        {_rollup_trigger_body(table, spec, 'OLD', '-')}
+        {_rollup_trigger_body(table, spec, 'NEW', '+', upsert)}
+    END
+    """)
+
+def _migration_login_rollups(cursor):
+    # Trend endpoints sum these few hundred rows instead of bucketing every login
+    for table, spec in LOGIN_ROLLUPS.items():
+        bucket_column = spec['bucket'][0]
+        key_columns = [bucket_column, 'course_id'] + (['cohort_id'] if spec['cohort'] else [])
+        key_defs = ',\n        '.join(
+            f"{column} {'INTEGER' if column == 'weekday' else 'TEXT'} NOT NULL" for column in key_columns
+        )
+        score_def = "score_sum REAL NOT NULL DEFAULT 0,\n        " if spec['score'] else ""
+        cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS {table} (
+        {key_defs},
+        logins INTEGER NOT NULL DEFAULT 0,
+        hours REAL NOT NULL DEFAULT 0,
+        active_learners INTEGER NOT NULL DEFAULT 0,
+        {score_def}PRIMARY KEY ({', '.join(key_columns)})
+    ) WITHOUT ROWID
+    """)
         
-        login_date = random_date(datetime(2025, 1, 1), datetime(2025, 12, 31))
-        login_time = random_datetime(login_date.replace(hour=6, minute=0), login_date.replace(hour=12, minute=0))
-        logout_time = login_time + timedelta(hours=random.randint(1, 8))
-        total_duration = int((logout_time - login_time).total_seconds() / 60)  # in minutes
+        _backfill_login_rollup(cursor, table, spec)
+        _create_rollup_triggers(cursor, table, spec)
         
-        login_activities.append((login_id, learner_id, name, email, password, 
-                               login_time.strftime("%Y-%m-%d %H:%M:%S"), 
-                               logout_time.strftime("%Y-%m-%d %H:%M:%S"), 
-                               total_duration))
-    
-    cursor.executemany("INSERT INTO Login_Activity (login_id, learner_id, name, email, password, login_time, logout_time, total_duration) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", login_activities)
-    conn.commit()
+        if spec['score']:
+            _create_rollup_score_trigger(cursor, table, spec)
+
+# TEXT timestamp columns mirrored as integer Unix epochs (<column>_epoch) so
+# recency sorts and date ranges are plain index scans. Triggers keep the
+# mirrors in step with the text columns, which stay the display format.
+EPOCH_COLUMNS = {
+    'Login_Activity': ['login_time'],
+    'Assignment_Details': ['submitted_at'],
+    'Quiz_Details': ['attempted_at'],
+    'Ticket_Details': ['created_at', 'resolved_at'],
+    'Nudge_Logs': ['timestamp'],
+    'Learner_Activity_Summary': ['last_login'],
+}
+EPOCH_BACKFILL_BATCH = 50000
+
+def _epoch_assignments(columns, row):
+    return ', '.join(f"{column}_epoch = CAST(strftime('%s', {row}.{column}) AS INTEGER)" for column in columns)
+
+def _create_epoch_triggers(cursor, table, columns, guarded=False):
+    """Triggers keeping a table's <column>_epoch mirrors in sync.
     
-    # 5. Assignment_Details
-    print("Generating Assignment_Details data...")
-    assignments = []
-    assignment_ids = set()  # To track unique assignment IDs
-    
-    statuses = ["Submitted", "Pending", "Graded", "Late"]
-    
-    for i in range(500):
-        while True:
-            assignment_id = f"A{random.randint(1000, 9999)}"  # Increased range to avoid duplicates
-            if assignment_id not in assignment_ids:
-                assignment_ids.add(assignment_id)
-                break
-                
-        learner = random.choice(learners)
-        learner_id = learner[0]
-        course_id = random.choice(courses)[0]
-        cohort_id = learner[1]
-        assignment_status = random.choice(statuses)
-        assignment_score = round(random.uniform(0, 100), 2) if assignment_status in ["Submitted", "Graded"] else None
-        submitted_at = random_datetime(datetime(2025, 1, 1), datetime(2025, 12, 31)) if assignment_status != "Pending" else None
-        normalized_score = round(assignment_score / 100, 2) if assignment_score is not None else None
+    With guarded, rows written with correct epochs already (as
+    events.ingest_events does) are not rewritten, which also spares the
+    UPDATE triggers the rewrite would fire.
+    """
+    prefix = f"trg_{table.lower()}_epoch"
+    when = ""
+    if guarded:
+        stale = ' OR '.join(f"NEW.{column}_epoch IS NOT CAST(strftime('%s', NEW.{column}) AS INTEGER)"
+                            for column in columns)
+        when = f"WHEN {stale}"
+    cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS {prefix}_ins AFTER INSERT ON {table} {when}
+    BEGIN
+        UPDATE {table} SET {_epoch_assignments(columns, 'NEW')} WHERE rowid = NEW.rowid;
+    END
+    """)
+    cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS {prefix}_upd AFTER UPDATE OF {', '.join(columns)} ON {table} {when}
+    BEGIN
+        UPDATE {table} SET {_epoch_assignments(columns, 'NEW')} WHERE rowid = NEW.rowid;
+    END
+    """)
+
+def _migration_epoch_columns(cursor):
+    for table, columns in EPOCH_COLUMNS.items():
+        cursor.execute(f"PRAGMA table_info({table})")
+        existing = [col[1] for col in cursor.fetchall()]
+        for column in columns:
+            if f"{column}_epoch" not in existing:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column}_epoch INTEGER")
         
-        assignments.append((assignment_id, learner_id, course_id, cohort_id, assignment_status, 
-                          assignment_score, 
-                          submitted_at.strftime("%Y-%m-%d %H:%M:%S") if submitted_at else None, 
-                          normalized_score))
-    
-    cursor.executemany("INSERT INTO Assignment_Details (assignment_id, learner_id, course_id, cohort_id, assignment_status, assignment_score, submitted_at, normalized_score) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", assignments)
-    conn.commit()
-    
-    # 6. Quiz_Details
-    print("Generating Quiz_Details data...")
-    quizzes = []
-    quiz_ids = set()  # To track unique quiz IDs
-    
-    statuses = ["Attempted", "Pending", "Completed", "Not Started"]
-    
-    for i in range(500):
-        while True:
-            quiz_id = f"Q{random.randint(1000, 9999)}"  # Increased range to avoid duplicates
-            if quiz_id not in quiz_ids:
-                quiz_ids.add(quiz_id)
-                break
-                
-        learner = random.choice(learners)
-        learner_id = learner[0]
-        course_id = random.choice(courses)[0]
-        cohort_id = learner[1]
-        quiz_status = random.choice(statuses)
-        quiz_score = round(random.uniform(0, 100), 2) if quiz_status == "Attempted" else None
-        attempted_at = random_datetime(datetime(2025, 1, 1), datetime(2025, 12, 31)) if quiz_status == "Attempted" else None
-        normalized_score = round(quiz_score / 100, 2) if quiz_score is not None else None
+        # Backfill in rowid ranges so each UPDATE touches a bounded number of rows
+        max_rowid = cursor.execute(f"SELECT MAX(rowid) FROM {table}").fetchone()[0] or 0
+        for start in range(0, max_rowid + 1, EPOCH_BACKFILL_BATCH):
+            cursor.execute(
+                f"UPDATE {table} SET {_epoch_assignments(columns, table)} WHERE rowid BETWEEN ? AND ?",
+                (start, start + EPOCH_BACKFILL_BATCH - 1)
+            )
         
-        quizzes.append((quiz_id, learner_id, course_id, cohort_id, quiz_status, quiz_score, 
-                       attempted_at.strftime("%Y-%m-%d %H:%M:%S") if attempted_at else None, 
-                       normalized_score))
+        _create_epoch_triggers(cursor, table, columns)
     
-    cursor.executemany("INSERT INTO Quiz_Details (quiz_id, learner_id, course_id, cohort_id, quiz_status, quiz_score, attempted_at, normalized_score) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", quizzes)
-    conn.commit()
+    # Recency sorts and ranges move from the text columns to the epochs
+    for index in ['idx_nudge_learner_time', 'idx_nudge_timestamp', 'idx_ticket_created', 'idx_summary_last_login']:
+        cursor.execute(f"DROP INDEX IF EXISTS {index}")
+    indexes = {
+        'idx_login_learner_epoch': "Login_Activity(learner_id, login_time_epoch)",
+        'idx_assignment_learner_epoch': "Assignment_Details(learner_id, submitted_at_epoch)",
+        'idx_quiz_learner_epoch': "Quiz_Details(learner_id, attempted_at_epoch)",
+        'idx_ticket_created_epoch': "Ticket_Details(created_at_epoch)",
+        'idx_nudge_learner_epoch': "Nudge_Logs(learner_id, timestamp_epoch)",
+        'idx_nudge_epoch': "Nudge_Logs(timestamp_epoch)",
+        'idx_summary_last_login_epoch': "Learner_Activity_Summary(COALESCE(last_login_epoch, 0), learner_id)",
+    }
+    for index, definition in indexes.items():
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {index} ON {definition}")
+        cursor.execute(f"ANALYZE {index}")
+
+# Tables whose rows belong to one learner (by learner_id). A write to any of
+# them bumps that learner's counter in Learner_Versions, so per-learner caches
+# can be validated without being dropped by other learners' activity.
+LEARNER_VERSIONED_TABLES = ['Learners', 'Login_Activity', 'Assignment_Details', 'Quiz_Details',
+                            'Live_Session', 'Ticket_Details', 'Nudge_Logs']
+
+def _learner_version_bump(row):
+    return (f"INSERT INTO Learner_Versions (learner_id) SELECT {row}.learner_id WHERE {row}.learner_id IS NOT NULL "
+            f"ON CONFLICT (learner_id) DO UPDATE SET version = version + 1;")
+
+def _migration_learner_versions(cursor):
+    # Learners without a row are at version 0
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS Learner_Versions (
+        learner_id TEXT PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 1
+    ) WITHOUT ROWID
+    """)
+    for table in LEARNER_VERSIONED_TABLES:
+        prefix = f"trg_{table.lower()}_learner_version"
+        cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS {prefix}_ins AFTER INSERT ON {table}
+    BEGIN
+        {_learner_version_bump('NEW')}
+    END
+    """)
+        cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS {prefix}_del AFTER DELETE ON {table}
+    BEGIN
+        {_learner_version_bump('OLD')}
+    END
+    """)
+        # A row moved to another learner changes both of them
+        cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS {prefix}_upd AFTER UPDATE ON {table}
+    BEGIN
+        {_learner_version_bump('NEW')}
+        INSERT INTO Learner_Versions (learner_id) SELECT OLD.learner_id
+        WHERE OLD.learner_id IS NOT NULL AND OLD.learner_id IS NOT NEW.learner_id
+        ON CONFLICT (learner_id) DO UPDATE SET version = version + 1;
+    END
+    """)
+
+def _migration_learner_history_indexes(cursor):
+    # Learner history pages are keysets on (sort key, id) within one learner,
+    # newest first; these match LEARNER_HISTORY in app.py so each page is a
+    # range scan of the learner's slice
+    for index in ['idx_login_learner_epoch', 'idx_assignment_learner_epoch', 'idx_quiz_learner_epoch',
+                  'idx_nudge_learner_epoch']:
+        cursor.execute(f"DROP INDEX IF EXISTS {index}")
+    indexes = {
+        'idx_login_learner_history': "Login_Activity(learner_id, COALESCE(login_time_epoch, 0), login_id)",
+        'idx_assignment_learner_history': "Assignment_Details(learner_id, COALESCE(submitted_at_epoch, 0), assignment_id)",
+        'idx_quiz_learner_history': "Quiz_Details(learner_id, COALESCE(attempted_at_epoch, 0), quiz_id)",
+        'idx_session_learner_history': "Live_Session(learner_id, session_id)",
+        'idx_nudge_learner_history': "Nudge_Logs(learner_id, COALESCE(timestamp_epoch, 0), nudge_id)",
+        'idx_ticket_learner_history': "Ticket_Details(learner_id, COALESCE(created_at_epoch, 0), ticket_id)",
+    }
+    for index, definition in indexes.items():
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {index} ON {definition}")
+        cursor.execute(f"ANALYZE {index}")
+
+def _migration_ingested_events(cursor):
+    # Idempotency keys of events accepted by events.ingest_events; a retried
+    # event whose key is here is skipped. received_at is an epoch so keys
+    # past their retention window are pruned with a range delete
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Ingested_Events (
+            event_id TEXT PRIMARY KEY,
+            event_type TEXT NOT NULL,
+            received_at INTEGER NOT NULL
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_ingested_events_received ON Ingested_Events(received_at)")
+
+def _migration_epoch_trigger_guards(cursor):
+    for table, columns in EPOCH_COLUMNS.items():
+        prefix = f"trg_{table.lower()}_epoch"
+        cursor.execute(f"DROP TRIGGER IF EXISTS {prefix}_ins")
+        cursor.execute(f"DROP TRIGGER IF EXISTS {prefix}_upd")
+        _create_epoch_triggers(cursor, table, columns, guarded=True)
+
+def _migration_rollup_cohort_moves(cursor):
+    # The rollups attribute logins to the learner's current cohort and course.
+    # When a learner changes cohort, their logins move to the new rollup
+    # keys, so later deletes and edits subtract from the right rows.
+    for table, spec in LOGIN_ROLLUPS.items():
+        moved = [f"{_ROLLUP_LEARNER_COURSE.format(row='NEW')} != {_ROLLUP_LEARNER_COURSE.format(row='OLD')}"]
+        if spec['cohort']:
+            moved.append("COALESCE(NEW.cohort_id, '') != COALESCE(OLD.cohort_id, '')")
+        cursor.execute(f"DROP TRIGGER IF EXISTS trg_learners_{table.lower()}_score")
+        if spec['score']:
+            _create_rollup_score_trigger(cursor, table, spec)
+        cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS trg_learners_{table.lower()}_move
+    AFTER UPDATE OF cohort_id ON Learners
+    WHEN {' OR '.join(moved)}
+    BEGIN
+        {_rollup_move_statements(table, spec, 'OLD', '-')}
+        {_rollup_move_statements(table, spec, 'NEW', '+')}
+    END
+    """)
+        # Rollups of learners moved before this trigger existed were left at their old keys
+        _backfill_login_rollup(cursor, table, spec)
+
+def _migration_feed_keyset_indexes(cursor):
+    # /api/tickets and /api/interventions pages are keysets on (sort key, id),
+    # newest first; these match FEEDS in app.py so a page is an index range
+    indexes = {
+        'idx_ticket_feed': "Ticket_Details(COALESCE(created_at_epoch, 0), ticket_id)",
+        'idx_nudge_feed': "Nudge_Logs(COALESCE(timestamp_epoch, 0), nudge_id)",
+    }
+    for index, definition in indexes.items():
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {index} ON {definition}")
+        cursor.execute(f"ANALYZE {index}")
+
+def _migration_rollup_upserts(cursor):
+    # Each login added to a rollup is one upsert instead of an INSERT OR
+    # IGNORE plus an UPDATE, so ingesting logins runs half the statements
+    for table, spec in LOGIN_ROLLUPS.items():
+        prefix = f"trg_login_activity_{table.lower()}"
+        cursor.execute(f"DROP TRIGGER IF EXISTS {prefix}_ins")
+        cursor.execute(f"DROP TRIGGER IF EXISTS {prefix}_upd")
+        _create_rollup_triggers(cursor, table, spec, upsert=True)
+
+class TableVersions:
+    """Reads the Table_Versions counters for cache validation.
     
-    # 7. Live_Session
-    print("Generating Live_Session data...")
-    live_sessions = []
-    session_ids = set()  # To track unique session IDs
-    
-    statuses = ["Present", "Absent", "Late", "Left Early"]
-    
-    for i in range(500):
-        while True:
-            session_id = f"S{random.randint(1000, 9999)}"  # Increased range to avoid duplicates
-            if session_id not in session_ids:
-                session_ids.add(session_id)
-                break
-                
-        course_id = random.choice(courses)[0]
-        cohort_id = random.choice(cohorts)[0] if cohorts else "C001"
-        learner = random.choice(learners)
-        learner_id = learner[0]
-        attendance_status = random.choice(statuses)
-        
-        live_sessions.append((session_id, course_id, cohort_id, learner_id, attendance_status))
+    A dedicated connection is kept for this: its PRAGMA data_version only
+    changes when another connection commits, so the counters are re-read
+    only after a write and most checks cost a single pragma.
+    """
     
-    cursor.executemany("INSERT INTO Live_Session (session_id, course_id, cohort_id, learner_id, attendance_status) VALUES (?, ?, ?, ?, ?)", live_sessions)
-    conn.commit()
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._data_version = None
+        self._versions = {}
     
-    # 8. Ticket_Details
-    print("Generating Ticket_Details data...")
-    tickets = []
-    ticket_ids = set()  # To track unique ticket IDs
-    
-    priorities = ["Low", "Medium", "High", "Urgent"]
-    statuses = ["Open", "In Progress", "Resolved", "Closed"]
-    subjects = ["Technical Issue", "Content Clarification", "Assignment Help", "Payment Issue", "Platform Bug"]
-    descriptions = [
-        "Having trouble accessing the learning materials",
-        "Need clarification on module 3 content",
-        "Assignment submission not working",
-        "Payment gateway issue",
-        "Video lectures not loading properly"
-    ]
-    feedback_options = ["Excellent support", "Good response", "Average", "Could be better", "Not helpful"]
-    
-    for i in range(500):
-        while True:
-            ticket_id = f"T{random.randint(1000, 9999)}"  # Increased range to avoid duplicates
-            if ticket_id not in ticket_ids:
-                ticket_ids.add(ticket_id)
-                break
-                
-        learner = random.choice(learners)
-        learner_id = learner[0]
-        subject = random.choice(subjects)
-        description = random.choice(descriptions)
-        priority = random.choice(priorities)
-        status = random.choice(statuses)
-        created_at = random_datetime(datetime(2025, 1, 1), datetime(2025, 12, 31))
-        resolved_at = created_at + timedelta(hours=random.randint(1, 72)) if status in ["Resolved", "Closed"] else None
-        feedback = random.choice(feedback_options) if status in ["Resolved", "Closed"] else None
-        satisfied = random.randint(0, 1) if status in ["Resolved", "Closed"] else None
-        
-        tickets.append((ticket_id, learner_id, subject, description, priority, status,
-                       created_at.strftime("%Y-%m-%d %H:%M:%S"),
-                       resolved_at.strftime("%Y-%m-%d %H:%M:%S") if resolved_at else None,
-                       feedback, satisfied))
+    def snapshot(self, tables=None):
+        """Current counters as a tuple for `tables`, or a dict of all tables"""
+        with self._lock:
+            if self._conn is None:
+                self._conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+            data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if data_version != self._data_version:
+                self._versions = dict(self._conn.execute("SELECT table_name, version FROM Table_Versions"))
+                self._data_version = data_version
+            versions = self._versions
+        if tables is None:
+            return dict(versions)
+        return tuple(versions.get(table, 0) for table in tables)
+
+def get_scope_filter(user, user_courses):
+    """Get (join, where, params) restricting Learners l to the user's courses.
     
-    cursor.executemany("INSERT INTO Ticket_Details (ticket_id, learner_id, subject, description, priority, status, created_at, resolved_at, feedback, satisfied) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", tickets)
-    conn.commit()
+    Cohorts are always joined as co so callers can reference co.course_id.
+    """
+    if user['role'] == 'Super Admin':
+        return "LEFT JOIN Cohorts co ON l.cohort_id = co.cohort_id", "", []
+    placeholders = ','.join('?' * len(user_courses))
+    return (
+        "JOIN Cohorts co ON l.cohort_id = co.cohort_id",
+        f"WHERE co.course_id IN ({placeholders})",
+        list(user_courses)
+    )
+
+# Scope-wide aggregates shared by app.py's dashboard() and api_analytics(). Each
+# activity table is aggregated on its own (its per-learner counters live in
+# Learner_Activity_Summary) and the results are combined with one row per
+# learner, so activity tables are never joined to each other and nothing
+# fans out.
+SCOPE_AGGREGATES = {
+    'total_learners': "COUNT(*)",
+    'total_courses': "COUNT(DISTINCT co.course_id)",
+    'total_cohorts': "COUNT(DISTINCT co.cohort_id)",
+    'total_logins': "COALESCE(SUM(s.total_logins), 0)",
+    'total_login_time': "COALESCE(SUM(s.total_login_time), 0)",
+    'total_assignments': "COALESCE(SUM(s.total_assignments), 0)",
+    'completed_assignments': "COALESCE(SUM(s.completed_assignments), 0)",
+    'avg_assignment_score': "SUM(s.assignment_score_sum) / NULLIF(SUM(s.assignment_score_count), 0)",
+    'total_quizzes': "COALESCE(SUM(s.total_quizzes), 0)",
+    'attempted_quizzes': "COALESCE(SUM(s.attempted_quizzes), 0)",
+    'avg_quiz_score': "SUM(s.quiz_score_sum) / NULLIF(SUM(s.quiz_score_count), 0)",
+    'total_sessions': "COALESCE(SUM(s.total_sessions), 0)",
+    'attended_sessions': "COALESCE(SUM(s.attended_sessions), 0)",
+    'total_tickets': "COALESCE(SUM(s.total_tickets), 0)",
+    'resolved_tickets': "COALESCE(SUM(s.resolved_tickets), 0)",
+}
+
+def build_scope_aggregate_query(user, user_courses, metrics):
+    """Build a single-row aggregate of the given SCOPE_AGGREGATES metrics.
     
-    # 9. Nudge_Logs
-    print("Generating Nudge_Logs data...")
-    nudges = []
-    nudge_ids = set()  # To track unique nudge IDs
-    
-    nudge_types = ["Reminder", "Peer Challenge", "Mentor Connect", "Progress Check", "Resource Share"]
-    channels = ["Email", "WhatsApp", "Slack", "SMS", "In-app"]
-    statuses = ["Sent", "Delivered", "Opened", "Failed", "Read"]
-    
-    for i in range(500):
-        while True:
-            nudge_id = f"N{random.randint(1000, 9999)}"  # Increased range to avoid duplicates
-            if nudge_id not in nudge_ids:
-                nudge_ids.add(nudge_id)
-                break
-                
-        learner = random.choice(learners)
-        learner_id = learner[0]
-        nudge_type = random.choice(nudge_types)
-        message = f"Hi {learner[2]}, this is your {nudge_type.lower()} reminder. Please check your upcoming tasks and deadlines."
-        timestamp = random_datetime(datetime(2025, 1, 1), datetime(2025, 12, 31))
-        channel = random.choice(channels)
-        status = random.choice(statuses)
-        
-        nudges.append((nudge_id, learner_id, nudge_type, message, 
-                      timestamp.strftime("%Y-%m-%d %H:%M:%S"), status, channel))
+    Returns (query, params) covering all learners for Super Admin and the
+    assigned courses for Program Coordinators.
+    """
+    scope_join, scope_where, params = get_scope_filter(user, user_courses)
+    columns = ',\n                '.join(f"{SCOPE_AGGREGATES[metric]} as {metric}" for metric in metrics)
+    query = f"""
+            SELECT 
+                {columns}
+            FROM Learners l
+            {scope_join}
+            LEFT JOIN Learner_Activity_Summary s ON l.learner_id = s.learner_id
+            {scope_where}
+        """
+    return query, params
+
+MIGRATIONS = [
+    (1, 'prediction_timestamp', _migration_prediction_timestamp),
+    (2, 'access_path_indexes', _migration_access_path_indexes),
+    (3, 'learner_activity_summary', _migration_learner_activity_summary),
+    (4, 'learner_keyset_indexes', _migration_learner_keyset_indexes),
+    (5, 'table_versions', _migration_table_versions),
+    (6, 'summary_updated_at', _migration_summary_updated_at),
+    (7, 'feature_store', _migration_feature_store),
+    (8, 'login_rollups', _migration_login_rollups),
+    (9, 'epoch_columns', _migration_epoch_columns),
+    (10, 'learner_versions', _migration_learner_versions),
+    (11, 'learner_history_indexes', _migration_learner_history_indexes),
+    (12, 'ingested_events', _migration_ingested_events),
+    (13, 'epoch_trigger_guards', _migration_epoch_trigger_guards),
+    (14, 'rollup_cohort_moves', _migration_rollup_cohort_moves),
+    # 15 ('engagement_scores') re-scored every learner at startup and was
+    # withdrawn; scores are only rewritten by update_predictions. Databases
+    # that recorded it keep the row, so the next migration is 16.
+    (16, 'feed_keyset_indexes', _migration_feed_keyset_indexes),
+    (17, 'rollup_upserts', _migration_rollup_upserts),
+]
+
+def get_schema_version(cursor):
+    """Return the highest applied migration version (0 for a fresh database)"""
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS Schema_Migrations (
+        version INTEGER PRIMARY KEY,
+        name TEXT,
+        applied_at TEXT
+    )
+    """)
+    cursor.execute("SELECT MAX(version) FROM Schema_Migrations")
+    return cursor.fetchone()[0] or 0
+
+def apply_migrations(conn):
+    """Apply pending migrations in order, one transaction per migration.
     
-    cursor.executemany("INSERT INTO Nudge_Logs (nudge_id, learner_id, nudge_type, message, timestamp, status, channel) VALUES (?, ?, ?, ?, ?, ?, ?)", nudges)
+    Returns the list of (version, name) tuples that were applied.
+    """
+    cursor = conn.cursor()
+    current = get_schema_version(cursor)
     conn.commit()
     
-    # Commit changes and close connection
-    conn.close()
-    print("Data generation completed successfully!")
-    print("\nUser accounts created:")
-    print("Super Admin: username='superadmin', password='admin123' (can view all courses)")
-    print("Program Coordinator 1: username='coordinator1', password='coord1' (can view CR101, CS201)")
-    print("Program Coordinator 2: username='coordinator2', password='coord2' (can view DS301, AI401)")
-    print("Program Coordinator 3: username='coordinator3', password='coord3' (can view ML501, WEB601)")
+    applied = []
+    for version, name, migrate in MIGRATIONS:
+        if version <= current:
+            continue
+        try:
+            # Explicit BEGIN so DDL is part of the transaction as well
+            cursor.execute("BEGIN")
+            migrate(cursor)
+            cursor.execute(
+                "INSERT INTO Schema_Migrations (version, name, applied_at) VALUES (?, ?, ?)",
+                (version, name, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+            )
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        applied.append((version, name))
+    return applied
 
-# Add this to your init_db function
-def init_db():
-    conn = get_db_connection()
+def init_db(db_path):
+    """Create missing tables and bring the schema up to the latest version"""
+    conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
-    
-    # Add prediction timestamp column if it doesn't exist
-    cursor.execute("PRAGMA table_info(Learners)")
-    columns = [col[1] for col in cursor.fetchall()]
-    
-    if 'prediction_timestamp' not in columns:
-        cursor.execute("ALTER TABLE Learners ADD COLUMN prediction_timestamp TEXT")
-    
+    create_tables_if_not_exist(cursor)
     conn.commit()
+    applied = apply_migrations(conn)
     conn.close()
+    return applied
+
 # Usage
 if __name__ == "__main__":
-    db_path = "learnengage.db"  # Replace with your database path
-    generate_random_data(db_path)
+    import argparse
+    parser = argparse.ArgumentParser(description="Generate a LearnEngage AI database filled with synthetic data")
+    parser.add_argument('db_path', nargs='?', default="learnengage.db")
+    parser.add_argument('--scale', type=int, default=1, help=f"multiplier on {BASE_ROWS} rows per table")
+    parser.add_argument('--seed', type=int, default=None, help="RNG seed for reproducible data (random if omitted)")
+    parser.add_argument('--workers', type=int, default=1, help="processes generating rows in parallel")
+    args = parser.parse_args()
+    if args.scale < 1 or args.workers < 1:
+        parser.error("--scale and --workers must be at least 1")
+    generate_random_data(args.db_path, scale=args.scale, seed=args.seed, workers=args.workers)
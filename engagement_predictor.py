@@ -0,0 +1,374 @@
+"""Engagement scoring engine shared by the dashboards and score recomputation.
+
+Scores are computed from per-learner activity features held in
+Learner_Activity_Summary, loaded as one feature matrix and scored in a
+single vectorized pass, and stored in Learners.total_engagement_score.
+Every endpoint bands that stored score (STORED_SCORE) by the same
+THRESHOLDS, so the dashboards, the learner list and the cohort analytics
+always agree. Stored scores only change when update_predictions runs,
+never as a side effect of startup or event ingestion. NumPy is used when
+installed; otherwise the same formulas run in plain Python so the app
+still deploys with Flask alone.
+
+FeatureStore extracts the wider behavioral feature set used for model
+training and inference and persists it as versioned float arrays.
+"""
+import bisect
+import calendar
+import json
+import math
+import os
+import sqlite3
+import struct
+import time
+from datetime import datetime
+
+from db import SUMMARY_NOW
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+class EngagementPredictor:
+    """Scores learners 0-100 from their activity features and bands them by status."""
+
+    # Feature columns, in matrix order, read from Learners l LEFT JOIN Learner_Activity_Summary s
+    FEATURES = {
+        # total_login_time is in minutes
+        'login_hours': "COALESCE(s.total_login_time / 60.0, 0)",
+        'completed_assignments': "COALESCE(s.completed_assignments, 0)",
+        'attempted_quizzes': "COALESCE(s.attempted_quizzes, 0)",
+        'attended_sessions': "COALESCE(s.attended_sessions, 0)",
+    }
+    # Each feature earns its share of WEIGHTS in proportion to how close it
+    # is to its target, so a learner meeting every target scores MAX_SCORE
+    TARGETS = (4.0, 1.0, 1.0, 1.0)
+    WEIGHTS = (55.0, 15.0, 15.0, 15.0)
+    MAX_SCORE = 100.0
+
+    # Lower score bound of each status above the first, ascending
+    THRESHOLDS = (40, 70, 85)
+    STATUSES = ('Will Drop Off', 'At Risk', 'On Track', 'Completed')
+    # The stored score of Learners l as it is displayed and banded everywhere
+    STORED_SCORE = "ROUND(COALESCE(l.total_engagement_score, 0), 1)"
+
+    def feature_query(self, from_sql="FROM Learners l LEFT JOIN Learner_Activity_Summary s ON l.learner_id = s.learner_id",
+                      where_sql=""):
+        """SELECT learner_id plus the feature columns; from_sql must alias Learners l and the summary s"""
+        columns = ', '.join(f"{expr} as {name}" for name, expr in self.FEATURES.items())
+        return f"SELECT l.learner_id, {columns} {from_sql} {where_sql}"
+
+    def load(self, cursor, query, params=()):
+        """Run a feature_query; returns (learner_ids, features) with one row per learner"""
+        cursor.row_factory = None
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+        learner_ids = [row[0] for row in rows]
+        if np is None:
+            return learner_ids, [row[1:] for row in rows]
+        features = np.array([row[1:] for row in rows], dtype=np.float64).reshape(len(rows), len(self.FEATURES))
+        return learner_ids, features
+
+    def load_scores(self, cursor, from_sql="FROM Learners l", where_sql="", params=()):
+        """STORED_SCORE of every learner matched by from_sql (aliasing Learners l) and where_sql"""
+        cursor.row_factory = None
+        cursor.execute(f"SELECT {self.STORED_SCORE} {from_sql} {where_sql}", params)
+        scores = [row[0] for row in cursor.fetchall()]
+        if np is None:
+            return scores
+        return np.array(scores, dtype=np.float64)
+
+    def score(self, features):
+        """Engagement score per feature row, from 0 to MAX_SCORE"""
+        if np is None:
+            return [sum(min(value / target, 1.0) * weight
+                        for value, target, weight in zip(row, self.TARGETS, self.WEIGHTS))
+                    for row in features]
+        progress = np.minimum(features / np.array(self.TARGETS), 1.0)
+        return progress @ np.array(self.WEIGHTS)
+
+    def classify(self, scores):
+        """Index into STATUSES for every score"""
+        if np is None:
+            return [bisect.bisect_right(self.THRESHOLDS, score) for score in scores]
+        return np.searchsorted(np.array(self.THRESHOLDS, dtype=np.float64), scores, side='right')
+
+    def status(self, score):
+        """STATUSES label for a single (already rounded) score"""
+        return self.STATUSES[bisect.bisect_right(self.THRESHOLDS, score or 0)]
+
+    def summarize(self, scores):
+        """{'count', 'avg', 'bands'}; bands[i] is the number of learners in STATUSES[i]"""
+        bands = self.classify(scores)
+        if np is None:
+            counts = [0] * len(self.STATUSES)
+            for band in bands:
+                counts[band] += 1
+            average = sum(scores) / len(scores) if scores else 0
+        else:
+            counts = np.bincount(bands, minlength=len(self.STATUSES)).tolist()
+            average = float(scores.mean()) if len(scores) else 0
+        return {'count': len(scores), 'avg': average, 'bands': counts}
+
+    def rescore(self, conn, learner_ids=None, batch_size=5000, timestamp=None):
+        """Recompute and store total_engagement_score for the given learners (all when None).
+
+        Features are loaded and scored in batches of `batch_size` and written
+        back with executemany, along with prediction_timestamp when a
+        timestamp is given; the caller commits. Returns the learners scored.
+        """
+        cursor = conn.cursor()
+        if learner_ids is None:
+            learner_ids = [row[0] for row in cursor.execute("SELECT learner_id FROM Learners").fetchall()]
+        learner_ids = list(learner_ids)
+        if timestamp is None:
+            # Unchanged scores are not rewritten, which spares their triggers
+            update_sql = ("UPDATE Learners SET total_engagement_score = ?1 "
+                          "WHERE learner_id = ?2 AND total_engagement_score IS NOT ?1")
+        else:
+            update_sql = "UPDATE Learners SET total_engagement_score = ?, prediction_timestamp = ? WHERE learner_id = ?"
+        scored = 0
+        for start in range(0, len(learner_ids), batch_size):
+            batch = learner_ids[start:start + batch_size]
+            placeholders = ','.join('?' * len(batch))
+            ids, features = self.load(cursor, self.feature_query(where_sql=f"WHERE l.learner_id IN ({placeholders})"), batch)
+            scores = [round(float(score), 2) for score in self.score(features)]
+            if timestamp is None:
+                rows = zip(scores, ids)
+            else:
+                rows = ((score, timestamp, learner_id) for score, learner_id in zip(scores, ids))
+            cursor.executemany(update_sql, rows)
+            scored += len(ids)
+        return scored
+
+    def stale_learners(self, cursor):
+        """learner_ids never scored or with activity newer than their prediction_timestamp"""
+        cursor.row_factory = None
+        stale = [row[0] for row in cursor.execute("SELECT learner_id FROM Learners WHERE prediction_timestamp IS NULL")]
+        # Every run stamps the learners it scores with its start time, so the
+        # newest prediction_timestamp is the last run and only summary rows
+        # touched since then (an index range) can be newer than a prediction.
+        # CROSS JOIN keeps the planner on that range instead of scanning Learners.
+        last_run = cursor.execute("SELECT MAX(prediction_timestamp) FROM Learners").fetchone()[0]
+        if last_run is not None:
+            cursor.execute("""
+                SELECT s.learner_id
+                FROM Learner_Activity_Summary s
+                CROSS JOIN Learners l ON l.learner_id = s.learner_id
+                WHERE s.updated_at >= ? AND s.updated_at >= l.prediction_timestamp
+            """, (last_run,))
+            stale.extend(row[0] for row in cursor.fetchall())
+        return stale
+
+    def update_predictions(self, conn, full=False, batch_size=5000):
+        """Re-score stale learners (every learner with full) in one write transaction.
+
+        Returns the number of learners re-scored.
+        """
+        cursor = conn.cursor()
+        # IMMEDIATE holds off writers, so activity committed after the stamp
+        # is newer than it and picked up by the next run
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            timestamp = cursor.execute(f"SELECT {SUMMARY_NOW}").fetchone()[0]
+            learner_ids = None if full else self.stale_learners(cursor)
+            scored = self.rescore(conn, learner_ids, batch_size, timestamp)
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        return scored
+
+predictor = EngagementPredictor()
+
+class FeatureStore:
+    """Per-learner behavioral features, extracted with one grouped pass per
+    source table and stored as versioned float64 arrays in Learner_Features.
+    
+    Missing values (a learner with no rows to average) are stored as NaN.
+    """
+    
+    # Source table -> [(feature, aggregate over that table's rows, value when
+    # the learner has no rows or None for NaN)]. :as_of is the build time as
+    # a Unix epoch, compared with the <column>_epoch mirrors. Login
+    # total_duration is in minutes.
+    SOURCES = {
+        'Login_Activity': [
+            ('login_count', "COUNT(*)", 0.0),
+            ('login_hours', "SUM(COALESCE(total_duration, 0)) / 60.0", 0.0),
+            ('active_days', "COUNT(DISTINCT login_time_epoch / 86400)", 0.0),
+            ('logins_per_week', "COUNT(*) * 7.0 / ((MAX(login_time_epoch) - MIN(login_time_epoch)) / 86400.0 + 1)", None),
+            ('session_minutes_mean', "AVG(total_duration)", None),
+            ('session_minutes_var', "MAX(0.0, AVG(total_duration * total_duration) - AVG(total_duration) * AVG(total_duration))", None),
+            # 1970-01-01 was a Thursday, so (days + 4) % 7 is 0 on Sundays
+            ('weekend_login_share', "AVG(CASE WHEN (login_time_epoch / 86400 + 4) % 7 IN (0, 6) THEN 1.0 ELSE 0.0 END)", None),
+            ('days_since_login', "(:as_of - MAX(login_time_epoch)) / 86400.0", None),
+        ],
+        'Assignment_Details': [
+            ('assignment_count', "COUNT(*)", 0.0),
+            ('submission_rate', "AVG(CASE WHEN submitted_at_epoch IS NOT NULL THEN 1.0 ELSE 0.0 END)", None),
+            ('late_submission_rate', "AVG(CASE WHEN assignment_status = 'Late' THEN 1.0 ELSE 0.0 END)", None),
+            ('assignment_score_mean', "AVG(assignment_score)", None),
+            ('assignment_score_var', "MAX(0.0, AVG(assignment_score * assignment_score) - AVG(assignment_score) * AVG(assignment_score))", None),
+            ('days_since_submission', "(:as_of - MAX(submitted_at_epoch)) / 86400.0", None),
+        ],
+        'Quiz_Details': [
+            ('quiz_count', "COUNT(*)", 0.0),
+            ('quiz_attempt_rate', "AVG(CASE WHEN attempted_at_epoch IS NOT NULL THEN 1.0 ELSE 0.0 END)", None),
+            ('quiz_score_mean', "AVG(quiz_score)", None),
+            ('quiz_score_var', "MAX(0.0, AVG(quiz_score * quiz_score) - AVG(quiz_score) * AVG(quiz_score))", None),
+            ('days_since_quiz', "(:as_of - MAX(attempted_at_epoch)) / 86400.0", None),
+        ],
+        'Live_Session': [
+            ('session_count', "COUNT(*)", 0.0),
+            ('attendance_rate', "AVG(CASE WHEN attendance_status IN ('Present', 'Late') THEN 1.0 ELSE 0.0 END)", None),
+            ('partial_attendance_rate', "AVG(CASE WHEN attendance_status IN ('Late', 'Left Early') THEN 1.0 ELSE 0.0 END)", None),
+        ],
+        'Ticket_Details': [
+            ('ticket_count', "COUNT(*)", 0.0),
+            ('ticket_resolution_rate', "AVG(CASE WHEN status IN ('Resolved', 'Closed') THEN 1.0 ELSE 0.0 END)", None),
+            ('ticket_satisfaction', "AVG(satisfied)", None),
+            ('ticket_resolution_hours', "AVG((resolved_at_epoch - created_at_epoch) / 3600.0)", None),
+            ('urgent_ticket_share', "AVG(CASE WHEN priority IN ('High', 'Urgent') THEN 1.0 ELSE 0.0 END)", None),
+        ],
+    }
+    # Derived after extraction: days since the most recent of these
+    RECENCY_FEATURES = ('days_since_login', 'days_since_submission', 'days_since_quiz')
+    FEATURE_NAMES = [name for specs in SOURCES.values() for name, _, _ in specs] + ['days_since_activity']
+    # Builds kept in Learner_Features; older versions are pruned
+    KEEP_VERSIONS = 2
+    
+    def extract(self, conn, as_of=None):
+        """Compute every feature for every learner; returns (learner_ids, matrix)
+        with rows in learner_id order and columns in FEATURE_NAMES order"""
+        as_of = as_of or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        as_of_epoch = calendar.timegm(datetime.strptime(as_of, "%Y-%m-%d %H:%M:%S").timetuple())
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        learner_ids = [row[0] for row in cursor.execute("SELECT learner_id FROM Learners ORDER BY learner_id")]
+        positions = {learner_id: i for i, learner_id in enumerate(learner_ids)}
+        defaults = [math.nan if default is None else default
+                    for specs in self.SOURCES.values() for _, _, default in specs] + [math.nan]
+        if np is None:
+            matrix = [list(defaults) for _ in learner_ids]
+        else:
+            matrix = np.tile(np.array(defaults, dtype=np.float64), (len(learner_ids), 1))
+        
+        column = 0
+        for table, specs in self.SOURCES.items():
+            aggregates = ', '.join(expr for _, expr, _ in specs)
+            rows = cursor.execute(f"SELECT learner_id, {aggregates} FROM {table} GROUP BY learner_id",
+                                  {'as_of': as_of_epoch}).fetchall()
+            # Activity for learners missing from Learners is ignored
+            rows = [row for row in rows if row[0] in positions]
+            width = len(specs)
+            if np is None:
+                for row in rows:
+                    target = matrix[positions[row[0]]]
+                    for offset, value in enumerate(row[1:]):
+                        target[column + offset] = math.nan if value is None else float(value)
+            elif rows:
+                index = np.fromiter((positions[row[0]] for row in rows), dtype=np.intp, count=len(rows))
+                matrix[index, column:column + width] = np.array([row[1:] for row in rows], dtype=np.float64)
+            column += width
+        
+        recency = [self.FEATURE_NAMES.index(name) for name in self.RECENCY_FEATURES]
+        if np is None:
+            for row in matrix:
+                known = [row[i] for i in recency if not math.isnan(row[i])]
+                row[-1] = min(known) if known else math.nan
+        else:
+            matrix[:, -1] = np.fmin.reduce(matrix[:, recency], axis=1)
+        return learner_ids, matrix
+    
+    def build(self, conn, as_of=None):
+        """Extract all features and store them as a new version in one
+        transaction; returns the new version number"""
+        as_of = as_of or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        learner_ids, matrix = self.extract(conn, as_of)
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            version = (cursor.execute("SELECT MAX(version) FROM Feature_Store_Versions").fetchone()[0] or 0) + 1
+            cursor.execute(
+                "INSERT INTO Feature_Store_Versions (version, feature_names, as_of, built_at, learners) VALUES (?, ?, ?, ?, ?)",
+                (version, json.dumps(self.FEATURE_NAMES), as_of,
+                 datetime.now().strftime("%Y-%m-%d %H:%M:%S"), len(learner_ids))
+            )
+            cursor.executemany(
+                "INSERT INTO Learner_Features (version, learner_id, features) VALUES (?, ?, ?)",
+                ((version, learner_id, self._pack(row)) for learner_id, row in zip(learner_ids, matrix))
+            )
+            stale = version - self.KEEP_VERSIONS
+            cursor.execute("DELETE FROM Learner_Features WHERE version <= ?", (stale,))
+            cursor.execute("DELETE FROM Feature_Store_Versions WHERE version <= ?", (stale,))
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        return version
+    
+    def load(self, conn, version=None, learner_ids=None):
+        """Read a stored build (the latest when version is None), optionally
+        only for learner_ids; returns (version, feature_names, learner_ids, matrix)
+        or None if nothing has been built"""
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        if version is None:
+            version = cursor.execute("SELECT MAX(version) FROM Feature_Store_Versions").fetchone()[0]
+        meta = cursor.execute("SELECT feature_names FROM Feature_Store_Versions WHERE version = ?",
+                              (version,)).fetchone()
+        if meta is None:
+            return None
+        names = json.loads(meta[0])
+        if learner_ids is None:
+            rows = cursor.execute("SELECT learner_id, features FROM Learner_Features WHERE version = ? ORDER BY learner_id",
+                                  (version,)).fetchall()
+        else:
+            learner_ids = list(learner_ids)
+            rows = []
+            for start in range(0, len(learner_ids), 500):
+                batch = learner_ids[start:start + 500]
+                rows.extend(cursor.execute(
+                    f"SELECT learner_id, features FROM Learner_Features WHERE version = ? AND learner_id IN ({','.join('?' * len(batch))})",
+                    [version, *batch]
+                ).fetchall())
+        ids = [row[0] for row in rows]
+        if np is None:
+            matrix = [list(struct.unpack(f'<{len(names)}d', row[1])) for row in rows]
+        else:
+            matrix = np.frombuffer(b''.join(row[1] for row in rows), dtype='<f8').reshape(len(rows), len(names))
+        return version, names, ids, matrix
+    
+    @staticmethod
+    def _pack(row):
+        if np is None:
+            return struct.pack(f'<{len(row)}d', *row)
+        return row.astype('<f8').tobytes()
+
+feature_store = FeatureStore()
+
+if __name__ == "__main__":
+    import argparse
+    from db import apply_migrations
+    parser = argparse.ArgumentParser(description="Re-score learners whose activity changed since their last prediction")
+    parser.add_argument('db_path', nargs='?', default=os.environ.get('DATABASE_PATH', 'engagement_hackathon.db'))
+    parser.add_argument('--full', action='store_true', help="re-score every learner")
+    parser.add_argument('--batch-size', type=int, default=5000, help="learners scored per executemany batch")
+    parser.add_argument('--features', action='store_true', help="build a new feature store version instead of re-scoring")
+    args = parser.parse_args()
+    if args.batch_size < 1:
+        parser.error("--batch-size must be at least 1")
+    conn = sqlite3.connect(args.db_path)
+    apply_migrations(conn)
+    started = time.perf_counter()
+    if args.features:
+        version = feature_store.build(conn)
+        conn.close()
+        print(f"Built feature store version {version} ({len(FeatureStore.FEATURE_NAMES)} features) "
+              f"in {time.perf_counter() - started:.2f}s")
+    else:
+        scored = predictor.update_predictions(conn, full=args.full, batch_size=args.batch_size)
+        conn.close()
+        print(f"Re-scored {scored} learners in {time.perf_counter() - started:.2f}s")
@@ -0,0 +1,292 @@
+"""Activity event ingestion: batches of login, assignment, quiz and attendance
+events validated in Python and written with one executemany per table in a
+single transaction.
+
+Every event carries an event_id idempotency key. Accepted keys are kept in
+Ingested_Events for EVENT_KEY_RETENTION_DAYS, so a retried batch only
+writes the events that did not make it the first time. Events create or
+update the record they describe (login_id, assignment_id, quiz_id or
+session_id): a later event for the same record, e.g. a logout or a grade,
+updates it in place. The activity tables' triggers keep summaries, rollups, epoch
+columns and version counters current as usual.
+"""
+import json
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from db import ASSIGNMENT_STATUSES, QUIZ_STATUSES, ATTENDANCE_STATUSES
+
+# Largest batch accepted in one call, its largest body in bytes, and how
+# many rejections are itemized
+EVENTS_MAX_BATCH = 50000
+EVENTS_MAX_BODY = 32 * 1024 * 1024
+EVENT_ERRORS_MAX = 100
+EVENT_KEY_MAX_LENGTH = 200
+EVENT_KEY_RETENTION_DAYS = int(os.environ.get('EVENT_KEY_RETENTION_DAYS', 7))
+# Parameters per IN (...) lookup, under SQLite's default variable limit
+LOOKUP_CHUNK = 500
+UNIX_EPOCH = datetime(1970, 1, 1)
+ONE_SECOND = timedelta(seconds=1)
+
+class InvalidLine:
+    """An NDJSON line that did not decode; rejected with its error"""
+    __slots__ = ('error',)
+
+    def __init__(self, error):
+        self.error = error
+
+def decode_ndjson(data):
+    """Events from NDJSON bytes, one per non-blank line; bad lines become InvalidLine"""
+    events = []
+    for line in data.splitlines():
+        if not line.strip():
+            continue
+        try:
+            events.append(json.loads(line))
+        except ValueError as e:
+            events.append(InvalidLine(f"Invalid JSON: {e}"))
+    return events
+
+def _timestamp(event, field, required=False):
+    """(text, epoch) of an ISO 8601 timestamp, the text normalized to the
+    tables' 'YYYY-MM-DD HH:MM:SS' (UTC); (None, None) if absent"""
+    value = event.get(field)
+    if value is None:
+        if required:
+            raise ValueError(f"{field} is required")
+        return None, None
+    if not isinstance(value, str):
+        raise ValueError(f"{field} must be an ISO 8601 string")
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"{field} is not an ISO 8601 timestamp: {value!r}")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    if len(value) != 19 or value[10] != ' ':
+        value = parsed.isoformat(' ', 'seconds')
+    # The epoch matches the <column>_epoch triggers' strftime('%s'), so they skip the row
+    return value, (parsed - UNIX_EPOCH) // ONE_SECOND
+
+def _record_id(event, field):
+    value = event.get(field)
+    if not isinstance(value, str) or not value or len(value) > EVENT_KEY_MAX_LENGTH:
+        raise ValueError(f"{field} must be a non-empty string of at most {EVENT_KEY_MAX_LENGTH} characters")
+    return value
+
+def _status(event, allowed):
+    value = event.get('status')
+    if value not in allowed:
+        raise ValueError(f"status must be one of {', '.join(allowed)}")
+    return value
+
+def _score(event):
+    """Optional 0-100 score; returns (score, normalized_score)"""
+    value = event.get('score')
+    if value is None:
+        return None, None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not 0 <= value <= 100:
+        raise ValueError("score must be a number from 0 to 100")
+    return value, round(value / 100, 2)
+
+def _login_row(event, learner):
+    login_time, login_epoch = _timestamp(event, 'login_time', required=True)
+    logout_time, logout_epoch = _timestamp(event, 'logout_time')
+    if logout_epoch is not None and logout_epoch < login_epoch:
+        raise ValueError("logout_time is before login_time")
+    duration = event.get('total_duration')
+    if duration is None:
+        # Minutes, like the generated rows
+        if logout_epoch is not None:
+            duration = (logout_epoch - login_epoch) // 60
+    elif isinstance(duration, bool) or not isinstance(duration, int) or duration < 0:
+        raise ValueError("total_duration must be a non-negative integer (minutes)")
+    return (_record_id(event, 'login_id'), learner['learner_id'], learner['name'], learner['email'],
+            login_time, logout_time, duration, login_epoch)
+
+def _course(event, learner):
+    course_id = event.get('course_id', learner['course_id'])
+    if course_id is not None and not isinstance(course_id, str):
+        raise ValueError("course_id must be a string")
+    return course_id
+
+def _assignment_row(event, learner):
+    score, normalized = _score(event)
+    submitted_at, submitted_epoch = _timestamp(event, 'submitted_at')
+    return (_record_id(event, 'assignment_id'), learner['learner_id'], _course(event, learner), learner['cohort_id'],
+            _status(event, ASSIGNMENT_STATUSES), score, submitted_at, normalized, submitted_epoch)
+
+def _quiz_row(event, learner):
+    score, normalized = _score(event)
+    attempted_at, attempted_epoch = _timestamp(event, 'attempted_at')
+    return (_record_id(event, 'quiz_id'), learner['learner_id'], _course(event, learner), learner['cohort_id'],
+            _status(event, QUIZ_STATUSES), score, attempted_at, normalized, attempted_epoch)
+
+def _attendance_row(event, learner):
+    return (_record_id(event, 'session_id'), _course(event, learner), learner['cohort_id'], learner['learner_id'],
+            _status(event, ATTENDANCE_STATUSES))
+
+# Event type -> (row builder, table, columns of the row it builds; the first is the record id)
+EVENT_TYPES = {
+    'login': (_login_row, 'Login_Activity',
+              ['login_id', 'learner_id', 'name', 'email', 'login_time', 'logout_time', 'total_duration',
+               'login_time_epoch']),
+    'assignment': (_assignment_row, 'Assignment_Details',
+                   ['assignment_id', 'learner_id', 'course_id', 'cohort_id', 'assignment_status',
+                    'assignment_score', 'submitted_at', 'normalized_score', 'submitted_at_epoch']),
+    'quiz': (_quiz_row, 'Quiz_Details',
+             ['quiz_id', 'learner_id', 'course_id', 'cohort_id', 'quiz_status', 'quiz_score',
+              'attempted_at', 'normalized_score', 'attempted_at_epoch']),
+    'attendance': (_attendance_row, 'Live_Session',
+                   ['session_id', 'course_id', 'cohort_id', 'learner_id', 'attendance_status']),
+}
+
+def _write_statements(table, columns):
+    """(INSERT of a whole row, UPDATE of a row's other columns by id taking (values..., id))"""
+    return (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+            f"UPDATE {table} SET {', '.join(f'{column} = ?' for column in columns[1:])} WHERE {columns[0]} = ?")
+
+def _lookup(cursor, query, keys):
+    """Rows of `query` (with one {} for an IN list) for keys, LOOKUP_CHUNK at a time"""
+    keys = list(keys)
+    rows = []
+    for start in range(0, len(keys), LOOKUP_CHUNK):
+        chunk = keys[start:start + LOOKUP_CHUNK]
+        rows.extend(cursor.execute(query.format(','.join('?' * len(chunk))), chunk))
+    return rows
+
+def ingest_events(conn, events, received_at=None):
+    """Validate and write a batch of events in one transaction.
+
+    Returns {'accepted', 'duplicates', 'rejected', 'errors'}: duplicates are
+    events whose event_id was already ingested (or repeats within the
+    batch), errors lists the first EVENT_ERRORS_MAX rejections as
+    {'index', 'event_id', 'error'}. Raises sqlite3.Error, after rolling
+    back, if the write fails.
+    """
+    received_at = int(time.time()) if received_at is None else received_at
+    result = {'accepted': 0, 'duplicates': 0, 'rejected': 0, 'errors': []}
+
+    def reject(index, event_id, error):
+        result['rejected'] += 1
+        if len(result['errors']) < EVENT_ERRORS_MAX:
+            result['errors'].append({'index': index, 'event_id': event_id, 'error': error})
+
+    # Shape checks that need no database access
+    candidates = []
+    seen = set()
+    for index, event in enumerate(events):
+        if isinstance(event, InvalidLine):
+            reject(index, None, event.error)
+            continue
+        if not isinstance(event, dict):
+            reject(index, None, "Event must be an object")
+            continue
+        event_id = event.get('event_id')
+        if not isinstance(event_id, str) or not event_id or len(event_id) > EVENT_KEY_MAX_LENGTH:
+            reject(index, None, f"event_id must be a non-empty string of at most {EVENT_KEY_MAX_LENGTH} characters")
+            continue
+        if event.get('type') not in EVENT_TYPES:
+            reject(index, event_id, f"type must be one of {', '.join(EVENT_TYPES)}")
+            continue
+        if not isinstance(event.get('learner_id'), str):
+            reject(index, event_id, "learner_id must be a string")
+            continue
+        if event_id in seen:
+            result['duplicates'] += 1
+            continue
+        seen.add(event_id)
+        candidates.append((index, event_id, event))
+    if not candidates:
+        return result
+
+    cursor = conn.cursor()
+    # IMMEDIATE takes the write lock up front, so no concurrent batch can
+    # ingest the same keys between the duplicate check and the insert
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        ingested = {row[0] for row in _lookup(
+            cursor, "SELECT event_id FROM Ingested_Events WHERE event_id IN ({})", seen)}
+        learners = {row[0]: {'learner_id': row[0], 'cohort_id': row[1], 'course_id': row[2], 'name': row[3], 'email': row[4]}
+                    for row in _lookup(cursor, """
+                        SELECT l.learner_id, l.cohort_id, co.course_id, l.name, l.email
+                        FROM Learners l LEFT JOIN Cohorts co ON co.cohort_id = l.cohort_id
+                        WHERE l.learner_id IN ({})
+                    """, {event['learner_id'] for _, _, event in candidates})}
+
+        rows = {event_type: [] for event_type in EVENT_TYPES}
+        keys = []
+        for index, event_id, event in candidates:
+            if event_id in ingested:
+                result['duplicates'] += 1
+                continue
+            learner = learners.get(event['learner_id'])
+            if learner is None:
+                reject(index, event_id, f"Unknown learner_id: {event['learner_id']}")
+                continue
+            try:
+                rows[event['type']].append(EVENT_TYPES[event['type']][0](event, learner))
+            except ValueError as e:
+                reject(index, event_id, str(e))
+                continue
+            keys.append((event_id, event['type'], received_at))
+
+        # New records are inserted, known ones updated. Not an UPSERT: its
+        # DO UPDATE branch overrides the OR IGNORE in the summary triggers.
+        # Updates run after the inserts in batch order, so the last event
+        # for a record wins
+        for event_type, type_rows in rows.items():
+            if not type_rows:
+                continue
+            _, table, columns = EVENT_TYPES[event_type]
+            existing = {row[0] for row in _lookup(
+                cursor, f"SELECT {columns[0]} FROM {table} WHERE {columns[0]} IN ({{}})", {row[0] for row in type_rows})}
+            inserts, updates = [], []
+            for row in type_rows:
+                if row[0] in existing:
+                    updates.append(row[1:] + row[:1])
+                else:
+                    existing.add(row[0])
+                    inserts.append(row)
+            insert_sql, update_sql = _write_statements(table, columns)
+            cursor.executemany(insert_sql, inserts)
+            cursor.executemany(update_sql, updates)
+        cursor.executemany("INSERT INTO Ingested_Events (event_id, event_type, received_at) VALUES (?, ?, ?)", keys)
+        cursor.execute("DELETE FROM Ingested_Events WHERE received_at < ?",
+                       (received_at - EVENT_KEY_RETENTION_DAYS * 86400,))
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    result['accepted'] = len(keys)
+    return result
+
+if __name__ == "__main__":
+    import argparse
+    from db import apply_migrations
+    parser = argparse.ArgumentParser(description="Ingest NDJSON activity events from a file or stdin")
+    parser.add_argument('events', nargs='?', default='-', help="NDJSON file, - for stdin")
+    parser.add_argument('--db', default=os.environ.get('DATABASE_PATH', 'engagement_hackathon.db'))
+    parser.add_argument('--batch-size', type=int, default=10000, help="events per transaction")
+    args = parser.parse_args()
+    if not 1 <= args.batch_size <= EVENTS_MAX_BATCH:
+        parser.error(f"--batch-size must be between 1 and {EVENTS_MAX_BATCH}")
+    with (sys.stdin.buffer if args.events == '-' else open(args.events, 'rb')) as f:
+        events = decode_ndjson(f.read())
+    conn = sqlite3.connect(args.db)
+    apply_migrations(conn)
+    started = time.perf_counter()
+    totals = {'accepted': 0, 'duplicates': 0, 'rejected': 0}
+    for start in range(0, len(events), args.batch_size):
+        result = ingest_events(conn, events[start:start + args.batch_size])
+        for error in result['errors']:
+            print(f"event {start + error['index']}: {error['error']}", file=sys.stderr)
+        for key in totals:
+            totals[key] += result[key]
+    conn.close()
+    elapsed = time.perf_counter() - started
+    print(f"Ingested {len(events)} events in {elapsed:.2f}s ({len(events) / elapsed if elapsed else 0:,.0f}/s): "
+          f"{totals['accepted']} accepted, {totals['duplicates']} duplicates, {totals['rejected']} rejected")
@@ -0,0 +1,41 @@
+import importlib
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db
+
+@pytest.fixture
+def seeded_db(tmp_path):
+    """Path of a freshly generated, fully migrated scale-1 database"""
+    path = str(tmp_path / "seeded.db")
+    db.generate_random_data(path, scale=1, seed=7)
+    return path
+
+@pytest.fixture
+def conn(seeded_db):
+    conn = sqlite3.connect(seeded_db)
+    conn.row_factory = sqlite3.Row
+    yield conn
+    conn.close()
+
+@pytest.fixture(scope='session')
+def app_module(tmp_path_factory):
+    """The app module bound to a seeded scale-1 database shared by the app tests"""
+    # app binds DATABASE_PATH when it is first imported
+    path = str(tmp_path_factory.mktemp('app') / 'app.db')
+    db.generate_random_data(path, scale=1, seed=11)
+    os.environ['DATABASE_PATH'] = path
+    app = importlib.import_module('app')
+    assert app.DB_PATH == path, "app was imported earlier with another database"
+    return app
+
+def login(app_module, username, password):
+    """Test client signed in as username"""
+    client = app_module.app.test_client()
+    client.post('/login', data={'username': username, 'password': password})
+    return client
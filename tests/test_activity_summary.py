@@ -0,0 +1,52 @@
+import db
+
+COUNTER_COLUMNS = [column for counters in db.SUMMARY_COUNTERS.values() for column in counters]
+
+def summary_rows(conn):
+    columns = ', '.join(f"ROUND({column}, 6)" for column in COUNTER_COLUMNS)
+    return {row[0]: tuple(row[1:]) for row in conn.execute(
+        f"SELECT learner_id, {columns}, last_login FROM Learner_Activity_Summary")}
+
+def reference_rows(conn):
+    """Every learner's counters aggregated from the activity tables"""
+    rows = {learner_id: dict.fromkeys(COUNTER_COLUMNS, 0) for (learner_id,) in conn.execute("SELECT learner_id FROM Learners")}
+    last_login = dict.fromkeys(rows)
+    for table, counters in db.SUMMARY_COUNTERS.items():
+        sums = ', '.join(f"SUM({expr.format(row=table)})" for expr in counters.values())
+        for learner_id, *values in conn.execute(f"SELECT learner_id, {sums} FROM {table} GROUP BY learner_id"):
+            if learner_id in rows:
+                rows[learner_id].update(zip(counters, values))
+    for learner_id, latest in conn.execute("SELECT learner_id, MAX(login_time) FROM Login_Activity GROUP BY learner_id"):
+        if learner_id in rows:
+            last_login[learner_id] = latest
+    return {learner_id: tuple(round(counters[column], 6) for column in COUNTER_COLUMNS) + (last_login[learner_id],)
+            for learner_id, counters in rows.items()}
+
+def test_summary_follows_activity_writes(conn):
+    assert summary_rows(conn) == reference_rows(conn)
+    learner, other = [row[0] for row in conn.execute("SELECT learner_id FROM Learners ORDER BY learner_id LIMIT 2")]
+
+    conn.execute("INSERT INTO Login_Activity (login_id, learner_id, login_time, total_duration) "
+                 "VALUES ('T-LOGIN', ?, '2030-01-01 08:00:00', 45)", (learner,))
+    conn.execute("INSERT INTO Assignment_Details (assignment_id, learner_id, assignment_status, assignment_score) "
+                 "VALUES ('T-ASSIGN', ?, 'Pending', NULL)", (learner,))
+    conn.execute("UPDATE Assignment_Details SET assignment_status = 'Submitted', assignment_score = 88 "
+                 "WHERE assignment_id = 'T-ASSIGN'")
+    conn.execute("INSERT INTO Ticket_Details (ticket_id, learner_id, status) VALUES ('T-TICKET', ?, 'Open')", (learner,))
+    conn.execute("UPDATE Ticket_Details SET status = 'Resolved' WHERE ticket_id = 'T-TICKET'")
+    # A row moved to another learner leaves one summary and joins the other
+    conn.execute("UPDATE Login_Activity SET learner_id = ? WHERE login_id = 'T-LOGIN'", (other,))
+    conn.execute("DELETE FROM Quiz_Details WHERE learner_id = (SELECT learner_id FROM Quiz_Details LIMIT 1)")
+    conn.execute("DELETE FROM Live_Session WHERE rowid IN (SELECT rowid FROM Live_Session LIMIT 5)")
+    assert summary_rows(conn) == reference_rows(conn)
+
+    # The latest login moves back when it is deleted
+    conn.execute("DELETE FROM Login_Activity WHERE login_id = 'T-LOGIN'")
+    assert summary_rows(conn) == reference_rows(conn)
+
+def test_new_learners_get_a_zeroed_summary(conn):
+    cohort = conn.execute("SELECT cohort_id FROM Cohorts LIMIT 1").fetchone()[0]
+    conn.execute("INSERT INTO Learners (learner_id, name, cohort_id) VALUES ('T-NEW', 'New Learner', ?)", (cohort,))
+    assert summary_rows(conn)['T-NEW'] == (0,) * len(COUNTER_COLUMNS) + (None,)
+    conn.execute("DELETE FROM Learners WHERE learner_id = 'T-NEW'")
+    assert 'T-NEW' not in summary_rows(conn)
@@ -0,0 +1,19 @@
+import sqlite3
+
+import pytest
+
+from conftest import login
+from db import build_scope_aggregate_query
+
+@pytest.mark.parametrize('username, password, user, courses', [
+    ('superadmin', 'admin123', {'role': 'Super Admin'}, []),
+    ('coordinator1', 'coord1', {'role': 'Program Coordinator'}, ['CR101', 'CS201']),
+])
+def test_avg_engagement_averages_both_scores(app_module, username, password, user, courses):
+    conn = sqlite3.connect(app_module.DB_PATH)
+    query, params = build_scope_aggregate_query(user, courses, ['avg_assignment_score', 'avg_quiz_score'])
+    assignment, quiz = conn.execute(query, params).fetchone()
+    conn.close()
+    assert assignment and quiz
+    analytics = login(app_module, username, password).get('/api/analytics').get_json()
+    assert analytics['avg_engagement'] == round((assignment + quiz) / 2, 1)
@@ -0,0 +1,67 @@
+import asyncio
+import importlib
+import json
+
+import pytest
+
+from conftest import login
+
+def call(application, method, path, query=b'', headers=(), body=b''):
+    """Run one request through an ASGI app; returns (status, headers, body)"""
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': method, 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+        'root_path': '', 'query_string': query, 'headers': list(headers),
+        'server': ('testserver', 80), 'client': ('127.0.0.1', 1234),
+    }
+    asyncio.run(application(scope, receive, send))
+    start = sent[0]
+    response_headers = {name.decode(): value.decode() for name, value in start['headers']}
+    return start['status'], response_headers, b''.join(m.get('body', b'') for m in sent[1:])
+
+@pytest.fixture(scope='module')
+def asgi(app_module):
+    return importlib.import_module('asgi')
+
+@pytest.fixture(scope='module')
+def cookie(asgi):
+    form = b'username=coordinator1&password=coord1'
+    status, headers, _ = call(asgi.application, 'POST', '/login', headers=[
+        (b'content-type', b'application/x-www-form-urlencoded'),
+        (b'content-length', str(len(form)).encode()),
+    ], body=form)
+    assert status == 302
+    return headers['set-cookie'].split(';', 1)[0].encode()
+
+def test_responses_match_the_wsgi_app(app_module, asgi, cookie):
+    client = login(app_module, 'coordinator1', 'coord1')
+    for path in ('/api/dashboard-stats', '/api/learners'):
+        status, _, body = call(asgi.application, 'GET', path, headers=[(b'cookie', cookie)])
+        assert status == 200
+        assert json.loads(body) == client.get(path).get_json()
+
+def test_exports_use_their_own_pool(asgi):
+    def scope(path, query=b'', method='GET'):
+        return {'path': path, 'query_string': query, 'method': method}
+    assert asgi.is_export(scope('/api/learners'))
+    assert asgi.is_export(scope('/api/tickets', b'format=ndjson'))
+    assert not asgi.is_export(scope('/api/learners', b'limit=10'))
+    assert not asgi.is_export(scope('/api/interventions', b'cursor='))
+    assert not asgi.is_export(scope('/api/dashboard-stats'))
+    assert not asgi.is_export(scope('/api/learners', method='POST'))
+
+def test_unauthenticated_requests_redirect(asgi):
+    status, headers, _ = call(asgi.application, 'GET', '/dashboard')
+    assert status == 302
+    assert headers['location'].endswith('/login')
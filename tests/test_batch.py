@@ -0,0 +1,29 @@
+from conftest import login
+
+ANALYTICS_BATCH = [{'route': 'analytics/cohorts'}, {'route': 'analytics'}, {'route': 'analytics/dropout'}]
+
+def test_batch_matches_the_individual_reads(app_module):
+    client = login(app_module, 'coordinator1', 'coord1')
+    results = client.post('/api/batch', json={'requests': ANALYTICS_BATCH}).get_json()['results']
+    assert [result['route'] for result in results] == [sub['route'] for sub in ANALYTICS_BATCH]
+    for sub, result in zip(ANALYTICS_BATCH, results):
+        assert result['status'] == 200
+        assert result['body'] == client.get(f"/api/{sub['route']}").get_json()
+
+def test_batch_reports_sub_request_errors_in_place(app_module):
+    client = login(app_module, 'superadmin', 'admin123')
+    results = client.post('/api/batch', json={'requests': [
+        {'route': 'no-such-route'},
+        {'route': 'batch'},
+        {'route': 'learners', 'args': {'sort': 'unknown'}},
+        {'route': 'learners', 'args': {'limit': 2}},
+    ]}).get_json()['results']
+    assert [result['status'] for result in results] == [404, 405, 400, 200]
+    assert len(results[3]['body']['learners']) == 2
+
+def test_batch_rejects_malformed_bodies(app_module):
+    client = login(app_module, 'superadmin', 'admin123')
+    assert client.post('/api/batch', json={'requests': []}).status_code == 400
+    assert client.post('/api/batch', json={'requests': [{'args': {}}]}).status_code == 400
+    too_many = [{'route': 'analytics'}] * (app_module.BATCH_MAX_REQUESTS + 1)
+    assert client.post('/api/batch', json={'requests': too_many}).status_code == 400
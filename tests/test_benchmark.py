@@ -0,0 +1,25 @@
+import benchmark
+
+def test_percentiles_use_nearest_rank():
+    values = list(range(1, 101))
+    assert benchmark.percentile(values, 50) == 50
+    assert benchmark.percentile(values, 95) == 95
+    assert benchmark.percentile(values, 99) == 99
+    assert benchmark.percentile([7], 99) == 7
+
+def test_regressions_need_growth_beyond_tolerance_and_floor():
+    def results(p95, statements):
+        return {'runs': {'1': {'endpoints': {'GET /api/learners': {'p95_ms': p95, 'statements': statements}}}}}
+    baseline = results(10.0, 3)
+    assert benchmark.find_regressions(results(10.0 + benchmark.REGRESSION_FLOOR_MS, 3), baseline, 0.1) == []
+    assert len(benchmark.find_regressions(results(100.0, 3), baseline, 0.1)) == 1
+    assert len(benchmark.find_regressions(results(10.0, 4), baseline, 0.1)) == 1
+    # Scales missing from the baseline are not compared
+    assert benchmark.find_regressions({'runs': {'5': results(100.0, 9)['runs']['1']}}, baseline, 0.1) == []
+
+def test_every_benchmarked_endpoint_succeeds(app_module):
+    results = benchmark.run_endpoints(app_module.DB_PATH, repeat=1, threads=1, writers=0, warm_cache=False)
+    assert len(results) > 2 * 15
+    for name, result in results.items():
+        assert result['errors'] == 0, name
+        assert result['statements'] > 0, name
@@ -0,0 +1,27 @@
+import pytest
+
+from conftest import login
+
+@pytest.mark.parametrize('username, password', [('superadmin', 'admin123'), ('coordinator1', 'coord1')])
+def test_cohort_and_dropout_views_agree_with_analytics(app_module, username, password):
+    client = login(app_module, username, password)
+    analytics = client.get('/api/analytics').get_json()
+    cohorts = client.get('/api/analytics/cohorts').get_json()
+    dropout = client.get('/api/analytics/dropout').get_json()
+
+    assert cohorts['overview']['total_learners'] == analytics['total_learners'] > 0
+    assert sum(cohort['learners'] for cohort in cohorts['cohorts']) == analytics['total_learners']
+    assert dropout['labels'] == [cohort['cohort_id'] for cohort in cohorts['cohorts']]
+
+    # The SQL banding matches the scoring engine the other views use
+    counts = dropout['status_counts']
+    on_track, at_risk, will_drop = analytics['engagement_distribution']['values']
+    assert (counts['Completed'] + counts['On Track'], counts['At Risk'], counts['Will Drop Off']) == (on_track, at_risk, will_drop)
+    assert sum(dropout['low_risk']) == on_track
+    assert sum(dropout['medium_risk']) == at_risk
+    assert sum(dropout['high_risk']) == will_drop
+
+def test_coordinator_sees_only_assigned_cohorts(app_module):
+    cohorts = login(app_module, 'coordinator1', 'coord1').get('/api/analytics/cohorts').get_json()['cohorts']
+    assert cohorts
+    assert {cohort['course_id'] for cohort in cohorts} <= {'CR101', 'CS201'}
@@ -0,0 +1,61 @@
+import sqlite3
+import threading
+
+import pytest
+
+from db import ConnectionPool
+
+def test_connections_are_reused_and_capped(seeded_db):
+    pool = ConnectionPool(seeded_db, size=2)
+    first = pool.acquire()
+    assert first.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+    assert first.execute("PRAGMA cache_size").fetchone()[0] == -65536
+    first.close()
+    assert pool.acquire() is first
+
+    extra = [pool.acquire() for _ in range(3)]
+    for conn in extra + [first]:
+        conn.close()
+    stats = pool.stats()
+    assert (stats['idle'], stats['in_use'], stats['discarded']) == (2, 0, 2)
+    pool.close_all()
+
+def test_release_rolls_back_open_transactions(seeded_db):
+    pool = ConnectionPool(seeded_db, size=1)
+    conn = pool.acquire()
+    conn.execute("UPDATE Users SET role = 'Changed'")
+    assert conn.in_transaction
+    conn.close()
+    conn = pool.acquire()
+    assert not conn.in_transaction
+    assert 'Changed' not in {row[0] for row in conn.execute("SELECT role FROM Users")}
+    pool.close_all()
+
+def test_read_only_pool_refuses_writes(seeded_db):
+    pool = ConnectionPool(seeded_db, read_only=True)
+    conn = pool.acquire()
+    with pytest.raises(sqlite3.OperationalError):
+        conn.execute("DELETE FROM Users")
+    conn.close()
+    pool.close_all()
+
+def test_connections_can_move_between_threads(seeded_db):
+    pool = ConnectionPool(seeded_db, size=4)
+    counts = []
+
+    def worker():
+        for _ in range(20):
+            conn = pool.acquire()
+            counts.append(conn.execute("SELECT COUNT(*) FROM Learners").fetchone()[0])
+            conn.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(counts) == 160 and len(set(counts)) == 1
+    stats = pool.stats()
+    assert stats['in_use'] == 0 and stats['idle'] <= 4
+    assert stats['opened'] + stats['reused'] == 160
+    pool.close_all()
@@ -0,0 +1,48 @@
+import sqlite3
+
+def test_catalog_reloads_only_after_writes(app_module, monkeypatch):
+    catalog = app_module.CourseCatalog()
+    loads = []
+    load = catalog._load
+    monkeypatch.setattr(catalog, '_load', lambda: loads.append(1) or load())
+    with app_module.app.app_context():
+        courses = catalog.course_ids()
+        # Names come back in catalog order, whatever the order asked for
+        names = catalog.course_names(['CS201', 'CR101'])
+        assert [course['id'] for course in names] == [course for course in courses if course in ('CR101', 'CS201')]
+        catalog.cohorts(['CR101'])
+        assert len(loads) == 1
+
+        conn = sqlite3.connect(app_module.DB_PATH)
+        try:
+            conn.execute("INSERT INTO Cohorts (cohort_id, course_id, start_date) VALUES ('CATALOG-TEST', 'CR101', '2030-01-01')")
+            conn.commit()
+            assert catalog.cohorts(['CR101'])['CATALOG-TEST'] == {
+                'course_id': 'CR101', 'start_date': '2030-01-01', 'learners': 0}
+            assert len(loads) == 2
+        finally:
+            conn.execute("DELETE FROM Cohorts WHERE cohort_id = 'CATALOG-TEST'")
+            conn.commit()
+            conn.close()
+        assert 'CATALOG-TEST' not in catalog.cohorts(['CR101'])
+
+def test_catalog_matches_the_database(app_module):
+    conn = sqlite3.connect(app_module.DB_PATH)
+    expected = dict(conn.execute("""
+        SELECT co.cohort_id, COUNT(l.learner_id) FROM Cohorts co
+        LEFT JOIN Learners l ON l.cohort_id = co.cohort_id
+        WHERE co.course_id IN ('CR101', 'CS201') GROUP BY co.cohort_id
+    """))
+    all_courses = [row[0] for row in conn.execute("SELECT course_id FROM Courses")]
+    conn.close()
+    with app_module.app.app_context():
+        cohorts = app_module.course_catalog.cohorts(['CR101', 'CS201'])
+        assert sorted(app_module.course_catalog.course_ids()) == sorted(all_courses)
+    assert {cohort_id: cohort['learners'] for cohort_id, cohort in cohorts.items()} == expected
+
+def test_user_courses_follow_the_role(app_module):
+    for username, password, expected in [('coordinator1', 'coord1', ['CR101', 'CS201']), ('superadmin', 'admin123', None)]:
+        with app_module.app.test_request_context():
+            app_module.session['user'] = app_module.authenticate_user(username, password)
+            courses = app_module.get_user_courses()
+            assert courses == (expected or app_module.course_catalog.course_ids())
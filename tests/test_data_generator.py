@@ -0,0 +1,34 @@
+import sqlite3
+
+import db
+
+def table_rows(path):
+    conn = sqlite3.connect(path)
+    try:
+        return {table: conn.execute(f"SELECT * FROM {table} ORDER BY rowid").fetchall() for table in db.SYNTHETIC_TABLES}
+    finally:
+        conn.close()
+
+def test_same_seed_gives_the_same_data(tmp_path, seeded_db):
+    again = str(tmp_path / 'again.db')
+    db.generate_random_data(again, scale=1, seed=7, workers=2)
+    assert table_rows(again) == table_rows(seeded_db)
+    other = str(tmp_path / 'other.db')
+    db.generate_random_data(other, scale=1, seed=8)
+    assert table_rows(other)['Learners'] != table_rows(seeded_db)['Learners']
+
+def test_scale_multiplies_rows_and_keeps_references(tmp_path):
+    path = str(tmp_path / 'scaled.db')
+    db.generate_random_data(path, scale=3, seed=1)
+    conn = sqlite3.connect(path)
+    try:
+        for table, (per_scale, _, _) in db.SYNTHETIC_TABLES.items():
+            assert conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] == per_scale * 3, table
+        assert conn.execute("SELECT COUNT(*) FROM Learners WHERE cohort_id NOT IN (SELECT cohort_id FROM Cohorts)").fetchone()[0] == 0
+        assert conn.execute("SELECT COUNT(*) FROM Cohorts WHERE course_id NOT IN (SELECT course_id FROM Courses)").fetchone()[0] == 0
+        for table in ('Login_Activity', 'Assignment_Details', 'Quiz_Details', 'Live_Session', 'Ticket_Details', 'Nudge_Logs'):
+            orphans = conn.execute(f"SELECT COUNT(*) FROM {table} WHERE learner_id NOT IN (SELECT learner_id FROM Learners)")
+            assert orphans.fetchone()[0] == 0, table
+        assert db.get_schema_version(conn.cursor()) == db.MIGRATIONS[-1][0]
+    finally:
+        conn.close()
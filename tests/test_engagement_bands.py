@@ -0,0 +1,66 @@
+import sqlite3
+
+import pytest
+
+import db
+from conftest import login
+from engagement_predictor import predictor
+
+def stored_scores(conn):
+    return dict(conn.execute("SELECT learner_id, total_engagement_score FROM Learners"))
+
+def engine_scores(conn):
+    ids, features = predictor.load(conn.cursor(), predictor.feature_query())
+    return dict(zip(ids, (round(float(score), 2) for score in predictor.score(features))))
+
+def bands(client):
+    """Band counts and average as reported by each endpoint that bands learners"""
+    stats = client.get('/api/dashboard-stats').get_json()
+    dropout = client.get('/api/analytics/dropout').get_json()['status_counts']
+    cohorts = client.get('/api/analytics/cohorts').get_json()['overview']
+    distribution = client.get('/api/analytics').get_json()['engagement_distribution']['values']
+    risk = {level: client.get(f'/api/learners?risk={level}&limit=1').get_json()['total']
+            for level in ('low', 'medium', 'high')}
+    return {
+        'dashboard-stats': [stats['completed'] + stats['on_track'], stats['at_risk'], stats['will_drop']],
+        'dropout': [dropout['Completed'] + dropout['On Track'], dropout['At Risk'], dropout['Will Drop Off']],
+        'analytics': distribution,
+        'learners?risk': [risk['low'], risk['medium'], risk['high']],
+    }, (stats['avg_engagement'], cohorts['avg_engagement'])
+
+def test_scores_change_only_when_predictions_are_updated(app_module):
+    admin = login(app_module, 'superadmin', 'admin123')
+    conn = sqlite3.connect(app_module.DB_PATH)
+    before = stored_scores(conn)
+    # Migrations leave the generated scores alone
+    db.apply_migrations(conn)
+    assert stored_scores(conn) == before
+    learner_ids = sorted(before)[:100]
+    events = [{'event_id': f'band-{i}', 'type': 'attendance', 'learner_id': learner_id,
+               'session_id': f'BAND-{i}', 'status': 'Present'}
+              for i, learner_id in enumerate(learner_ids)]
+    assert admin.post('/api/events', json=events).get_json()['accepted'] == len(events)
+    assert stored_scores(conn) == before
+
+    assert admin.post('/api/update-predictions?full=1').get_json()['scored'] == len(before)
+    assert stored_scores(conn) == engine_scores(conn)
+    conn.close()
+
+    for client in (admin, login(app_module, 'coordinator1', 'coord1')):
+        counts, (average, cohort_average) = bands(client)
+        assert len({tuple(value) for value in counts.values()}) == 1, counts
+        assert average == cohort_average
+    assert all(counts['analytics']), "expected learners in every band"
+
+@pytest.mark.parametrize('scale, seed', [(1, 7), (2, 3)])
+def test_thresholds_split_generated_learners(tmp_path, scale, seed):
+    path = str(tmp_path / 'split.db')
+    db.generate_random_data(path, scale=scale, seed=seed)
+    conn = sqlite3.connect(path)
+    predictor.update_predictions(conn, full=True)
+    summary = predictor.summarize(predictor.load_scores(conn.cursor()))
+    conn.close()
+    shares = [count / summary['count'] for count in summary['bands']]
+    # Every status is used and none takes over
+    assert min(shares) >= 0.03, dict(zip(predictor.STATUSES, shares))
+    assert max(shares) <= 0.6, dict(zip(predictor.STATUSES, shares))
@@ -0,0 +1,32 @@
+import db
+
+def mismatches(conn, table, column):
+    return conn.execute(f"SELECT COUNT(*) FROM {table} WHERE {column}_epoch "
+                        f"IS NOT CAST(strftime('%s', {column}) AS INTEGER)").fetchone()[0]
+
+def test_backfilled_epochs_match_the_text_columns(conn):
+    for table, columns in db.EPOCH_COLUMNS.items():
+        for column in columns:
+            assert mismatches(conn, table, column) == 0, f"{table}.{column}"
+    assert conn.execute("SELECT COUNT(*) FROM Login_Activity WHERE login_time_epoch IS NOT NULL").fetchone()[0] > 0
+
+def test_triggers_keep_epochs_in_sync(conn):
+    learner_id = conn.execute("SELECT learner_id FROM Learners LIMIT 1").fetchone()[0]
+    conn.execute("INSERT INTO Ticket_Details (ticket_id, learner_id, subject, status, created_at) "
+                 "VALUES ('EPOCH-1', ?, 'Epochs', 'Open', '2030-01-01 09:00:00')", (learner_id,))
+    conn.commit()
+    row = conn.execute("SELECT created_at_epoch, resolved_at_epoch FROM Ticket_Details "
+                       "WHERE ticket_id = 'EPOCH-1'").fetchone()
+    assert tuple(row) == (1893488400, None)
+
+    conn.execute("UPDATE Ticket_Details SET status = 'Resolved', resolved_at = '2030-01-02 09:00:00' "
+                 "WHERE ticket_id = 'EPOCH-1'")
+    conn.commit()
+    row = conn.execute("SELECT created_at_epoch, resolved_at_epoch FROM Ticket_Details "
+                       "WHERE ticket_id = 'EPOCH-1'").fetchone()
+    assert tuple(row) == (1893488400, 1893574800)
+
+    # Clearing the text column clears its mirror too
+    conn.execute("UPDATE Ticket_Details SET resolved_at = NULL WHERE ticket_id = 'EPOCH-1'")
+    conn.commit()
+    assert mismatches(conn, 'Ticket_Details', 'resolved_at') == 0
@@ -0,0 +1,44 @@
+import sqlite3
+
+from conftest import login
+
+def test_matching_etag_gets_304(app_module):
+    client = login(app_module, 'coordinator1', 'coord1')
+    response = client.get('/api/dashboard-stats')
+    etag = response.headers['ETag']
+    assert response.headers['Cache-Control'] == 'private, no-cache'
+
+    revalidated = client.get('/api/dashboard-stats', headers={'If-None-Match': etag})
+    assert revalidated.status_code == 304
+    assert revalidated.data == b''
+    assert revalidated.headers['ETag'] == etag
+    assert client.get('/api/dashboard-stats', headers={'If-None-Match': '"stale"'}).status_code == 200
+
+def test_etags_differ_by_scope_and_args(app_module):
+    admin = login(app_module, 'superadmin', 'admin123')
+    coordinator = login(app_module, 'coordinator1', 'coord1')
+    etags = {
+        admin.get('/api/learners?limit=5').headers['ETag'],
+        admin.get('/api/learners?limit=6').headers['ETag'],
+        coordinator.get('/api/learners?limit=5').headers['ETag'],
+    }
+    assert len(etags) == 3
+
+def test_writes_change_the_etag(app_module):
+    client = login(app_module, 'superadmin', 'admin123')
+    etag = client.get('/api/interventions/status-counts').headers['ETag']
+    conn = sqlite3.connect(app_module.DB_PATH)
+    try:
+        conn.execute("UPDATE Nudge_Logs SET status = status WHERE rowid = (SELECT MIN(rowid) FROM Nudge_Logs)")
+        conn.commit()
+    finally:
+        conn.close()
+    response = client.get('/api/interventions/status-counts', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+def test_streamed_lists_revalidate_too(app_module):
+    client = login(app_module, 'coordinator1', 'coord1')
+    response = client.get('/api/learners')
+    assert response.is_streamed
+    assert client.get('/api/learners', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
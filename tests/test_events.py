@@ -0,0 +1,56 @@
+import json
+
+import db
+import events
+from conftest import login
+
+def login_events(learner_ids, count, prefix='e'):
+    return [{'event_id': f'{prefix}{i}', 'type': 'login', 'learner_id': learner_ids[i % len(learner_ids)],
+             'login_id': f'{prefix}-login-{i % (count // 2)}', 'login_time': f'2024-03-{1 + i % 28:02d}T09:30:00',
+             'total_duration': 10 + i % 50} for i in range(count)]
+
+def test_retried_batch_is_not_written_twice(conn):
+    learner_ids = [row[0] for row in conn.execute("SELECT learner_id FROM Learners LIMIT 20")]
+    batch = login_events(learner_ids, 200) + [
+        {'event_id': 'q1', 'type': 'quiz', 'learner_id': learner_ids[0], 'quiz_id': 'QX1', 'status': 'Completed', 'score': 90},
+        {'event_id': 'bad', 'type': 'quiz', 'learner_id': 'nobody', 'quiz_id': 'QX2', 'status': 'Completed'},
+    ]
+    first = events.ingest_events(conn, batch)
+    assert (first['accepted'], first['duplicates'], first['rejected']) == (201, 0, 1)
+    counts = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+              for table in ('Login_Activity', 'Quiz_Details', 'Ingested_Events')}
+    summary = conn.execute("SELECT * FROM Learner_Activity_Summary ORDER BY learner_id").fetchall()
+
+    retry = events.ingest_events(conn, batch)
+    assert (retry['accepted'], retry['duplicates'], retry['rejected']) == (0, 201, 1)
+    assert counts == {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in counts}
+    assert summary == conn.execute("SELECT * FROM Learner_Activity_Summary ORDER BY learner_id").fetchall()
+
+def test_rollups_match_a_rebuild_after_ingestion(conn):
+    learner_ids = [row[0] for row in conn.execute("SELECT learner_id FROM Learners LIMIT 50")]
+    # Half the events re-send an earlier login_id, so the rollup upserts see updates too
+    events.ingest_events(conn, login_events(learner_ids, 400))
+    def rows(table):
+        return sorted(tuple(round(value, 6) if isinstance(value, float) else value for value in row)
+                      for row in conn.execute(f"SELECT * FROM {table}"))
+    for table, spec in db.LOGIN_ROLLUPS.items():
+        live = rows(table)
+        db._backfill_login_rollup(conn.cursor(), table, spec)
+        assert live == rows(table)
+
+def test_oversized_bodies_are_refused(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'EVENTS_MAX_BODY', 1000)
+    client = login(app_module, 'superadmin', 'admin123')
+    big = [{'event_id': f'big{i}', 'type': 'login', 'learner_id': 'L0001'} for i in range(50)]
+    response = client.post('/api/events', json=big)
+    assert response.status_code == 413
+    ndjson = '\n'.join(json.dumps(event) for event in big)
+    response = client.post('/api/events', data=ndjson, content_type='application/x-ndjson')
+    assert response.status_code == 413
+    response = client.post('/api/events', json=big[:1])
+    assert response.status_code == 200
+    assert response.get_json()['rejected'] == 1
+
+def test_events_are_super_admin_only(app_module):
+    client = login(app_module, 'coordinator1', 'coord1')
+    assert client.post('/api/events', json=[]).status_code == 403
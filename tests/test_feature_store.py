@@ -0,0 +1,42 @@
+import math
+
+from engagement_predictor import FeatureStore, feature_store
+
+AS_OF = '2026-01-01 00:00:00'
+
+def feature(matrix, ids, learner_id, name):
+    return matrix[ids.index(learner_id)][FeatureStore.FEATURE_NAMES.index(name)]
+
+def test_features_match_the_source_rows(conn):
+    ids, matrix = feature_store.extract(conn, AS_OF)
+    assert ids == sorted(row[0] for row in conn.execute("SELECT learner_id FROM Learners"))
+    assert len(matrix[0]) == len(FeatureStore.FEATURE_NAMES)
+
+    learner_id, logins, minutes = conn.execute("""
+        SELECT learner_id, COUNT(*), SUM(total_duration) FROM Login_Activity
+        GROUP BY learner_id ORDER BY COUNT(*) DESC, learner_id LIMIT 1
+    """).fetchone()
+    assert feature(matrix, ids, learner_id, 'login_count') == logins
+    assert math.isclose(feature(matrix, ids, learner_id, 'login_hours'), minutes / 60.0)
+
+    # A learner with no quizzes counts zero of them and has no mean score
+    quizless = conn.execute("SELECT learner_id FROM Learners WHERE learner_id NOT IN "
+                            "(SELECT learner_id FROM Quiz_Details) ORDER BY learner_id LIMIT 1").fetchone()[0]
+    assert feature(matrix, ids, quizless, 'quiz_count') == 0
+    assert math.isnan(feature(matrix, ids, quizless, 'quiz_score_mean'))
+
+def test_builds_are_versioned_and_pruned(conn):
+    versions = [feature_store.build(conn, AS_OF) for _ in range(FeatureStore.KEEP_VERSIONS + 1)]
+    assert versions == list(range(1, FeatureStore.KEEP_VERSIONS + 2))
+    kept = [row[0] for row in conn.execute("SELECT DISTINCT version FROM Learner_Features ORDER BY version")]
+    assert kept == versions[-FeatureStore.KEEP_VERSIONS:]
+
+    version, names, ids, matrix = feature_store.load(conn)
+    assert version == versions[-1] and names == FeatureStore.FEATURE_NAMES
+    expected_ids, expected = feature_store.extract(conn, AS_OF)
+    assert ids == expected_ids
+    assert all(a == b or (math.isnan(a) and math.isnan(b)) for row, other in zip(matrix, expected) for a, b in zip(row, other))
+
+    subset = ids[5:8]
+    assert feature_store.load(conn, learner_ids=subset)[2] == subset
+    assert feature_store.load(conn, version=versions[0]) is None
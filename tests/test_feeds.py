@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+from conftest import login
+
+@pytest.mark.parametrize('route, items_key', [('tickets', 'tickets'), ('interventions', 'interventions')])
+@pytest.mark.parametrize('username, password', [('superadmin', 'admin123'), ('coordinator1', 'coord1')])
+def test_pages_cover_the_full_list(app_module, route, items_key, username, password):
+    client = login(app_module, username, password)
+    full = client.get(f'/api/{route}').get_json()
+    items, cursor = [], None
+    while True:
+        page = client.get(f'/api/{route}', query_string={'limit': 40, **({'cursor': cursor} if cursor else {})}).get_json()
+        assert len(page[items_key]) <= 40
+        assert page['total'] == len(full)
+        items.extend(page[items_key])
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    assert items == full
+    counts = client.get(f'/api/{route}/status-counts').get_json()
+    assert sum(counts.values()) == len(full)
+
+def test_full_lists_are_not_batched(app_module):
+    client = login(app_module, 'superadmin', 'admin123')
+    results = client.post('/api/batch', json={'requests': [
+        {'route': 'tickets'},
+        {'route': 'tickets', 'args': {'limit': 5}},
+    ]}).get_json()['results']
+    assert results[0]['status'] == 400
+    assert results[1]['status'] == 200 and len(results[1]['body']['tickets']) == 5
+
+def test_invalid_page_arguments(app_module):
+    client = login(app_module, 'superadmin', 'admin123')
+    assert client.get('/api/tickets?cursor=not-a-cursor').status_code == 400
+    assert client.get('/api/interventions?limit=5&format=ndjson').status_code == 400
+    lines = client.get('/api/interventions?format=ndjson').get_data(as_text=True).splitlines()
+    assert [json.loads(line) for line in lines] == client.get('/api/interventions').get_json()
+
+@pytest.mark.parametrize('username, password', [('superadmin', 'admin123'), ('coordinator1', 'coord1')])
+def test_learner_export_streams_every_learner(app_module, username, password):
+    client = login(app_module, username, password)
+    response = client.get('/api/learners')
+    assert response.is_streamed
+    assert response.mimetype == 'application/json'
+    learners = response.get_json()
+    assert len(learners) == client.get('/api/learners?limit=1').get_json()['total']
+    assert len({learner['id'] for learner in learners}) == len(learners)
+
+    response = client.get('/api/learners?format=ndjson')
+    assert response.mimetype == 'application/x-ndjson'
+    assert [json.loads(line) for line in response.get_data(as_text=True).splitlines()] == learners
+    assert client.get('/api/learners?format=csv').status_code == 400
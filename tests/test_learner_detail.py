@@ -0,0 +1,85 @@
+import sqlite3
+
+from conftest import login
+
+def busiest_learner(conn):
+    return conn.execute("SELECT learner_id FROM Login_Activity GROUP BY learner_id "
+                        "ORDER BY COUNT(*) DESC, learner_id LIMIT 1").fetchone()[0]
+
+def test_detail_matches_the_source_rows(app_module):
+    conn = sqlite3.connect(app_module.DB_PATH)
+    learner_id = busiest_learner(conn)
+    logins = conn.execute("SELECT COUNT(*) FROM Login_Activity WHERE learner_id = ?", (learner_id,)).fetchone()[0]
+    tickets = [row[0] for row in conn.execute(
+        "SELECT ticket_id FROM Ticket_Details WHERE learner_id = ? "
+        "ORDER BY COALESCE(created_at_epoch, 0) DESC, ticket_id DESC", (learner_id,))]
+    conn.close()
+
+    _, detail = app_module.load_learner_detail(learner_id)
+    assert detail['learner']['learner_id'] == learner_id
+    assert detail['totals']['logins'] == logins
+    assert [ticket['ticket_id'] for ticket in detail['tickets']] == tickets[:app_module.LEARNER_HISTORY_FIRST_PAGE]
+    assert len(detail['login_activity']) == min(logins, app_module.LEARNER_HISTORY_FIRST_PAGE)
+    assert (detail['next_cursors']['logins'] is None) == (logins <= app_module.LEARNER_HISTORY_FIRST_PAGE)
+    assert app_module.load_learner_detail('NO-SUCH-LEARNER')[1] is None
+
+def test_history_pages_cover_every_row_once(app_module):
+    conn = sqlite3.connect(app_module.DB_PATH)
+    learner_id = busiest_learner(conn)
+    expected = [row[0] for row in conn.execute(
+        "SELECT login_time FROM Login_Activity WHERE learner_id = ? "
+        "ORDER BY COALESCE(login_time_epoch, 0) DESC, login_id DESC", (learner_id,))]
+    conn.close()
+
+    client = login(app_module, 'superadmin', 'admin123')
+    seen, cursor = [], None
+    while True:
+        page = client.get(f"/api/learner/{learner_id}/logins?limit=3" + (f"&cursor={cursor}" if cursor else "")).get_json()
+        seen += [item['login_time'] for item in page['items']]
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    assert seen == expected
+    assert client.get(f"/api/learner/{learner_id}/grades").status_code == 404
+    assert client.get(f"/api/learner/{learner_id}/logins?cursor=bogus").status_code == 400
+
+def test_coordinators_only_see_their_courses(app_module):
+    conn = sqlite3.connect(app_module.DB_PATH)
+    outside = conn.execute("SELECT l.learner_id FROM Learners l JOIN Cohorts co ON l.cohort_id = co.cohort_id "
+                           "WHERE co.course_id NOT IN ('CR101', 'CS201') LIMIT 1").fetchone()[0]
+    conn.close()
+    client = login(app_module, 'coordinator1', 'coord1')
+    assert client.get(f"/api/learner/{outside}/logins").status_code == 404
+
+def test_cache_revalidates_per_learner(app_module):
+    cache = app_module.learner_detail_cache
+    conn = sqlite3.connect(app_module.DB_PATH)
+    learner_id, other_id = [row[0] for row in conn.execute("SELECT learner_id FROM Learners ORDER BY learner_id LIMIT 2")]
+    cache.clear()
+    try:
+        before = cache.stats()
+        nudges = len(cache.get(learner_id)['nudge_history'])
+        cache.get(learner_id)
+        assert cache.stats()['misses'] == before['misses'] + 1
+        assert cache.stats()['hits'] == before['hits'] + 1
+
+        # Another learner's write leaves this learner's entry valid
+        conn.execute("INSERT INTO Nudge_Logs (nudge_id, learner_id, nudge_type, message, timestamp) "
+                     "VALUES ('CACHE-1', ?, 'Test', 'Other', '2030-01-01 09:00:00')", (other_id,))
+        conn.commit()
+        cache.get(learner_id)
+        assert cache.stats()['revalidations'] == before['revalidations'] + 1
+
+        # The learner's own write reloads it
+        conn.execute("INSERT INTO Nudge_Logs (nudge_id, learner_id, nudge_type, message, timestamp) "
+                     "VALUES ('CACHE-2', ?, 'Test', 'Own', '2030-01-01 09:00:00')", (learner_id,))
+        conn.commit()
+        detail = cache.get(learner_id)
+        assert cache.stats()['misses'] == before['misses'] + 2
+        assert detail['nudge_history'][0]['message'] == 'Own'
+        assert len(detail['nudge_history']) == min(nudges + 1, app_module.LEARNER_HISTORY_FIRST_PAGE)
+    finally:
+        conn.execute("DELETE FROM Nudge_Logs WHERE nudge_id IN ('CACHE-1', 'CACHE-2')")
+        conn.commit()
+        conn.close()
+        cache.clear()
@@ -0,0 +1,54 @@
+import sqlite3
+
+from conftest import login
+
+def learners_by_scope(app_module):
+    """(a learner in coordinator1's courses, a learner outside them)"""
+    conn = sqlite3.connect(app_module.DB_PATH)
+    rows = conn.execute("""
+        SELECT co.course_id IN ('CR101', 'CS201'), MIN(l.learner_id)
+        FROM Learners l JOIN Cohorts co ON co.cohort_id = l.cohort_id
+        GROUP BY 1 ORDER BY 1 DESC
+    """).fetchall()
+    conn.close()
+    return rows[0][1], rows[1][1]
+
+def test_history_is_limited_to_the_users_courses(app_module):
+    inside, outside = learners_by_scope(app_module)
+    admin = login(app_module, 'superadmin', 'admin123')
+    coordinator = login(app_module, 'coordinator1', 'coord1')
+    for learner_id in (inside, outside):
+        assert admin.get(f'/api/learner/{learner_id}/logins').status_code == 200
+    assert coordinator.get(f'/api/learner/{inside}/logins').status_code == 200
+    # Also after Super Admin has cached the same learner
+    assert coordinator.get(f'/api/learner/{outside}/logins').status_code == 404
+    assert b'Learner not found' in coordinator.get(f'/learner/{outside}').data
+    assert admin.get('/api/learner/L0/logins').status_code == 404
+
+def test_history_pages_follow_the_cursor_and_answer_conditional_gets(app_module):
+    inside, _ = learners_by_scope(app_module)
+    admin = login(app_module, 'superadmin', 'admin123')
+    events = [{'event_id': f'history-{i}', 'type': 'login', 'learner_id': inside, 'login_id': f'HIST-{i}',
+               'login_time': f'2025-03-{i + 1:02d} 09:00:00', 'logout_time': f'2025-03-{i + 1:02d} 10:00:00'}
+              for i in range(5)]
+    assert admin.post('/api/events', json=events).get_json()['accepted'] == len(events)
+
+    url = f'/api/learner/{inside}/logins?limit=2'
+    pages, cursor = [], None
+    while True:
+        page = admin.get(url + (f'&cursor={cursor}' if cursor else '')).get_json()
+        pages.append(page['items'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    logins = [item for items in pages for item in items]
+    assert all(len(items) <= 2 for items in pages)
+    assert len(logins) == len({item['login_time'] for item in logins}) >= 5
+    assert [item['login_time'] for item in logins] == sorted((item['login_time'] for item in logins), reverse=True)
+
+    first = admin.get(url)
+    assert admin.get(url, headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+    # The learner's own activity invalidates the page
+    admin.post('/api/events', json=[{'event_id': 'history-late', 'type': 'login', 'learner_id': inside,
+                                     'login_id': 'HIST-late', 'login_time': '2025-12-30 09:00:00'}])
+    assert admin.get(url, headers={'If-None-Match': first.headers['ETag']}).status_code == 200
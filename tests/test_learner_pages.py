@@ -0,0 +1,35 @@
+import pytest
+
+from conftest import login
+
+def all_pages(client, **args):
+    learners, cursor = [], None
+    while True:
+        page = client.get('/api/learners', query_string={**args, **({'cursor': cursor} if cursor else {})}).get_json()
+        learners.extend(page['learners'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            return learners, page['total']
+
+@pytest.mark.parametrize('sort', ['name', '-engagement', 'last_active'])
+def test_pages_cover_every_learner_once(app_module, sort):
+    client = login(app_module, 'coordinator1', 'coord1')
+    learners, total = all_pages(client, sort=sort, limit=37)
+    full = client.get('/api/learners').get_json()
+    assert len(learners) == total == len(full)
+    assert sorted(learner['id'] for learner in learners) == sorted(learner['id'] for learner in full)
+    assert {learner['course_id'] for learner in learners} <= {'CR101', 'CS201'}
+
+def test_risk_filter_pages_past_the_first(app_module):
+    # The interventions page pulls at-risk learners 100 at a time
+    client = login(app_module, 'superadmin', 'admin123')
+    learners, total = all_pages(client, risk='medium,high', sort='engagement', limit=100)
+    assert total > 100 and len(learners) == total
+    assert all(learner['risk_level'] in ('medium', 'high') for learner in learners)
+    engagement = [learner['engagement'] for learner in learners]
+    assert engagement == sorted(engagement)
+
+def test_invalid_arguments_are_rejected(app_module):
+    client = login(app_module, 'superadmin', 'admin123')
+    assert client.get('/api/learners?sort=unknown').status_code == 400
+    assert client.get('/api/learners?cursor=%%%').status_code == 400
@@ -0,0 +1,83 @@
+import sqlite3
+
+import pytest
+
+from conftest import login
+from db import LOGIN_ROLLUPS
+
+def rollup_rows(conn, table):
+    spec = LOGIN_ROLLUPS[table]
+    columns = [spec['bucket'][0], 'course_id'] + (['cohort_id'] if spec['cohort'] else [])
+    columns += ['logins', 'ROUND(hours, 6)', 'active_learners'] + (['ROUND(score_sum, 6)'] if spec['score'] else [])
+    return sorted(tuple(row) for row in conn.execute(f"SELECT {', '.join(columns)} FROM {table}"))
+
+def reference_rows(conn, table):
+    """The rollup recomputed from every login, attributed to the learner's current cohort"""
+    spec = LOGIN_ROLLUPS[table]
+    keys = [spec['bucket'][1].format(row='la'), "COALESCE(co.course_id, '')"]
+    if spec['cohort']:
+        keys.append("COALESCE(l.cohort_id, '')")
+    score = [", ROUND(SUM(COALESCE(l.total_engagement_score, 0)), 6)"] if spec['score'] else [""]
+    return sorted(tuple(row) for row in conn.execute(f"""
+        SELECT {', '.join(keys)}, COUNT(*), ROUND(SUM(COALESCE(la.total_duration, 0)) / 3600.0, 6),
+               COUNT(DISTINCT la.learner_id){score[0]}
+        FROM Login_Activity la
+        LEFT JOIN Learners l ON la.learner_id = l.learner_id
+        LEFT JOIN Cohorts co ON l.cohort_id = co.cohort_id
+        WHERE la.login_time IS NOT NULL
+        GROUP BY {', '.join(str(i + 1) for i in range(len(keys)))}
+    """))
+
+def assert_rollups_current(conn):
+    for table in LOGIN_ROLLUPS:
+        assert rollup_rows(conn, table) == reference_rows(conn, table), table
+
+def busiest_learner(conn):
+    return conn.execute("""
+        SELECT la.learner_id, l.cohort_id, co.course_id
+        FROM Login_Activity la JOIN Learners l ON la.learner_id = l.learner_id
+        JOIN Cohorts co ON l.cohort_id = co.cohort_id
+        WHERE la.login_time IS NOT NULL
+        GROUP BY la.learner_id ORDER BY COUNT(*) DESC, la.learner_id LIMIT 1
+    """).fetchone()
+
+@pytest.mark.parametrize('same_course', [True, False])
+def test_moving_a_learner_then_deleting_a_login_keeps_rollups_current(conn, same_course):
+    assert_rollups_current(conn)
+    learner_id, old_cohort, course_id = busiest_learner(conn)
+    course_match = '=' if same_course else '!='
+    new_cohort = conn.execute(f"SELECT cohort_id FROM Cohorts WHERE course_id {course_match} ? AND cohort_id != ? "
+                              "ORDER BY cohort_id LIMIT 1", (course_id, old_cohort)).fetchone()[0]
+
+    conn.execute("UPDATE Learners SET cohort_id = ?, total_engagement_score = 42.5 WHERE learner_id = ?",
+                 (new_cohort, learner_id))
+    assert_rollups_current(conn)
+
+    logins = [row[0] for row in conn.execute(
+        "SELECT login_id FROM Login_Activity WHERE learner_id = ? ORDER BY login_id", (learner_id,))]
+    conn.execute("DELETE FROM Login_Activity WHERE login_id = ?", (logins[0],))
+    conn.execute("UPDATE Login_Activity SET total_duration = total_duration + 30 WHERE login_id = ?", (logins[1],))
+    assert_rollups_current(conn)
+
+    # Moving back restores the original attribution
+    conn.execute("UPDATE Learners SET cohort_id = ? WHERE learner_id = ?", (old_cohort, learner_id))
+    assert_rollups_current(conn)
+
+def test_dashboard_trend_covers_only_the_coordinators_courses(app_module, monkeypatch):
+    rendered = []
+    monkeypatch.setattr(app_module, 'render_template', lambda template, **context: rendered.append(context) or '')
+    assert login(app_module, 'coordinator1', 'coord1').get('/dashboard').status_code == 200
+    trend = rendered[0]['trend_data']
+
+    conn = sqlite3.connect(app_module.DB_PATH)
+    expected = [0] * 7
+    for weekday, learners in conn.execute("""
+        SELECT CAST(strftime('%w', la.login_time) AS INTEGER), COUNT(DISTINCT la.learner_id)
+        FROM Login_Activity la JOIN Learners l ON la.learner_id = l.learner_id
+        JOIN Cohorts co ON l.cohort_id = co.cohort_id
+        WHERE la.login_time IS NOT NULL AND co.course_id IN ('CR101', 'CS201')
+        GROUP BY 1
+    """):
+        expected[weekday] = learners
+    conn.close()
+    assert trend['daily_active_users'] == expected
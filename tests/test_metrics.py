@@ -0,0 +1,57 @@
+import threading
+
+from conftest import login
+
+def sample(body, name, **labels):
+    """Value of one exposition line, 0 if absent"""
+    wanted = ','.join(f'{key}="{value}"' for key, value in labels.items())
+    for line in body.splitlines():
+        if line.startswith(f'{name}{{{wanted}') and not line.startswith('#'):
+            return float(line.rsplit(' ', 1)[1])
+    return 0
+
+def test_metrics_require_a_super_admin_or_the_token(app_module, monkeypatch):
+    anonymous = app_module.app.test_client()
+    assert anonymous.get('/metrics').status_code == 403
+    assert login(app_module, 'coordinator1', 'coord1').get('/metrics').status_code == 403
+    monkeypatch.setattr(app_module, 'METRICS_TOKEN', 'scrape-secret')
+    assert anonymous.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 403
+    assert anonymous.get('/metrics', headers={'Authorization': 'Bearer scrape-secret'}).status_code == 200
+
+def test_requests_are_counted_per_route(app_module):
+    admin = login(app_module, 'superadmin', 'admin123')
+    labels = {'route': '/api/dashboard-stats', 'method': 'GET', 'status': '200', 'role': 'Super Admin'}
+    before = sample(admin.get('/metrics').get_data(as_text=True), 'learnengage_http_request_duration_seconds_count', **labels)
+    for _ in range(3):
+        admin.get('/api/dashboard-stats')
+    body = admin.get('/metrics').get_data(as_text=True)
+    assert sample(body, 'learnengage_http_request_duration_seconds_count', **labels) == before + 3
+    assert sample(body, 'learnengage_http_request_duration_seconds_bucket', **labels, le='+Inf') == before + 3
+
+def test_collect_while_threads_record(app_module):
+    metrics = app_module.RequestMetrics()
+    stop = threading.Event()
+
+    def record(n):
+        i = 0
+        while not stop.is_set():
+            # New keys keep growing the thread's dicts while they are copied
+            route = f'/route-{n}-{i % 200}'
+            metrics.started(route)
+            metrics.finished(route, 'GET', 200, 'Super Admin', 0.001, 0.0005)
+            i += 1
+
+    threads = [threading.Thread(target=record, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    try:
+        for _ in range(20):
+            totals = metrics.collect()
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+    totals = metrics.collect()
+    assert all(value == 0 for value in totals['in_flight'].values())
+    assert sum(histogram[-1] for histogram in totals['latency'].values()) == \
+        sum(histogram[-1] for histogram in totals['db'].values())
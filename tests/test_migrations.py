@@ -0,0 +1,45 @@
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+import db
+
+BASELINE_DB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'engagement_hackathon.db')
+
+def plan(conn, query, params=()):
+    return ' '.join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params))
+
+def test_baseline_database_upgrades_to_the_latest_version(tmp_path):
+    path = str(tmp_path / 'baseline.db')
+    shutil.copy(BASELINE_DB, path)
+    conn = sqlite3.connect(path)
+    try:
+        applied = db.apply_migrations(conn)
+        assert [version for version, _ in applied] == [version for version, _, _ in db.MIGRATIONS]
+        assert db.get_schema_version(conn.cursor()) == db.MIGRATIONS[-1][0]
+        # A second run finds nothing to do
+        assert db.apply_migrations(conn) == []
+
+        assert 'USING COVERING INDEX idx_login_learner_time' in plan(
+            conn, "SELECT SUM(total_duration) FROM Login_Activity WHERE learner_id = ?", ('L0001',))
+        assert 'USING INDEX idx_learners_cohort' in plan(conn, "SELECT * FROM Learners WHERE cohort_id = ?", ('C1',))
+        assert 'idx_cohorts_course' in plan(conn, "SELECT cohort_id FROM Cohorts WHERE course_id = ?", ('CR101',))
+    finally:
+        conn.close()
+
+def test_failed_migration_rolls_back(seeded_db, monkeypatch):
+    def broken(cursor):
+        cursor.execute("CREATE TABLE Half_Done (id INTEGER)")
+        cursor.execute("SELECT * FROM No_Such_Table")
+    latest = db.MIGRATIONS[-1][0]
+    monkeypatch.setattr(db, 'MIGRATIONS', db.MIGRATIONS + [(latest + 1, 'broken', broken)])
+    conn = sqlite3.connect(seeded_db)
+    try:
+        with pytest.raises(sqlite3.OperationalError):
+            db.apply_migrations(conn)
+        assert db.get_schema_version(conn.cursor()) == latest
+        assert conn.execute("SELECT name FROM sqlite_master WHERE name = 'Half_Done'").fetchone() is None
+    finally:
+        conn.close()
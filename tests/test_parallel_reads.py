@@ -0,0 +1,30 @@
+import pytest
+
+import benchmark
+from conftest import login
+
+def test_parallel_reads_return_every_result(app_module):
+    with app_module.app.test_request_context('/'):
+        results = app_module.run_parallel_reads({
+            'learners': lambda conn: conn.execute("SELECT COUNT(*) FROM Learners").fetchone()[0],
+            'cohorts': lambda conn: conn.execute("SELECT COUNT(*) FROM Cohorts").fetchone()[0],
+        })
+        assert [name for name, _ in app_module.g.parallel_reads] == ['learners', 'cohorts']
+    assert results == {'learners': 500, 'cohorts': 20}
+
+def test_a_failed_read_fails_the_call(app_module):
+    with app_module.app.test_request_context('/'):
+        with pytest.raises(app_module.sqlite3.OperationalError):
+            app_module.run_parallel_reads({
+                'ok': lambda conn: conn.execute("SELECT 1").fetchone(),
+                'broken': lambda conn: conn.execute("SELECT * FROM No_Such_Table").fetchone(),
+            })
+
+def test_benchmark_counts_queries_run_on_executor_threads(app_module):
+    benchmark.instrument_pools(app_module)
+    client = login(app_module, 'superadmin', 'admin123')
+    status, _, statements, vm_steps = benchmark.timed_request(app_module, client, 'GET', '/dashboard', None, False)
+    assert status == 200
+    # The dashboard's summary, scores and trend are parallel reads
+    assert statements >= 3 and vm_steps > 0
+    assert app_module.learner_detail_cache.stats()['entries'] == 0
@@ -0,0 +1,32 @@
+from conftest import login
+
+def test_requests_report_their_sql_in_server_timing(app_module):
+    client = login(app_module, 'superadmin', 'admin123')
+    app_module.response_cache.clear()
+    timing = client.get('/api/analytics').headers['Server-Timing']
+    assert timing.startswith('db;dur=')
+    assert 'queries"' in timing
+
+def test_debug_queries_ranks_statements(app_module):
+    admin = login(app_module, 'superadmin', 'admin123')
+    app_module.response_cache.clear()
+    app_module.query_stats.clear()
+    admin.get('/api/analytics')
+    report = admin.get('/debug/queries?sort=count&limit=5').get_json()
+    counts = [statement['count'] for statement in report['statements']]
+    assert 0 < len(counts) <= 5 and counts == sorted(counts, reverse=True)
+    assert any(request['endpoint'] == 'api_analytics' for request in report['slowest_requests'])
+
+    assert admin.get('/debug/queries?sort=rowid').status_code == 400
+    assert admin.get('/debug/queries?limit=x').status_code == 400
+    assert login(app_module, 'coordinator1', 'coord1').get('/debug/queries').status_code == 403
+
+def test_slow_queries_are_logged_with_their_plan(app_module, monkeypatch):
+    monkeypatch.setattr(app_module.query_stats, 'slow_ms', 0)
+    client = login(app_module, 'superadmin', 'admin123')
+    app_module.response_cache.clear()
+    client.get('/api/tickets/status-counts')
+    slow = client.get('/debug/queries').get_json()['slow_queries']
+    latest = next(query for query in slow if query['endpoint'] == 'api_ticket_status_counts')
+    assert 'Ticket_Details' in latest['sql']
+    assert latest['plan'] and not latest['plan'][0].startswith('(no plan')
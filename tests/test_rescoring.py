@@ -0,0 +1,35 @@
+from engagement_predictor import predictor
+
+def add_login(conn, learner_id, login_id):
+    conn.execute("INSERT INTO Login_Activity (login_id, learner_id, login_time, total_duration) "
+                 "VALUES (?, ?, '2030-01-01 09:00:00', 600)", (login_id, learner_id))
+    conn.commit()
+
+def test_only_learners_with_new_activity_are_rescored(conn):
+    learners = [row[0] for row in conn.execute("SELECT learner_id FROM Learners ORDER BY learner_id")]
+    assert predictor.update_predictions(conn, full=True) == len(learners)
+    assert predictor.stale_learners(conn.cursor()) == []
+    assert predictor.update_predictions(conn) == 0
+
+    # Below the login-hours target, so more logins must raise the score
+    active = conn.execute("SELECT learner_id FROM Learner_Activity_Summary "
+                          "ORDER BY total_login_time, learner_id LIMIT 1").fetchone()[0]
+    before = conn.execute("SELECT total_engagement_score, prediction_timestamp FROM Learners WHERE learner_id = ?",
+                          (active,)).fetchone()
+    add_login(conn, active, 'RESCORE-1')
+    assert predictor.stale_learners(conn.cursor()) == [active]
+    assert predictor.update_predictions(conn) == 1
+    after = conn.execute("SELECT total_engagement_score, prediction_timestamp FROM Learners WHERE learner_id = ?",
+                         (active,)).fetchone()
+    # Ten more login hours raise the score, and the new stamp clears the learner
+    assert after[0] > before[0] and after[1] > before[1]
+    assert predictor.stale_learners(conn.cursor()) == []
+
+def test_unscored_learners_are_stale(conn):
+    predictor.update_predictions(conn, full=True)
+    learner_id = conn.execute("SELECT learner_id FROM Learners ORDER BY learner_id LIMIT 1").fetchone()[0]
+    conn.execute("UPDATE Learners SET prediction_timestamp = NULL WHERE learner_id = ?", (learner_id,))
+    conn.commit()
+    assert predictor.stale_learners(conn.cursor()) == [learner_id]
+    assert predictor.update_predictions(conn) == 1
+    assert predictor.stale_learners(conn.cursor()) == []
@@ -0,0 +1,58 @@
+import sqlite3
+import time
+
+from conftest import login
+
+def test_entries_are_bounded_and_expire(app_module):
+    cache = app_module.ResponseCache(max_entries=2, max_bytes=10, ttl=60)
+    cache.put('a', (1,), b'aaaa', 'application/json')
+    cache.put('b', (1,), b'bbbb', 'application/json')
+    assert cache.get('a', (1,)) == (b'aaaa', 'application/json')
+    # 'b' is now least recently used, and a third entry exceeds both bounds
+    cache.put('c', (1,), b'cccc', 'application/json')
+    assert cache.get('b', (1,)) is None
+    assert cache.get('a', (1,)) is not None
+    cache.put('huge', (1,), b'x' * 11, 'application/json')
+    assert cache.get('huge', (1,)) is None
+    # Moved versions invalidate
+    assert cache.get('a', (2,)) is None
+    assert cache.stats()['invalidations'] == 1
+
+    expiring = app_module.ResponseCache(ttl=0.01)
+    expiring.put('a', (1,), b'aaaa', 'application/json')
+    time.sleep(0.02)
+    assert expiring.get('a', (1,)) is None
+    assert expiring.stats()['expirations'] == 1
+
+def test_responses_are_cached_per_scope(app_module):
+    admin = login(app_module, 'superadmin', 'admin123')
+    coordinator = login(app_module, 'coordinator1', 'coord1')
+    admin_counts = admin.get('/api/tickets/status-counts').get_json()
+    coordinator_counts = coordinator.get('/api/tickets/status-counts').get_json()
+    assert sum(coordinator_counts.values()) < sum(admin_counts.values())
+
+    hits = app_module.response_cache.stats()['hits']
+    assert coordinator.get('/api/tickets/status-counts').get_json() == coordinator_counts
+    assert admin.get('/api/tickets/status-counts').get_json() == admin_counts
+    assert app_module.response_cache.stats()['hits'] == hits + 2
+
+def test_writes_invalidate_cached_responses(app_module):
+    client = login(app_module, 'coordinator1', 'coord1')
+    before = client.get('/api/tickets/status-counts').get_json()
+    conn = sqlite3.connect(app_module.DB_PATH)
+    ticket_id, status = conn.execute("""
+        SELECT t.ticket_id, t.status FROM Ticket_Details t
+        JOIN Learners l ON t.learner_id = l.learner_id JOIN Cohorts co ON l.cohort_id = co.cohort_id
+        WHERE co.course_id = 'CR101' AND t.status != 'Cache Test' LIMIT 1
+    """).fetchone()
+    try:
+        conn.execute("UPDATE Ticket_Details SET status = 'Cache Test' WHERE ticket_id = ?", (ticket_id,))
+        conn.commit()
+        after = client.get('/api/tickets/status-counts').get_json()
+        assert after['Cache Test'] == 1
+        assert after[status] == before[status] - 1
+    finally:
+        conn.execute("UPDATE Ticket_Details SET status = ? WHERE ticket_id = ?", (status, ticket_id))
+        conn.commit()
+        conn.close()
+    assert client.get('/api/tickets/status-counts').get_json() == before
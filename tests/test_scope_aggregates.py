@@ -0,0 +1,21 @@
+import sqlite3
+
+import pytest
+
+from benchmark import check_aggregates, seed_activity_db
+
+def test_builder_matches_reference_on_generated_data(seeded_db):
+    conn = sqlite3.connect(seeded_db)
+    try:
+        assert check_aggregates(conn) == []
+    finally:
+        conn.close()
+
+@pytest.mark.parametrize('rows_per_learner', [0, 1, 3])
+def test_builder_matches_reference_without_fan_out(tmp_path, rows_per_learner):
+    # Several rows per learner in every activity table is where a joined query double counts
+    conn = seed_activity_db(str(tmp_path / "activity.db"), learners=60, rows_per_learner=rows_per_learner)
+    try:
+        assert check_aggregates(conn) == []
+    finally:
+        conn.close()